@@ -0,0 +1,109 @@
+import argparse
+import itertools
+import json
+import sys
+
+from benchmarks.hwpc_handler import run_case
+from benchmarks.metadata import run_metadata
+
+# Throughput drop (relative to the baseline) reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.1
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def _float_list(value: str) -> list[float]:
+    return [float(item) for item in value.split(",")]
+
+
+def _case_id(params: dict) -> str:
+    return ",".join(f"{name}={value}" for name, value in sorted(params.items()))
+
+
+def compare(baseline: dict, results: dict) -> int:
+    """
+    Print the throughput of the results relative to the baseline ones.
+    :return: Number of cases whose throughput dropped more than the regression threshold
+    """
+    baseline_cases = {_case_id(case["params"]): case for case in baseline["results"]}
+    regressions = 0
+    for case in results["results"]:
+        case_id = _case_id(case["params"])
+        reference = baseline_cases.get(case_id)
+        if reference is None:
+            continue
+
+        ratio = (
+            case["handle_reports_per_second"] / reference["handle_reports_per_second"]
+        )
+        regression = ratio < 1 - REGRESSION_THRESHOLD
+        regressions += regression
+        print(
+            f"{'REGRESSION ' if regression else ''}{case_id}: "
+            f"{reference['handle_reports_per_second']:.0f} -> {case['handle_reports_per_second']:.0f} reports/s "
+            f"({ratio - 1:+.1%}), peak memory {reference['peak_memory_bytes']} -> {case['peak_memory_bytes']} bytes"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Micro-benchmarks of the AverageWatts formula hot path, using a synthetic sensor.",
+    )
+    parser.add_argument("--targets", type=_int_list, default=[10, 100, 1000, 10000])
+    parser.add_argument("--sockets", type=_int_list, default=[1, 2])
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--out-of-order", type=_float_list, default=[0.0, 0.05])
+    parser.add_argument("--sensor-level", action="store_true")
+    parser.add_argument("--batch-delivery", action="store_true")
+    parser.add_argument("--shared-power-reports", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="file where the JSON results are written")
+    parser.add_argument(
+        "--compare", help="JSON results of a previous run to compare with"
+    )
+    args = parser.parse_args()
+
+    results = {
+        "metadata": run_metadata(),
+        "results": [],
+    }
+
+    for targets, sockets, out_of_order_rate in itertools.product(
+        args.targets, args.sockets, args.out_of_order
+    ):
+        case = run_case(
+            targets,
+            sockets,
+            args.ticks,
+            out_of_order_rate,
+            sensor_level=args.sensor_level,
+            batch_delivery=args.batch_delivery,
+            shared_power_reports=args.shared_power_reports,
+            repeat=args.repeat,
+        )
+        results["results"].append(case)
+        print(
+            f"{_case_id(case['params'])}: {case['handle_reports_per_second']:.0f} reports/s, "
+            f"tick p50 {case['tick_latency_us'].get('p50', 0):.0f}us, peak memory {case['peak_memory_bytes']} bytes",
+            file=sys.stderr,
+        )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            return 1 if compare(json.load(baseline_file), results) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import datetime
+import random
+
+from powerapi.report import HWPCReport
+
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+TICK_PERIOD_MS = 1000
+CPUS_PER_SOCKET = 8
+RAPL_ENERGY_PKG = 11757944832
+
+
+class SyntheticSensor:
+    """
+    Generator of the HWPC reports of a synthetic sensor, as sent by the HWPC sensor to the formula.
+    Each tick is made of a global report carrying the RAPL energy of every socket and of one report per target, each
+    target running on a single cpu.
+    """
+
+    def __init__(
+        self,
+        targets: int,
+        sockets: int = 1,
+        ticks: int = 10,
+        out_of_order_rate: float = 0.0,
+        sensor: str = "bench-sensor",
+        seed: int = 0,
+    ):
+        """
+        :param targets: Number of targets reported at each tick
+        :param sockets: Number of sockets of the monitored machine
+        :param ticks: Number of ticks generated
+        :param out_of_order_rate: Probability for a report to be delivered after a report of the next tick
+        :param sensor: Name of the sensor
+        :param seed: Seed of the random generator, the same seed always generates the same reports
+        """
+        self.targets = targets
+        self.sockets = sockets
+        self.ticks = ticks
+        self.out_of_order_rate = out_of_order_rate
+        self.sensor = sensor
+        self.seed = seed
+
+    def _global_report(self, timestamp: datetime.datetime, tick: int) -> HWPCReport:
+        rapl = {}
+        msr = {}
+        for socket in range(self.sockets):
+            first_cpu = socket * CPUS_PER_SOCKET
+            rapl[str(socket)] = {
+                str(first_cpu): {"RAPL_ENERGY_PKG": RAPL_ENERGY_PKG + tick * 1024}
+            }
+            msr[str(socket)] = {
+                str(cpu): {"APERF": cpu, "MPERF": cpu, "TSC": tick}
+                for cpu in range(first_cpu, first_cpu + CPUS_PER_SOCKET)
+            }
+        return HWPCReport(timestamp, self.sensor, "all", {"rapl": rapl, "msr": msr})
+
+    def _target_report(
+        self, timestamp: datetime.datetime, target: int, rng: random.Random
+    ) -> HWPCReport:
+        socket = target % self.sockets
+        cpu = socket * CPUS_PER_SOCKET + target % CPUS_PER_SOCKET
+        groups = {
+            "core": {
+                str(socket): {
+                    str(cpu): {
+                        "CPU_CLK_THREAD_UNHALTED:REF_P": rng.randrange(1 << 20),
+                        "INSTRUCTIONS_RETIRED": rng.randrange(1 << 20),
+                    }
+                }
+            }
+        }
+        metadata = {"pod": f"pod-{target}", "namespace": "bench"}
+        return HWPCReport(timestamp, self.sensor, f"/target{target}", groups, metadata)
+
+    def tick_reports(
+        self, timestamp: datetime.datetime, tick: int, rng: random.Random
+    ) -> list[HWPCReport]:
+        """
+        Generate the reports of a tick: its global report followed by the report of each target.
+        :param timestamp: Timestamp of the tick
+        :param tick: Number of the tick
+        :param rng: Random generator of the events counters of the targets
+        :return: The reports of the tick
+        """
+        reports = [self._global_report(timestamp, tick)]
+        reports.extend(
+            self._target_report(timestamp, target, rng)
+            for target in range(self.targets)
+        )
+        return reports
+
+    def generate(self) -> list[HWPCReport]:
+        """
+        Generate the reports of every tick, in delivery order.
+        :return: The generated reports
+        """
+        rng = random.Random(self.seed)
+        reports = []
+        for tick in range(self.ticks):
+            timestamp = START_TIMESTAMP + datetime.timedelta(
+                milliseconds=tick * TICK_PERIOD_MS
+            )
+            tick_reports = self.tick_reports(timestamp, tick, rng)
+            rng.shuffle(tick_reports)
+            reports.extend(tick_reports)
+
+        # Delay some reports after a report of the next tick
+        if self.out_of_order_rate:
+            tick_size = self.targets + 1
+            for position in range(len(reports) - tick_size):
+                if rng.random() < self.out_of_order_rate:
+                    swap = position + rng.randrange(1, tick_size + 1)
+                    reports[position], reports[swap] = reports[swap], reports[position]
+        return reports
@@ -0,0 +1,178 @@
+import gc
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from powerapi.report import HWPCReport
+
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.handler import HWPCReportHandler
+from benchmarks.generator import TICK_PERIOD_MS, SyntheticSensor
+
+
+class NullPusher:
+    """
+    Pusher discarding the sent reports, counting them.
+    """
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_data(self, msg):
+        self.sent += 1
+
+
+def create_handler(
+    sensor_level: bool, batch_delivery: bool, shared_power_reports: bool = False
+) -> HWPCReportHandler:
+    """
+    Create a HWPC report handler monitoring the socket 0 (or every socket in sensor level mode), without actor.
+    Reports can be delivered up to a tick late.
+    """
+    config = AverageWattsFormulaConfig(
+        allowed_lateness=2 * TICK_PERIOD_MS,
+        batch_delivery=batch_delivery,
+        sensor_level=sensor_level,
+        shared_power_reports=shared_power_reports,
+    )
+    state = SimpleNamespace(
+        socket="0",
+        sensor="bench-sensor",
+        config=config,
+        pushers={"pusher": NullPusher()},
+        actor=SimpleNamespace(name="bench-formula"),
+    )
+    return HWPCReportHandler(state)
+
+
+def dispatched_reports(
+    reports: list[HWPCReport], sensor_level: bool
+) -> list[HWPCReport]:
+    """
+    Keep the reports the dispatcher sends to the formula of the socket 0, or every report in sensor level mode.
+    """
+    if sensor_level:
+        return reports
+    return [
+        report
+        for report in reports
+        if any("0" in group for group in report.groups.values())
+    ]
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+
+    samples = sorted(samples)
+    quantiles = (
+        statistics.quantiles(samples, n=100, method="inclusive")
+        if len(samples) > 1
+        else samples * 99
+    )
+    return {
+        "p50": quantiles[49],
+        "p90": quantiles[89],
+        "p99": quantiles[98],
+        "max": samples[-1],
+    }
+
+
+def _run_handle(handler: HWPCReportHandler, reports: list[HWPCReport]) -> list[float]:
+    """
+    Feed the reports to the handler, recording the duration (in seconds) of each tick processing, the ticks of a
+    catch-up batch sharing its duration.
+    """
+    durations = []
+    process_oldest_tick = handler._process_oldest_tick
+    catch_up = handler._catch_up
+
+    def timed_process_oldest_tick():
+        begin = time.perf_counter()
+        power_reports = process_oldest_tick()
+        durations.append(time.perf_counter() - begin)
+        return power_reports
+
+    def timed_catch_up(count: int):
+        begin = time.perf_counter()
+        catch_up(count)
+        durations.extend([(time.perf_counter() - begin) / count] * count)
+
+    handler._process_oldest_tick = timed_process_oldest_tick
+    handler._catch_up = timed_catch_up
+    for report in reports:
+        handler.handle(report)
+    while len(handler.ticks):
+        handler._emit_oldest_tick()
+    return durations
+
+
+def run_case(
+    targets: int,
+    sockets: int,
+    ticks: int,
+    out_of_order_rate: float,
+    sensor_level: bool = False,
+    batch_delivery: bool = False,
+    shared_power_reports: bool = False,
+    repeat: int = 3,
+) -> dict:
+    """
+    Benchmark the formula handler with the reports of a synthetic sensor.
+    The throughput and latencies are taken from the fastest of the repeated runs, the memory usage is measured in a
+    separate traced run.
+    :return: The parameters and the measurements of the case
+    """
+    sensor = SyntheticSensor(targets, sockets, ticks, out_of_order_rate)
+    reports = dispatched_reports(sensor.generate(), sensor_level)
+
+    best = None
+    for _ in range(repeat):
+        handler = create_handler(sensor_level, batch_delivery, shared_power_reports)
+        gc.collect()
+        begin = time.perf_counter()
+        durations = _run_handle(handler, reports)
+        elapsed = time.perf_counter() - begin
+        if best is None or elapsed < best[0]:
+            best = (elapsed, durations, handler)
+
+    elapsed, durations, handler = best
+    processing_time = sum(durations)
+
+    handler = create_handler(sensor_level, batch_delivery, shared_power_reports)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    _run_handle(handler, reports)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = after.compare_to(before, "filename")
+
+    return {
+        "params": {
+            "targets": targets,
+            "sockets": sockets,
+            "ticks": ticks,
+            "out_of_order_rate": out_of_order_rate,
+            "sensor_level": sensor_level,
+            "batch_delivery": batch_delivery,
+            "shared_power_reports": shared_power_reports,
+        },
+        "reports": len(reports),
+        "processed_ticks": len(durations),
+        "late_reports": handler.late_reports,
+        "handle_seconds": elapsed,
+        "handle_reports_per_second": len(reports) / elapsed,
+        "process_ticks_per_second": (
+            len(durations) / processing_time if processing_time else None
+        ),
+        "tick_latency_us": {
+            name: value * 1e6 for name, value in _percentiles(durations).items()
+        },
+        "peak_memory_bytes": peak,
+        "retained_blocks": sum(stat.count_diff for stat in allocations),
+        "retained_bytes": sum(stat.size_diff for stat in allocations),
+    }
@@ -0,0 +1,36 @@
+import datetime
+import platform
+import subprocess
+
+import numpy
+from powerapi import __version__ as powerapi_version
+
+from averagewatts import __version__ as naive_version
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> dict:
+    """
+    Describe the environment of a benchmark run, stored along its results to compare runs of different commits.
+    :return: Date, commit, versions and platform of the run
+    """
+    return {
+        "date": datetime.datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "averagewatts": naive_version,
+        "powerapi": powerapi_version,
+        "numpy": numpy.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
@@ -0,0 +1,512 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+import numpy
+from powerapi.database.base_db import BaseDB
+from powerapi.report import Report
+
+from averagewatts.__main__ import run_asyncio, run_naive
+from averagewatts.backends import DATABASE_FACTORIES
+from averagewatts.cli import AverageWattsCLIParsingManager, AverageWattsConfigValidator
+from averagewatts.engine import ASYNCIO_ENGINE
+from benchmarks.generator import START_TIMESTAMP, SyntheticSensor
+from benchmarks.metadata import run_metadata
+
+# Database type of the sink recording the power reports of the formula.
+SINK_DB_TYPE = "soak-sink"
+
+# Ratio of the offered ticks that the formula must process for a stage to be sustained.
+SATURATION_THRESHOLD = 0.95
+
+# Growth (in seconds per second) of the latency of a stage above which the formula falls behind its inputs.
+LATENCY_SLOPE_THRESHOLD = 0.05
+
+# Period (in s) at which the memory of the formula is sampled.
+MEMORY_SAMPLE_PERIOD = 1.0
+
+# Delay (in s) to wait for the formula to accept the connections of the sensors.
+CONNECT_TIMEOUT = 30.0
+
+# Delay (in s) to wait for the formula to drain its buffered ticks once stopped.
+STOP_TIMEOUT = 30.0
+
+
+class SinkDB(BaseDB):
+    """
+    Output database recording the arrival of the power reports, sent to the soak harness through a queue.
+    """
+
+    def __init__(self, report_type: type[Report], records: multiprocessing.Queue):
+        """
+        :param report_type: Type of the reports
+        :param records: Queue of the (arrival time, reports timestamps, processed ticks) records of the saved batches
+        """
+        super().__init__(report_type)
+        self.records = records
+
+    def connect(self):
+        pass
+
+    def iter(self, stream_mode: bool = False):
+        raise NotImplementedError("SinkDB is a write-only database")
+
+    def save(self, report: Report):
+        self.save_many([report])
+
+    def save_many(self, reports: list[Report]):
+        arrival = time.time()
+        timestamps = numpy.fromiter(
+            (report.timestamp.timestamp() for report in reports),
+            dtype=numpy.float64,
+            count=len(reports),
+        )
+        ticks = {(report.sensor, report.timestamp) for report in reports}
+        self.records.put((arrival, timestamps, ticks))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _process_tree_rss(pid: int) -> int:
+    """
+    Resident memory of a process and of all its descendants, read from /proc.
+    :return: Resident memory in bytes, 0 if the process is gone
+    """
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as stat_file:
+                fields = stat_file.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    rss = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm", encoding="utf-8") as statm_file:
+                rss += int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            continue
+        pending.extend(children.get(current, []))
+    return rss
+
+
+def render_sensor_reports(
+    sensor: str, targets: int, sockets: int, seed: int = 0
+) -> list[bytes]:
+    """
+    Render the reports of a tick of a synthetic sensor to JSON documents whose timestamp is left to be prepended.
+    :return: Rendered reports, each one following the timestamp field of its document
+    """
+    synthetic_sensor = SyntheticSensor(targets, sockets, sensor=sensor, seed=seed)
+    rendered = []
+    for report in synthetic_sensor.tick_reports(
+        START_TIMESTAMP, 0, random.Random(seed)
+    ):
+        document = {
+            "sensor": report.sensor,
+            "target": report.target,
+            "groups": report.groups,
+            "metadata": report.metadata,
+        }
+        rendered.append(b", " + json.dumps(document)[1:].encode() + b"\n")
+    return rendered
+
+
+def generate_load(
+    port: int,
+    sensors: list[list[bytes]],
+    rate: float,
+    duration: float,
+    results: multiprocessing.Queue,
+):
+    """
+    Send the reports of the sensors to the socket input of the formula, a tick every 1/rate seconds for each sensor.
+    A tick is timestamped with the time it was scheduled at, the latency of the formula thus includes the delay of
+    the sends blocked by a formula falling behind its inputs.
+    :param port: Port of the socket input of the formula
+    :param sensors: Rendered reports of each sensor
+    :param rate: Number of ticks sent per second by each sensor
+    :param duration: Duration (in s) of the load
+    :param results: Queue where the number of ticks sent and the maximum send delay are put
+    """
+    connections = []
+    deadline = time.time() + CONNECT_TIMEOUT
+    for _ in sensors:
+        while True:
+            try:
+                connections.append(socket.create_connection(("127.0.0.1", port)))
+                break
+            except ConnectionRefusedError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.1)
+
+    period = 1 / rate
+    scheduled = time.time()
+    end = scheduled + duration
+    ticks = 0
+    max_delay = 0.0
+    while scheduled < end:
+        timestamp = b'{"timestamp": %d' % int(scheduled * 1000)
+        for connection, reports in zip(connections, sensors, strict=True):
+            connection.sendall(b"".join(timestamp + report for report in reports))
+        ticks += 1
+        max_delay = max(max_delay, time.time() - scheduled)
+        scheduled += period
+        time.sleep(max(0.0, scheduled - time.time()))
+
+    for connection in connections:
+        connection.close()
+    results.put((ticks, max_delay))
+
+
+def _run_formula(config: dict, verbose: bool):
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.WARNING,
+        format="%(asctime)s - %(process)d - %(processName)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    if config.get("engine") == ASYNCIO_ENGINE:
+        run_asyncio(config)
+    else:
+        run_naive(config)
+
+
+def generate_formula_config(port: int, formula_args: list[str]) -> dict:
+    """
+    Generate the configuration of a streaming formula reading the sensors from a socket input and writing to the sink.
+    :param port: Port of the socket input
+    :param formula_args: Additional command line options of the formula
+    :return: The validated configuration
+    """
+    config = AverageWattsCLIParsingManager().parse(
+        [
+            "averagewatts",
+            "--stream",
+            "--input",
+            "socket",
+            "--model",
+            "HWPCReport",
+            "--name",
+            "soak-sensors",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            *formula_args,
+            "--output",
+            "csv",
+        ]
+    )
+    config["output"] = {
+        "pusher_soak": {
+            "type": SINK_DB_TYPE,
+            "model": "PowerReport",
+            "name": "pusher_soak",
+        }
+    }
+    AverageWattsConfigValidator().validate(config)
+    return config
+
+
+class RecordCollector(threading.Thread):
+    """
+    Collect the records of the sink and samples the memory of the formula in the background.
+    """
+
+    def __init__(self, records: multiprocessing.Queue, formula_pid: int):
+        super().__init__(daemon=True)
+        self.records = records
+        self.formula_pid = formula_pid
+        self.batches: list[tuple[float, numpy.ndarray]] = []
+        self.tick_arrivals: dict[tuple, float] = {}
+        self.memory: list[tuple[float, int]] = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        next_sample = time.time()
+        while not self.stopped.is_set():
+            if time.time() >= next_sample:
+                self.memory.append((time.time(), _process_tree_rss(self.formula_pid)))
+                next_sample += MEMORY_SAMPLE_PERIOD
+            try:
+                arrival, timestamps, ticks = self.records.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.batches.append((arrival, timestamps))
+            for tick in ticks:
+                self.tick_arrivals.setdefault(tick, arrival)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _linear_slope(times: list[float], values: list[float]) -> float:
+    if len(times) < 2 or max(times) == min(times):
+        return 0.0
+    return float(numpy.polyfit(times, values, 1)[0])
+
+
+def summarize_stage(
+    collector: RecordCollector,
+    rate: float,
+    sensors: int,
+    begin: float,
+    end: float,
+    ticks_sent: int,
+    max_send_delay: float,
+) -> dict:
+    """
+    Summarize the records of the sink that arrived during a stage.
+    :param collector: Collector of the records
+    :param rate: Number of ticks per second sent by each sensor
+    :param sensors: Number of sensors
+    :param begin: Beginning of the measurement window (after the warmup)
+    :param end: End of the stage
+    :param ticks_sent: Number of ticks sent by each sensor during the stage
+    :param max_send_delay: Maximum delay of a tick sent after its schedule
+    :return: Throughput, latency and memory of the formula during the stage
+    """
+    window = end - begin
+    arrivals = [
+        (arrival, timestamps)
+        for arrival, timestamps in collector.batches
+        if begin <= arrival < end
+    ]
+    latencies = (
+        numpy.concatenate([arrival - timestamps for arrival, timestamps in arrivals])
+        if arrivals
+        else numpy.empty(0)
+    )
+    power_reports = len(latencies)
+    ticks_processed = sum(
+        begin <= arrival < end for arrival in collector.tick_arrivals.values()
+    )
+    memory = [(time_, rss) for time_, rss in collector.memory if begin <= time_ < end]
+
+    offered = rate * sensors
+    processed = ticks_processed / window
+    latency_slope = _linear_slope(
+        [arrival for arrival, timestamps in arrivals for _ in timestamps],
+        latencies.tolist(),
+    )
+    memory_slope = _linear_slope(
+        [time_ for time_, _ in memory], [float(rss) for _, rss in memory]
+    )
+    return {
+        "rate": rate,
+        "ticks_offered_per_second": offered,
+        "ticks_sent": ticks_sent,
+        "max_send_delay_seconds": max_send_delay,
+        "ticks_processed_per_second": processed,
+        "power_reports_per_second": power_reports / window,
+        "latency_seconds": (
+            dict(
+                zip(
+                    ("p50", "p90", "p99", "max"),
+                    numpy.percentile(latencies, [50, 90, 99, 100]).tolist(),
+                    strict=True,
+                )
+            )
+            if power_reports
+            else {}
+        ),
+        "latency_growth_seconds_per_second": latency_slope,
+        "rss_bytes": memory[-1][1] if memory else 0,
+        "rss_growth_bytes_per_minute": memory_slope * 60,
+        "saturated": processed < SATURATION_THRESHOLD * offered
+        or latency_slope > LATENCY_SLOPE_THRESHOLD,
+    }
+
+
+def saturation_point(stages: list[dict]) -> dict:
+    """
+    Find the saturation point of the formula, walking the stages in order up to the first saturated one.
+    :param stages: Summaries of the stages, in the order they were run
+    :return: Highest sustained rate (the rate of the stage before the first saturated one) and first saturated rate,
+    None when there is no such stage
+    """
+    sustained_rate = None
+    for stage in stages:
+        if stage["saturated"]:
+            return {
+                "max_sustained_rate": sustained_rate,
+                "first_saturated_rate": stage["rate"],
+            }
+        sustained_rate = stage["rate"]
+    return {"max_sustained_rate": sustained_rate, "first_saturated_rate": None}
+
+
+def _run_load(
+    port: int,
+    sensors: list[list[bytes]],
+    rate: float,
+    duration: float,
+    load_results: multiprocessing.Queue,
+) -> tuple[int, float]:
+    """
+    Run a load stage in a separate process.
+    :return: Number of ticks sent by each sensor and maximum delay (in s) of the sends
+    """
+    load = multiprocessing.Process(
+        target=generate_load,
+        args=(port, sensors, rate, duration, load_results),
+        name="load",
+    )
+    load.start()
+    ticks_sent, max_send_delay = load_results.get()
+    load.join()
+    return ticks_sent, max_send_delay
+
+
+def _float_list(value: str) -> list[float]:
+    return [float(item) for item in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.soak",
+        description="Soak test of the AverageWatts formula, streaming the reports of synthetic sensors through a "
+        "socket input with increasing rates. The options following -- are passed to the formula.",
+    )
+    parser.add_argument("--sensors", type=int, default=1)
+    parser.add_argument("--sockets", type=int, default=1)
+    parser.add_argument("--targets", type=int, default=100)
+    parser.add_argument(
+        "--rates",
+        type=_float_list,
+        default=[1, 2, 5, 10, 20],
+        help="ticks sent per second by each sensor, one stage per rate",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="duration (in s) of each stage"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=5,
+        help="delay (in s) at the beginning of each stage excluded from its measurements",
+    )
+    parser.add_argument(
+        "--warmup-stage",
+        type=float,
+        default=10,
+        help="duration (in s) of the unmeasured stage run at the first rate before the measured ones, 0 to skip it",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--output", help="file where the JSON results are written")
+    parser.add_argument("formula_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    formula_args = (
+        args.formula_args[1:] if args.formula_args[:1] == ["--"] else args.formula_args
+    )
+
+    port = _free_port()
+    config = generate_formula_config(port, formula_args)
+    records = multiprocessing.Queue()
+    DATABASE_FACTORIES[SINK_DB_TYPE] = lambda db_config: SinkDB(
+        db_config["model"], records
+    )
+    sensors = [
+        render_sensor_reports(f"soak-sensor-{index}", args.targets, args.sockets, index)
+        for index in range(args.sensors)
+    ]
+
+    formula = multiprocessing.Process(
+        target=_run_formula, args=(config, args.verbose), name="formula"
+    )
+    formula.start()
+    collector = RecordCollector(records, formula.pid)
+    collector.start()
+
+    results = {
+        "metadata": run_metadata(),
+        "params": {
+            "sensors": args.sensors,
+            "sockets": args.sockets,
+            "targets": args.targets,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "warmup_stage": args.warmup_stage,
+            "formula_args": formula_args,
+        },
+        "stages": [],
+    }
+    load_results = multiprocessing.Queue()
+    try:
+        # The startup of the pipeline would skew the first stage, a warm-up stage at the first rate is run beforehand.
+        if args.warmup_stage:
+            _run_load(port, sensors, args.rates[0], args.warmup_stage, load_results)
+
+        for rate in args.rates:
+            begin = time.time()
+            ticks_sent, max_send_delay = _run_load(
+                port, sensors, rate, args.duration, load_results
+            )
+            stage = summarize_stage(
+                collector,
+                rate,
+                args.sensors,
+                begin + args.warmup,
+                time.time(),
+                ticks_sent,
+                max_send_delay,
+            )
+            results["stages"].append(stage)
+            print(
+                f"rate={rate:g}: {stage['ticks_processed_per_second']:.1f}/{stage['ticks_offered_per_second']:.1f} "
+                f"ticks/s, {stage['power_reports_per_second']:.0f} power reports/s, "
+                f"latency p99 {stage['latency_seconds'].get('p99', 0):.3f}s, "
+                f"rss {stage['rss_bytes'] / 2**20:.1f} MiB "
+                f"({stage['rss_growth_bytes_per_minute'] / 2**20:+.1f} MiB/min)"
+                f"{' SATURATED' if stage['saturated'] else ''}",
+                file=sys.stderr,
+            )
+    finally:
+        os.kill(formula.pid, signal.SIGTERM)
+        formula.join(STOP_TIMEOUT)
+        if formula.is_alive():
+            formula.kill()
+        collector.stop()
+
+    results["saturation"] = saturation_point(results["stages"])
+    results["memory"] = [
+        [round(time_ - collector.memory[0][0], 3), rss]
+        for time_, rss in collector.memory
+    ]
+    print(
+        f"saturation: sustained up to {results['saturation']['max_sustained_rate']} ticks/s per sensor, "
+        f"saturated from {results['saturation']['first_saturated_rate']} ticks/s per sensor",
+        file=sys.stderr,
+    )
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,5 @@
+from .startup import StartupProfile
+
 __version__ = "0.1"
+
+__all__ = ["StartupProfile"]
@@ -1,93 +1,439 @@
+# ruff: noqa: E402
 import logging
+import multiprocessing
 import signal
 import sys
 from collections import OrderedDict
 
+from averagewatts.backends import defer_database_imports
+
+# The PowerAPI database backends, and their drivers, are only imported when the configuration uses them. The lazy
+# package is installed by the entry point only, before the PowerAPI modules importing it.
+defer_database_imports()
+
 from powerapi import __version__ as powerapi_version
 from powerapi.backend_supervisor import BackendSupervisor
-from powerapi.cli.common_cli_parsing_manager import CommonCLIParsingManager
-from powerapi.cli.generator import (
-    PullerGenerator,
-    PusherGenerator,
-)
 from powerapi.dispatch_rule import HWPCDepthLevel, HWPCDispatchRule
 from powerapi.dispatcher import DispatcherActor, RouteTable
 from powerapi.exception import (
     PowerAPIException,
 )
-from powerapi.filter import Filter
 from powerapi.report import HWPCReport
 
+from averagewatts import StartupProfile
 from averagewatts import __version__ as naive_version
+from averagewatts.actor.config import (
+    DEFAULT_ALLOWED_LATENESS,
+    DEFAULT_BATCH_DELIVERY,
+    DEFAULT_EXPECTED_TARGETS,
+    DEFAULT_MAX_BUFFERED_REPORTS,
+    DEFAULT_MAX_BUFFERED_TICKS,
+    DEFAULT_OVERFLOW_POLICY,
+    DEFAULT_SENSOR_LEVEL,
+    DEFAULT_SHARED_POWER_REPORTS,
+    DEFAULT_TOP_K_TARGETS,
+    AverageWattsFormulaConfig,
+)
 from averagewatts.actor.factory import AverageWattsFormulaActorFactory
-from averagewatts.cli import AverageWattsConfigValidator
+from averagewatts.cli import (
+    AverageWattsCLIParsingManager,
+    AverageWattsConfigValidator,
+    AverageWattsInputDatabaseGenerator,
+    AverageWattsOutputDatabaseGenerator,
+    AverageWattsPullerGenerator,
+    AverageWattsPusherGenerator,
+)
+from averagewatts.dispatch import DEFAULT_DISPATCHER_SHARDS, SensorShardRule
+from averagewatts.projection import FORMULA_PROJECTION, ProjectionFilter
+from averagewatts.rollup import parse_windows
+
+# Sub-command replaying recorded HWPC reports offline, without the actors.
+REPLAY_COMMAND = "replay"
+
+# Delay (in s) to wait for the actors of a stage to stop gracefully before terminating them.
+DRAIN_STAGE_TIMEOUT = 10
+
+
+def generate_formula_config(
+    config: dict, metrics_queue=None
+) -> AverageWattsFormulaConfig:
+    """
+    Generate the formula actors configuration from the parsed CLI configuration.
+    :param config: CLI configuration
+    :param metrics_queue: Multiprocessing queue where the actors publish their metrics, None to disable the metrics
+    :return: Formula actors configuration
+    """
+    return AverageWattsFormulaConfig(
+        allowed_lateness=config.get("allowed-lateness", DEFAULT_ALLOWED_LATENESS),
+        expected_targets=config.get("expected-targets", DEFAULT_EXPECTED_TARGETS),
+        batch_delivery=config.get("batch-delivery", DEFAULT_BATCH_DELIVERY),
+        sensor_level=config.get("sensor-level", DEFAULT_SENSOR_LEVEL),
+        metrics_queue=metrics_queue,
+        rollup_windows=parse_windows(config.get("rollup-windows", "")),
+        full_resolution_outputs=tuple(
+            name.strip()
+            for name in config.get("full-resolution-outputs", "").split(",")
+            if name.strip()
+        ),
+        target_groups=config.get("target-groups", ""),
+        top_k_targets=config.get("top-k-targets", DEFAULT_TOP_K_TARGETS),
+        # In stream mode, the formulas are only stopped gracefully on SIGTERM, their buffered ticks are then drained.
+        drain_ticks=config.get("stream", False),
+        checkpoint_dir=config.get("checkpoint-dir") or None,
+        processed_ranges_dir=config.get("processed-ranges") or None,
+        max_buffered_ticks=config.get("max-buffered-ticks", DEFAULT_MAX_BUFFERED_TICKS),
+        max_buffered_reports=config.get(
+            "max-buffered-reports", DEFAULT_MAX_BUFFERED_REPORTS
+        ),
+        overflow_policy=config.get("overflow-policy", DEFAULT_OVERFLOW_POLICY),
+        profile_dir=config.get("profile") or None,
+        profile_memory=config.get("profile-memory", False),
+        shared_power_reports=config.get(
+            "shared-power-reports", DEFAULT_SHARED_POWER_REPORTS
+        ),
+    )
 
 
-def setup_dispatcher(config, route_table, report_filter, pushers):
-    formula_factory = AverageWattsFormulaActorFactory(config)
-    dispatcher = DispatcherActor(
-        "naive_dispatcher", formula_factory, pushers, route_table
+def setup_dispatcher(
+    config,
+    route_table,
+    report_filter,
+    pushers,
+    metrics_queue=None,
+    name="naive_dispatcher",
+    rule=lambda msg: True,
+):
+    formula_factory = AverageWattsFormulaActorFactory(
+        generate_formula_config(config, metrics_queue)
     )
-    report_filter.filter(lambda msg: True, dispatcher)
+    if config.get("shared-memory-transport", False):
+        from averagewatts.transport import DEFAULT_RING_CAPACITY, RingDispatcherActor
+
+        dispatcher = RingDispatcherActor(
+            name,
+            formula_factory,
+            pushers,
+            route_table,
+            config.get("ring-capacity", DEFAULT_RING_CAPACITY),
+        )
+    else:
+        dispatcher = DispatcherActor(name, formula_factory, pushers, route_table)
+    report_filter.filter(rule, dispatcher)
     return dispatcher
 
 
-def run_naive(config) -> None:
+def setup_dispatchers(
+    config, route_table, report_filter, pushers, metrics_queue=None
+) -> dict[str, DispatcherActor]:
+    """
+    Setup the dispatcher shards, each one owning the formula actors of the sensors routed to it by the filter.
+    :param config: CLI configuration
+    :param route_table: Route table of the dispatchers
+    :param report_filter: Filter of the pullers
+    :param pushers: Pusher actors, by name
+    :param metrics_queue: Multiprocessing queue where the actors publish their metrics, None to disable the metrics
+    :return: Dispatcher actors, by name
+    """
+    shards = config.get("dispatcher-shards", DEFAULT_DISPATCHER_SHARDS)
+    if shards == 1:
+        return {
+            "cpu": setup_dispatcher(
+                config, route_table, report_filter, pushers, metrics_queue
+            )
+        }
+
+    return {
+        f"cpu_{shard}": setup_dispatcher(
+            config,
+            route_table,
+            report_filter,
+            pushers,
+            metrics_queue,
+            f"naive_dispatcher_{shard}",
+            SensorShardRule(shard, shards),
+        )
+        for shard in range(shards)
+    }
+
+
+def generate_route_table(config: dict) -> RouteTable:
+    """
+    Generate the route table of the reports to the formula actors.
+    :param config: CLI configuration
+    :return: Route table of the dispatchers
+    """
+    # In sensor level mode, a single formula actor processes all the sockets of a sensor.
+    depth_level = (
+        HWPCDepthLevel.ROOT
+        if config.get("sensor-level", DEFAULT_SENSOR_LEVEL)
+        else HWPCDepthLevel.SOCKET
+    )
+    route_table = RouteTable()
+    route_table.add_dispatch_rule(
+        HWPCReport, HWPCDispatchRule(depth_level, primary=True)
+    )
+    return route_table
+
+
+def start_metrics_server(config: dict):
+    """
+    Start the HTTP server exposing the metrics the formula actors publish to the main process.
+    :param config: CLI configuration
+    :return: The started metrics server, None if the metrics are disabled
+    """
+    from averagewatts.metrics import (
+        DEFAULT_METRICS_ADDRESS,
+        DEFAULT_METRICS_PORT,
+        METRICS_QUEUE_SIZE,
+        MetricsServer,
+    )
+
+    metrics_port = config.get("metrics-port", DEFAULT_METRICS_PORT)
+    if not metrics_port:
+        return None
+
+    metrics_server = MetricsServer(
+        multiprocessing.Queue(METRICS_QUEUE_SIZE),
+        metrics_port,
+        config.get("metrics-address", DEFAULT_METRICS_ADDRESS),
+    )
+    metrics_server.start()
+    return metrics_server
+
+
+def drain_actors(stages: list[list], timeout: float = DRAIN_STAGE_TIMEOUT) -> None:
+    """
+    Stop the actors gracefully, stage after stage: the pullers stop reading the inputs, then the dispatchers and their
+    formula actors handle their pending reports and drain their buffered ticks, then the pushers write the remaining
+    power reports.
+    :param stages: Actors of each stage, from the pullers to the pushers
+    :param timeout: Delay (in s) to wait for the actors of a stage to stop before terminating them
+    """
+    for stage in stages:
+        for actor in stage:
+            if actor.is_alive():
+                actor.soft_kill()
+
+        for actor in stage:
+            if actor.pid is None:
+                continue
+            actor.join(timeout)
+            if actor.is_alive():
+                logging.warning(
+                    "Actor %s did not stop in time, terminating it", actor.name
+                )
+                actor.terminate()
+                actor.join()
+
+
+def run_naive(config, startup_profile: StartupProfile | None = None) -> None:
+    startup_profile = startup_profile or StartupProfile(enabled=False)
     logging.info(
         "Naive version %s based on PowerAPI version %s",
         naive_version,
         powerapi_version,
     )
-    route_table = RouteTable()
-    route_table.add_dispatch_rule(
-        HWPCReport, HWPCDispatchRule(HWPCDepthLevel.SOCKET, primary=True)
-    )
+    route_table = generate_route_table(config)
+
+    report_filter = ProjectionFilter(FORMULA_PROJECTION)
+    with startup_profile.phase("pullers generation"):
+        pullers = AverageWattsPullerGenerator(report_filter).generate(config)
 
-    report_filter = Filter()
-    pullers = PullerGenerator(report_filter).generate(config)
+    with startup_profile.phase("pushers generation"):
+        pushers = AverageWattsPusherGenerator().generate(config)
 
-    pushers = PusherGenerator().generate(config)
+    # The formula actors publish their metrics to the main process, which serves them over HTTP.
+    metrics_server = start_metrics_server(config)
 
-    dispatchers = {}
-    dispatchers["cpu"] = setup_dispatcher(config, route_table, report_filter, pushers)
+    with startup_profile.phase("dispatcher setup"):
+        dispatchers = setup_dispatchers(
+            config,
+            route_table,
+            report_filter,
+            pushers,
+            metrics_server.metrics_queue if metrics_server else None,
+        )
 
     actors = OrderedDict(**pushers, **dispatchers, **pullers)
+    if config.get("profile"):
+        from averagewatts.profiling import (
+            DISPATCHER_STAGE,
+            PULLER_STAGE,
+            PUSHER_STAGE,
+            profile_actor,
+        )
+
+        # The formula actors are profiled by their factory, as they are started by the dispatchers.
+        for stage, stage_actors in (
+            (PULLER_STAGE, pullers),
+            (DISPATCHER_STAGE, dispatchers),
+            (PUSHER_STAGE, pushers),
+        ):
+            for actor in stage_actors.values():
+                profile_actor(
+                    actor, config["profile"], stage, config.get("profile-memory", False)
+                )
     supervisor = BackendSupervisor(config["stream"])
 
     def term_handler(_, __):
-        supervisor.kill_actors()
+        # A second signal stops the actors right away.
+        signal.signal(signal.SIGTERM, kill_handler)
+        signal.signal(signal.SIGINT, kill_handler)
+        logging.info("Formula is draining...")
+        drain_actors(
+            [list(pullers.values()), list(dispatchers.values()), list(pushers.values())]
+        )
         sys.exit(0)
 
+    def kill_handler(_, __):
+        for actor in actors.values():
+            if actor.is_alive():
+                actor.terminate()
+        sys.exit(1)
+
     signal.signal(signal.SIGTERM, term_handler)
     signal.signal(signal.SIGINT, term_handler)
 
     for _, actor in actors.items():
         try:
             logging.debug("Initializing actor %s...", actor.name)
-            supervisor.launch_actor(actor)
+            with startup_profile.phase(f"launch of {actor.name}"):
+                supervisor.launch_actor(actor)
         except PowerAPIException:
             logging.error("Failed to initialize actor %s", actor.name)
             supervisor.kill_actors()
             sys.exit(1)
 
+    startup_profile.report()
     logging.info("Formula is now running...")
     supervisor.join()
     logging.info("Formula is shutting down...")
+    if metrics_server is not None:
+        metrics_server.stop()
 
 
-if __name__ == "__main__":
-    args_parser = CommonCLIParsingManager()
-    args = args_parser.parse()
+def run_asyncio(config, startup_profile: StartupProfile | None = None) -> None:
+    from averagewatts.engine import (
+        ASYNCIO_ENGINE,
+        DEFAULT_QUEUE_SIZE,
+        PUSHER_MAX_SIZE,
+        AsyncioEngine,
+    )
 
+    startup_profile = startup_profile or StartupProfile(enabled=False)
+    logging.info(
+        "Naive version %s based on PowerAPI version %s, asyncio engine",
+        naive_version,
+        powerapi_version,
+    )
+    with startup_profile.phase("engine setup"):
+        metrics_server = start_metrics_server(config)
+        engine = AsyncioEngine(
+            AverageWattsInputDatabaseGenerator().generate(config),
+            AverageWattsOutputDatabaseGenerator(PUSHER_MAX_SIZE).generate(config),
+            generate_route_table(config),
+            generate_formula_config(
+                config, metrics_server.metrics_queue if metrics_server else None
+            ),
+            config["stream"],
+            config.get("engine-queue-size", DEFAULT_QUEUE_SIZE),
+            projection=FORMULA_PROJECTION,
+        )
+
+    startup_profile.report()
+    logging.info("Formula is now running...")
     try:
-        AverageWattsConfigValidator().validate(args)
-    except Exception as exn:
-        logging.error("File does not exist: %s", exn)
-        sys.exit(1)
+        if config.get("profile"):
+            from averagewatts.profiling import ENGINE_STAGE, ActorProfiler
+
+            with ActorProfiler(
+                config["profile"],
+                ENGINE_STAGE,
+                ASYNCIO_ENGINE,
+                config.get("profile-memory", False),
+            ):
+                engine.run()
+        else:
+            engine.run()
+    finally:
+        logging.info("Formula is shutting down...")
+        if metrics_server is not None:
+            metrics_server.stop()
+
+
+def run_replay(config, startup_profile: StartupProfile | None = None) -> None:
+    from averagewatts.replay import (
+        DEFAULT_CHUNK_SIZE,
+        ReplayEngine,
+        generate_replay_databases,
+        generate_replay_sources,
+    )
+
+    startup_profile = startup_profile or StartupProfile(enabled=False)
+    logging.info(
+        "Naive version %s based on PowerAPI version %s, replay mode",
+        naive_version,
+        powerapi_version,
+    )
+    chunk_size = config.get("replay-chunk-size", DEFAULT_CHUNK_SIZE)
+    with startup_profile.phase("replay setup"):
+        processed_ranges = None
+        if config.get("processed-ranges"):
+            from averagewatts.checkpoint import ProcessedRangeIndex
+
+            processed_ranges = ProcessedRangeIndex(config["processed-ranges"])
+        shared_power = None
+        if config.get("shared-power-reports", DEFAULT_SHARED_POWER_REPORTS):
+            from averagewatts.shared import SharedPowerEncoder
+
+            shared_power = SharedPowerEncoder()
+        engine = ReplayEngine(
+            generate_replay_databases(config), processed_ranges, shared_power
+        )
+        sources = generate_replay_sources(config, chunk_size)
+
+    startup_profile.report()
+    for source in sources:
+        engine.run(source)
+
+
+if __name__ == "__main__":
+    startup_profile = StartupProfile()
+    startup_profile.record("imports", startup_profile.start_time)
+
+    replay_mode = len(sys.argv) > 1 and sys.argv[1] == REPLAY_COMMAND
+    if replay_mode:
+        del sys.argv[1]
+
+    with startup_profile.phase("configuration parsing"):
+        args_parser = AverageWattsCLIParsingManager()
+        args = args_parser.parse()
+
+        try:
+            AverageWattsConfigValidator().validate(args)
+        except Exception as exn:
+            logging.error("Configuration error: %s", exn)
+            sys.exit(1)
+    startup_profile.enabled = args.get("startup-profile", False)
 
     LOGGING_LEVEL = logging.DEBUG if args["verbose"] else logging.INFO
     LOGGING_FORMAT = "%(asctime)s - %(process)d - %(processName)s - %(name)s - %(levelname)s - %(message)s"
     logging.basicConfig(level=LOGGING_LEVEL, format=LOGGING_FORMAT)
 
-    run_naive(args)
+    from averagewatts.engine import ACTORS_ENGINE, ASYNCIO_ENGINE
+
+    if replay_mode:
+        try:
+            run_replay(args, startup_profile)
+        except PowerAPIException as exn:
+            logging.error("Replay error: %s", exn)
+            sys.exit(1)
+    elif args.get("engine", ACTORS_ENGINE) == ASYNCIO_ENGINE:
+        try:
+            run_asyncio(args, startup_profile)
+        except PowerAPIException as exn:
+            logging.error("Engine error: %s", exn)
+            sys.exit(1)
+    else:
+        run_naive(args, startup_profile)
     sys.exit(0)
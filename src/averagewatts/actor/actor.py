@@ -1,16 +1,22 @@
+from __future__ import annotations
+
 import logging
+from typing import TYPE_CHECKING
 
 from powerapi.formula import FormulaActor
-from powerapi.handler import PoisonPillMessageHandler, StartHandler
+from powerapi.handler import StartHandler
 from powerapi.message import PoisonPillMessage, StartMessage
 from powerapi.pusher import PusherActor
 from powerapi.report import HWPCReport
 
-from averagewatts.handler import HWPCReportHandler
+from averagewatts.handler import DrainingPoisonPillMessageHandler, HWPCReportHandler
 
 from .config import AverageWattsFormulaConfig
 from .state import AverageWattsFormulaState
 
+if TYPE_CHECKING:
+    from averagewatts.transport import ReportRing
+
 
 class AverageWattsFormulaActor(FormulaActor):
     def __init__(
@@ -20,12 +26,23 @@ class AverageWattsFormulaActor(FormulaActor):
         config: AverageWattsFormulaConfig,
         level_logger=logging.WARNING,
         timeout=None,
+        ring: ReportRing | None = None,
     ):
         super().__init__(name, pushers, level_logger, timeout)
         self.state = AverageWattsFormulaState(self, pushers, self.formula_metadata, config)
+        self.ring = ring
 
     def setup(self):
         super().setup()
         self.add_handler(StartMessage, StartHandler(self.state))
-        self.add_handler(PoisonPillMessage, PoisonPillMessageHandler(self.state))
-        self.add_handler(HWPCReport, HWPCReportHandler(self.state))
+        report_handler = HWPCReportHandler(self.state)
+        self.add_handler(PoisonPillMessage, DrainingPoisonPillMessageHandler(self.state, report_handler))
+        self.add_handler(HWPCReport, report_handler)
+        if self.ring is not None:
+            # The shared memory transport is only imported when it is enabled.
+            from averagewatts.transport import RingReader, RingRecords, RingRecordsHandler
+
+            reader = RingReader(self.ring, self.state.sensor, self.state.socket)
+            self.add_handler(
+                RingRecords, RingRecordsHandler(self.state, reader, report_handler)
+            )
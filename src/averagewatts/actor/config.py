@@ -1,3 +1,85 @@
+from averagewatts.tick import PROCESS_OLDEST_POLICY
+
+DEFAULT_ALLOWED_LATENESS = 1000
+DEFAULT_EXPECTED_TARGETS = 0
+DEFAULT_BATCH_DELIVERY = False
+DEFAULT_SENSOR_LEVEL = False
+DEFAULT_ROLLUP_WINDOWS = ()
+DEFAULT_TOP_K_TARGETS = 0
+DEFAULT_DRAIN_TICKS = False
+DEFAULT_MAX_BUFFERED_TICKS = 32
+DEFAULT_MAX_BUFFERED_REPORTS = 0
+DEFAULT_OVERFLOW_POLICY = PROCESS_OLDEST_POLICY
+DEFAULT_SHARED_POWER_REPORTS = False
+
+
 class AverageWattsFormulaConfig:
-    def __init__(self):
-        pass
+    """
+    AverageWatts formula actor configuration.
+    """
+
+    def __init__(
+        self,
+        allowed_lateness: int = DEFAULT_ALLOWED_LATENESS,
+        expected_targets: int = DEFAULT_EXPECTED_TARGETS,
+        batch_delivery: bool = DEFAULT_BATCH_DELIVERY,
+        sensor_level: bool = DEFAULT_SENSOR_LEVEL,
+        metrics_queue=None,
+        rollup_windows: tuple[int, ...] = DEFAULT_ROLLUP_WINDOWS,
+        full_resolution_outputs: tuple[str, ...] = (),
+        target_groups: str = "",
+        top_k_targets: int = DEFAULT_TOP_K_TARGETS,
+        drain_ticks: bool = DEFAULT_DRAIN_TICKS,
+        checkpoint_dir: str | None = None,
+        processed_ranges_dir: str | None = None,
+        max_buffered_ticks: int = DEFAULT_MAX_BUFFERED_TICKS,
+        max_buffered_reports: int = DEFAULT_MAX_BUFFERED_REPORTS,
+        overflow_policy: str = DEFAULT_OVERFLOW_POLICY,
+        profile_dir: str | None = None,
+        profile_memory: bool = False,
+        shared_power_reports: bool = DEFAULT_SHARED_POWER_REPORTS,
+    ):
+        """
+        :param allowed_lateness: Delay (in ms of sensor time) to wait for the late reports of a tick before processing it
+        :param expected_targets: Number of target reports that completes a tick, 0 to only rely on the allowed lateness
+        :param batch_delivery: Send the power reports of a tick in a single message to each pusher
+        :param sensor_level: Use a single formula actor per sensor that processes all the sockets at once
+        :param metrics_queue: Multiprocessing queue where the actors publish their metrics, None to disable the metrics
+        :param rollup_windows: Duration (in ms) of the windows the power reports are rolled up over, empty to disable it
+        :param full_resolution_outputs: Name of the outputs receiving the power reports of every tick when rolling up
+        :param target_groups: Grouping table of the targets (see parse_group_rules), empty to not group them
+        :param top_k_targets: Maximum number of targets per socket, the other ones being folded, 0 to not fold them
+        :param drain_ticks: Process the buffered ticks when the formula is stopped gracefully
+        :param checkpoint_dir: Directory where the buffered ticks are saved when the formula stops and resumed from when
+        it starts, None to disable the checkpoints
+        :param processed_ranges_dir: Directory of the ranges of ticks already processed, that are skipped, None to not
+        skip any tick
+        :param max_buffered_ticks: Maximum number of ticks buffered at the same time
+        :param max_buffered_reports: Maximum number of reports buffered at the same time, 0 for no limit
+        :param overflow_policy: Policy applied when a report would exceed the buffer limits (see OVERFLOW_POLICIES)
+        :param profile_dir: Directory where the formula actors write their profiles when stopping, None to not profile them
+        :param profile_memory: Also trace the memory allocations of the profiled formula actors
+        :param shared_power_reports: Send a single SharedPowerReport per socket and tick instead of the power reports of
+        its targets
+        """
+        self.allowed_lateness = allowed_lateness
+        self.expected_targets = expected_targets
+        self.batch_delivery = batch_delivery
+        self.sensor_level = sensor_level
+        self.metrics_queue = metrics_queue
+        self.rollup_windows = rollup_windows
+        self.full_resolution_outputs = full_resolution_outputs
+        self.target_groups = target_groups
+        self.top_k_targets = top_k_targets
+        self.drain_ticks = drain_ticks
+        self.checkpoint_dir = checkpoint_dir
+        self.processed_ranges_dir = processed_ranges_dir
+        self.max_buffered_ticks = max_buffered_ticks
+        self.max_buffered_reports = max_buffered_reports
+        self.overflow_policy = overflow_policy
+        self.profile_dir = profile_dir
+        self.profile_memory = profile_memory
+        self.shared_power_reports = shared_power_reports
+
+    def __repr__(self):
+        return f"AverageWattsFormulaConfig(allowed_lateness={self.allowed_lateness},expected_targets={self.expected_targets},batch_delivery={self.batch_delivery},sensor_level={self.sensor_level},metrics={self.metrics_queue is not None},rollup_windows={self.rollup_windows},full_resolution_outputs={self.full_resolution_outputs},target_groups={self.target_groups},top_k_targets={self.top_k_targets},drain_ticks={self.drain_ticks},checkpoint_dir={self.checkpoint_dir},processed_ranges_dir={self.processed_ranges_dir},max_buffered_ticks={self.max_buffered_ticks},max_buffered_reports={self.max_buffered_reports},overflow_policy={self.overflow_policy},profile_dir={self.profile_dir},profile_memory={self.profile_memory},shared_power_reports={self.shared_power_reports})"
@@ -1,5 +1,7 @@
 from powerapi.pusher import PusherActor
 
+from averagewatts.profiling import FORMULA_STAGE, profile_actor
+
 from .actor import AverageWattsFormulaActor
 from .config import AverageWattsFormulaConfig
 
@@ -8,5 +10,8 @@ class AverageWattsFormulaActorFactory:
     def __init__(self, config: AverageWattsFormulaConfig):
         self.config = config
 
-    def __call__(self, name: str, pushers: dict[str, PusherActor]) -> AverageWattsFormulaActor:
-        return AverageWattsFormulaActor(name, pushers, self.config)
+    def __call__(self, name: str, pushers: dict[str, PusherActor], ring=None) -> AverageWattsFormulaActor:
+        actor = AverageWattsFormulaActor(name, pushers, self.config, ring=ring)
+        if self.config.profile_dir is not None:
+            profile_actor(actor, self.config.profile_dir, FORMULA_STAGE, self.config.profile_memory)
+        return actor
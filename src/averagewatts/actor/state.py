@@ -8,7 +8,8 @@ class AverageWattsFormulaState(FormulaState):
         super().__init__(actor, pushers, metadata)
         self.config = config
 
-        m = re.search(r"^\(\'(.*)\', \'(.*)\', \'(.*)\'\)$", actor.name)
+        # The socket is not part of the actor name when the formula runs at the sensor level.
+        m = re.search(r"^\(\'(.*?)\', \'(.*?)\'(?:, \'(.*)\')?\)$", actor.name)
         self.dispatcher = m.group(1)
         self.sensor = m.group(2)
         self.socket = m.group(3)
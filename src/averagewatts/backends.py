@@ -0,0 +1,268 @@
+import importlib
+import importlib.util
+import os
+import sys
+import types
+from collections.abc import Callable
+
+# Module of the powerapi.database package defining each of its exported names.
+_DATABASE_MODULES = {
+    "BaseDB": "base_db",
+    "IterDB": "base_db",
+    "DBError": "base_db",
+    "CsvDB": "csv",
+    "MongoDB": "mongodb",
+    "OpenTSDB": "opentsdb",
+    "InfluxDB2": "influxdb2",
+    "PrometheusDB": "prometheus",
+    "VirtioFSDB": "virtiofs",
+    "SocketDB": "socket",
+    "FileDB": "file",
+}
+
+_REPORT_CLASSES = (
+    "HWPCReport",
+    "PowerReport",
+    "FormulaReport",
+    "ControlReport",
+    "ProcfsReport",
+)
+
+
+def defer_database_imports() -> bool:
+    """
+    Replace the powerapi.database package by a lazy one, importing a backend (and its driver) on first use only.
+    The package imports every backend when it is loaded, which loads the driver of every database supported by
+    PowerAPI even when the configuration only uses CSV files.
+    :return: True if the lazy package has been installed, False if the package was already imported
+    """
+    if "powerapi.database" in sys.modules:
+        return False
+
+    spec = importlib.util.find_spec("powerapi.database")
+    if spec is None or spec.submodule_search_locations is None:
+        return False
+
+    package = types.ModuleType("powerapi.database")
+    package.__spec__ = spec
+    package.__file__ = spec.origin
+    package.__path__ = list(spec.submodule_search_locations)
+    package.__package__ = "powerapi.database"
+
+    def __getattr__(name: str):
+        submodule = _DATABASE_MODULES.get(name)
+        if submodule is None:
+            raise AttributeError(
+                f"module 'powerapi.database' has no attribute '{name}'"
+            )
+
+        value = getattr(importlib.import_module(f"powerapi.database.{submodule}"), name)
+        setattr(package, name, value)
+        return value
+
+    package.__getattr__ = __getattr__
+    sys.modules["powerapi.database"] = package
+    sys.modules["powerapi"].database = package
+    return True
+
+
+def get_report_class(model_name: str) -> type:
+    """
+    Return the PowerAPI (or AverageWatts) report class of the given model name.
+    :param model_name: Name of the report model
+    :raise PowerAPIException: When the model is unknown
+    """
+    from powerapi import report
+    from powerapi.exception import PowerAPIException
+
+    if model_name == "SharedPowerReport":
+        from averagewatts.shared import SharedPowerReport
+
+        return SharedPowerReport
+
+    if model_name not in _REPORT_CLASSES:
+        raise PowerAPIException(f"Configuration error: model type {model_name} unknown")
+    return getattr(report, model_name)
+
+
+def disconnect_database(database) -> None:
+    """
+    Disconnect an output database once its last reports are saved, for the databases buffering the reports themselves
+    (such as the columnar one) to write them. The databases not implementing it are left as is.
+    :param database: PowerAPI database
+    """
+    try:
+        database.disconnect()
+    except NotImplementedError:
+        pass
+
+
+def _tags(db_config: dict) -> list[str]:
+    if not db_config.get("tags"):
+        return []
+    return db_config["tags"].split(",")
+
+
+def _mongodb(db_config: dict):
+    from powerapi.database.mongodb import MongoDB
+
+    return MongoDB(
+        report_type=db_config["model"],
+        uri=db_config["uri"],
+        db_name=db_config["db"],
+        collection_name=db_config["collection"],
+    )
+
+
+def _projected_mongodb(db_config: dict):
+    from averagewatts.database.mongodb import ProjectedMongoDB
+    from averagewatts.projection import FORMULA_PROJECTION
+
+    return ProjectedMongoDB(
+        report_type=db_config["model"],
+        uri=db_config["uri"],
+        db_name=db_config["db"],
+        collection_name=db_config["collection"],
+        projection=FORMULA_PROJECTION.mongodb_projection(),
+    )
+
+
+def _socket(db_config: dict):
+    from powerapi.database.socket import SocketDB
+
+    return SocketDB(db_config["model"], db_config["host"], db_config["port"])
+
+
+def _csv(db_config: dict):
+    from powerapi.database.csv import CsvDB
+
+    return CsvDB(
+        report_type=db_config["model"],
+        tags=_tags(db_config),
+        current_path=db_config.get("directory", os.getcwd()),
+        files=db_config.get("files", []),
+    )
+
+
+def _mmap_csv(db_config: dict):
+    from averagewatts.database import MmapCsvDB
+    from averagewatts.projection import FORMULA_PROJECTION
+
+    return MmapCsvDB(
+        report_type=db_config["model"],
+        files=db_config.get("files", []),
+        projection=FORMULA_PROJECTION,
+    )
+
+
+def _columnar(db_config: dict):
+    from averagewatts.database import ColumnarDB
+    from averagewatts.database.columnar import (
+        DEFAULT_CHUNK_ROWS,
+        DEFAULT_FLUSH_INTERVAL,
+    )
+
+    return ColumnarDB(
+        report_type=db_config["model"],
+        directory=db_config["directory"],
+        chunk_rows=db_config.get("chunk-rows", DEFAULT_CHUNK_ROWS),
+        flush_interval=db_config.get("flush-interval", DEFAULT_FLUSH_INTERVAL),
+    )
+
+
+def _influxdb2(db_config: dict):
+    from powerapi.database.influxdb2 import InfluxDB2
+
+    return InfluxDB2(
+        report_type=db_config["model"],
+        url=db_config["uri"],
+        org=db_config["org"],
+        bucket_name=db_config["db"],
+        token=db_config["token"],
+        tags=_tags(db_config),
+        port=db_config.get("port"),
+    )
+
+
+def _opentsdb(db_config: dict):
+    from powerapi.database.opentsdb import OpenTSDB
+
+    return OpenTSDB(
+        report_type=db_config["model"],
+        host=db_config["uri"],
+        port=db_config["port"],
+        metric_name=db_config["metric-name"],
+    )
+
+
+def _prometheus(db_config: dict):
+    from powerapi.database.prometheus import PrometheusDB
+
+    return PrometheusDB(
+        report_type=db_config["model"],
+        port=db_config["port"],
+        address=db_config["uri"],
+        metric_name=db_config["metric-name"],
+        metric_description=db_config["metric-description"],
+        tags=_tags(db_config),
+    )
+
+
+def _virtiofs(db_config: dict):
+    from powerapi.database.virtiofs import VirtioFSDB
+
+    return VirtioFSDB(
+        report_type=db_config["model"],
+        vm_name_regexp=db_config["vm-name-regexp"],
+        root_directory_name=db_config["root-directory-name"],
+        vm_directory_name_prefix=db_config["vm-directory-name-prefix"],
+        vm_directory_name_suffix=db_config["vm-directory-name-suffix"],
+    )
+
+
+def _filedb(db_config: dict):
+    from powerapi.database.file import FileDB
+
+    return FileDB(report_type=db_config["model"], filename=db_config["filename"])
+
+
+# Database factories, by database type, equivalent to the ones of the PowerAPI CLI generators.
+DATABASE_FACTORIES: dict[str, Callable[[dict], object]] = {
+    "mongodb": _mongodb,
+    "socket": _socket,
+    "csv": _csv,
+    "influxdb2": _influxdb2,
+    "opentsdb": _opentsdb,
+    "prometheus": _prometheus,
+    "virtiofs": _virtiofs,
+    "filedb": _filedb,
+    "columnar": _columnar,
+}
+
+# Database factories of the inputs, the CSV files are read by the memory-mapped CSV source of AverageWatts, and both
+# the CSV files and the MongoDB collections only read the fields used by the formula.
+INPUT_DATABASE_FACTORIES: dict[str, Callable[[dict], object]] = DATABASE_FACTORIES | {
+    "csv": _mmap_csv,
+    "mongodb": _projected_mongodb,
+}
+
+
+def create_database(
+    db_config: dict,
+    factories: dict[str, Callable[[dict], object]] = DATABASE_FACTORIES,
+):
+    """
+    Create the database of the given component configuration, importing only its backend.
+    :param db_config: Component configuration, its model being already resolved to a report class
+    :param factories: Database factories, by database type
+    :return: The PowerAPI database
+    :raise PowerAPIException: When the database type is unknown
+    """
+    from powerapi.exception import PowerAPIException
+
+    factory = factories.get(db_config.get("type"))
+    if factory is None:
+        raise PowerAPIException(
+            f"Configuration error : database type {db_config.get('type')} unknown"
+        )
+    return factory(db_config)
@@ -0,0 +1,17 @@
+from .file import CHECKPOINT_VERSION, FormulaCheckpoint, checkpoint_path
+from .ranges import (
+    RANGES_VERSION,
+    ProcessedRangeIndex,
+    ProcessedRanges,
+    ranges_path,
+)
+
+__all__ = [
+    "CHECKPOINT_VERSION",
+    "RANGES_VERSION",
+    "FormulaCheckpoint",
+    "ProcessedRangeIndex",
+    "ProcessedRanges",
+    "checkpoint_path",
+    "ranges_path",
+]
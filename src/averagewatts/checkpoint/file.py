@@ -0,0 +1,84 @@
+import logging
+import os
+import pickle
+from urllib.parse import quote
+
+# Version of the checkpoint format, the checkpoints of another version are ignored.
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path(directory: str, sensor: str, socket: str | None) -> str:
+    """
+    Return the path of the checkpoint of a formula.
+    :param directory: Directory of the checkpoints
+    :param sensor: Sensor of the formula
+    :param socket: Socket of the formula, None for a formula processing all the sockets of the sensor
+    :return: Path of the checkpoint file
+    """
+    name = sensor if socket is None else f"{sensor}-{socket}"
+    return os.path.join(directory, quote(name, safe="") + ".ckpt")
+
+
+class FormulaCheckpoint:
+    """
+    Buffered ticks and watermark of a formula, saved when it stops to be resumed by the next instance.
+    """
+
+    def __init__(
+        self,
+        last_processed_key: int | None,
+        newest_key: int | None,
+        ticks: list[tuple],
+    ):
+        """
+        :param last_processed_key: Key of the last processed tick, None if no tick has been processed
+        :param newest_key: Key of the newest received report, None if no report has been received
+        :param ticks: Buffered ticks, as exported by TickStore.export
+        """
+        self.last_processed_key = last_processed_key
+        self.newest_key = newest_key
+        self.ticks = ticks
+
+    def save(self, path: str) -> None:
+        """
+        Write the checkpoint to the given file, atomically replacing the previous one.
+        :param path: Path of the checkpoint file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        state = (
+            CHECKPOINT_VERSION,
+            self.last_processed_key,
+            self.newest_key,
+            self.ticks,
+        )
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path: str) -> "FormulaCheckpoint | None":
+        """
+        Read the checkpoint of the given file. The file is kept until the next save replaces it, for the restored ticks
+        not to be lost if the formula stops before saving them again.
+        :param path: Path of the checkpoint file
+        :return: The checkpoint, None if there is no checkpoint or if it cannot be read
+        """
+        try:
+            with open(path, "rb") as file:
+                state = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as exn:
+            # A stale or corrupted pickle can raise about any exception
+            logging.warning("Ignored unreadable checkpoint %s: %s", path, exn)
+            return None
+
+        if (
+            not isinstance(state, tuple)
+            or len(state) != 4
+            or state[0] != CHECKPOINT_VERSION
+        ):
+            logging.warning("Ignored checkpoint %s of an unknown version", path)
+            return None
+        return FormulaCheckpoint(*state[1:])
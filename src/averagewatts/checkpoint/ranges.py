@@ -0,0 +1,191 @@
+import bisect
+import json
+import logging
+import os
+from urllib.parse import quote
+
+# Version of the processed ranges format, the ranges of another version are ignored.
+RANGES_VERSION = 1
+
+
+def ranges_path(directory: str, sensor: str, socket: str) -> str:
+    """
+    Return the path of the processed ranges of a (sensor, socket) pair.
+    :param directory: Directory of the processed ranges
+    :param sensor: Name of the sensor
+    :param socket: Socket of the sensor
+    :return: Path of the ranges file
+    """
+    return os.path.join(directory, quote(f"{sensor}-{socket}", safe="") + ".ranges")
+
+
+class ProcessedRanges:
+    """
+    Sorted, disjoint intervals [first, last] of the tick keys (in ms) of a (sensor, socket) pair already processed.
+    A run goes through the ticks in timestamp order: the interval of the run is only extended over consecutive ticks it
+    processed, or that a previous run processed, a tick it did not process interrupting the interval. A tick missing
+    from the input between two processed ticks is thus covered by their interval.
+    """
+
+    def __init__(self, intervals: list[tuple[int, int]] | None = None):
+        """
+        :param intervals: Sorted and disjoint intervals of the previous runs
+        """
+        intervals = intervals or []
+        self.starts = [first for first, _ in intervals]
+        self.ends = [last for _, last in intervals]
+        self.modified = False
+        self._current: int | None = None
+
+    def __contains__(self, key: int) -> bool:
+        return self._find(key) is not None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _find(self, key: int) -> int | None:
+        index = bisect.bisect_right(self.starts, key) - 1
+        return index if index >= 0 and key <= self.ends[index] else None
+
+    def intervals(self) -> list[tuple[int, int]]:
+        """
+        Return the intervals of the processed tick keys.
+        """
+        return list(zip(self.starts, self.ends, strict=True))
+
+    def is_processed(self, key: int) -> bool:
+        """
+        Check if the given tick was already processed, the run then continuing the interval of the tick.
+        :param key: Key of the tick
+        :return: True if the tick was already processed, by this run or a previous one
+        """
+        index = self._find(key)
+        if index is None:
+            return False
+
+        current = self._current
+        if current is not None and current < index:
+            # The interval of the run is followed by the one of the tick
+            self.ends[current] = self.ends[index]
+            del self.starts[current + 1 : index + 1]
+            del self.ends[current + 1 : index + 1]
+            self.modified = True
+            index = current
+        self._current = index
+        return True
+
+    def add(self, key: int) -> None:
+        """
+        Record that the run processed the given tick, extending the interval of the previous tick of the run.
+        :param key: Key of the tick
+        """
+        current = self._current
+        if current is not None and key > self.ends[current]:
+            self.ends[current] = key
+        else:
+            index = self._find(key)
+            if index is not None:
+                self._current = index
+                return
+            current = self._current = bisect.bisect_right(self.starts, key)
+            self.starts.insert(current, key)
+            self.ends.insert(current, key)
+
+        # Merge the intervals of the ticks missing from the input of the run
+        end = current + 1
+        while end < len(self.starts) and self.starts[end] <= self.ends[current]:
+            self.ends[current] = max(self.ends[current], self.ends[end])
+            end += 1
+        del self.starts[current + 1 : end]
+        del self.ends[current + 1 : end]
+        self.modified = True
+
+    def interrupt(self) -> None:
+        """
+        Record that the run did not process a tick, the next processed tick starting a new interval.
+        """
+        self._current = None
+
+    def save(self, path: str) -> None:
+        """
+        Write the ranges to the given file, atomically replacing the previous one.
+        :param path: Path of the ranges file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"version": RANGES_VERSION, "intervals": self.intervals()}, file)
+        os.replace(temporary_path, path)
+        self.modified = False
+
+    @staticmethod
+    def load(path: str) -> "ProcessedRanges":
+        """
+        Read the ranges of the given file.
+        :param path: Path of the ranges file
+        :return: The ranges, empty if there is no file or if it cannot be read
+        """
+        try:
+            with open(path) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return ProcessedRanges()
+        except (OSError, ValueError) as exn:
+            logging.warning("Ignored unreadable processed ranges %s: %s", path, exn)
+            return ProcessedRanges()
+
+        if not isinstance(state, dict) or state.get("version") != RANGES_VERSION:
+            logging.warning("Ignored processed ranges %s of an unknown version", path)
+            return ProcessedRanges()
+        return ProcessedRanges([tuple(interval) for interval in state["intervals"]])
+
+
+class ProcessedRangeIndex:
+    """
+    Processed ranges of the (sensor, socket) pairs, stored as one file per pair in a directory, for the ticks already
+    processed by a previous run (such as an interrupted or overlapping backfill) to be skipped.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Directory of the ranges files
+        """
+        self.directory = directory
+        self._ranges: dict[tuple[str, str], ProcessedRanges] = {}
+
+    def ranges(self, sensor: str, socket: str) -> ProcessedRanges:
+        """
+        Return the processed ranges of a (sensor, socket) pair, loaded from its file on first use.
+        """
+        ranges = self._ranges.get((sensor, socket))
+        if ranges is None:
+            ranges = self._ranges[(sensor, socket)] = ProcessedRanges.load(
+                ranges_path(self.directory, sensor, socket)
+            )
+        return ranges
+
+    def is_processed(self, sensor: str, socket: str, key: int) -> bool:
+        """
+        Check if a tick of a (sensor, socket) pair was already processed, and is to be skipped.
+        """
+        return self.ranges(sensor, socket).is_processed(key)
+
+    def add(self, sensor: str, socket: str, key: int) -> None:
+        """
+        Record that the run processed a tick of a (sensor, socket) pair.
+        """
+        self.ranges(sensor, socket).add(key)
+
+    def interrupt(self, sensor: str, socket: str) -> None:
+        """
+        Record that the run did not process a tick of a (sensor, socket) pair.
+        """
+        self.ranges(sensor, socket).interrupt()
+
+    def save(self) -> None:
+        """
+        Write the modified ranges, once the reports of the processed ticks are written.
+        """
+        for (sensor, socket), ranges in self._ranges.items():
+            if ranges.modified:
+                ranges.save(ranges_path(self.directory, sensor, socket))
@@ -1,3 +1,17 @@
 from .config_validator import AverageWattsConfigValidator
+from .generator import (
+    AverageWattsInputDatabaseGenerator,
+    AverageWattsOutputDatabaseGenerator,
+    AverageWattsPullerGenerator,
+    AverageWattsPusherGenerator,
+)
+from .parsing_manager import AverageWattsCLIParsingManager
 
-__all__ = ["AverageWattsConfigValidator"]
+__all__ = [
+    "AverageWattsCLIParsingManager",
+    "AverageWattsConfigValidator",
+    "AverageWattsInputDatabaseGenerator",
+    "AverageWattsOutputDatabaseGenerator",
+    "AverageWattsPullerGenerator",
+    "AverageWattsPusherGenerator",
+]
@@ -1,7 +1,149 @@
+import os
+
 from powerapi.cli import ConfigValidator
+from powerapi.exception import NotAllowedArgumentValueException
+
+from averagewatts.engine import ENGINES
+from averagewatts.rollup import parse_windows
+from averagewatts.target import parse_group_rules
+from averagewatts.tick import BLOCK_POLICY, OVERFLOW_POLICIES
 
 
 class AverageWattsConfigValidator(ConfigValidator):
     @staticmethod
     def validate(config: dict):
         ConfigValidator.validate(config)
+
+        for argument_name in (
+            "allowed-lateness",
+            "expected-targets",
+            "top-k-targets",
+            "max-buffered-reports",
+        ):
+            if config.get(argument_name, 0) < 0:
+                raise NotAllowedArgumentValueException(
+                    f"{argument_name} must be a positive value"
+                )
+
+        if not 0 <= config.get("metrics-port", 0) <= 65535:
+            raise NotAllowedArgumentValueException(
+                "metrics-port must be a valid port number"
+            )
+
+        try:
+            parse_windows(config.get("rollup-windows", ""))
+        except ValueError as exn:
+            raise NotAllowedArgumentValueException(f"rollup-windows: {exn}") from exn
+
+        try:
+            parse_group_rules(config.get("target-groups", ""))
+        except ValueError as exn:
+            raise NotAllowedArgumentValueException(f"target-groups: {exn}") from exn
+
+        for output_name in _names(config.get("full-resolution-outputs", "")):
+            if output_name not in config.get("output", {}):
+                raise NotAllowedArgumentValueException(
+                    f"full-resolution-outputs: unknown output {output_name}"
+                )
+
+        if config.get("max-buffered-ticks", 1) <= 0:
+            raise NotAllowedArgumentValueException(
+                "max-buffered-ticks must be a strictly positive value"
+            )
+
+        if config.get("overflow-policy") == BLOCK_POLICY:
+            raise NotAllowedArgumentValueException(
+                "overflow-policy block is not supported: the buffered ticks can only be processed once newer reports "
+                f"are received, use one of {', '.join(OVERFLOW_POLICIES)}"
+            )
+
+        if config.get("overflow-policy", OVERFLOW_POLICIES[0]) not in OVERFLOW_POLICIES:
+            raise NotAllowedArgumentValueException(
+                f"overflow-policy must be one of {', '.join(OVERFLOW_POLICIES)}"
+            )
+
+        if config.get("shared-memory-transport", False) and config.get(
+            "sensor-level", False
+        ):
+            raise NotAllowedArgumentValueException(
+                "shared-memory-transport cannot be used with sensor-level"
+            )
+
+        if config.get("ring-capacity", 1) <= 0:
+            raise NotAllowedArgumentValueException(
+                "ring-capacity must be a strictly positive value"
+            )
+
+        if config.get("engine", ENGINES[0]) not in ENGINES:
+            raise NotAllowedArgumentValueException(
+                f"engine must be one of {', '.join(ENGINES)}"
+            )
+
+        if config.get("engine-queue-size", 1) <= 0:
+            raise NotAllowedArgumentValueException(
+                "engine-queue-size must be a strictly positive value"
+            )
+
+        if config.get("dispatcher-shards", 1) <= 0:
+            raise NotAllowedArgumentValueException(
+                "dispatcher-shards must be a strictly positive value"
+            )
+
+        for argument_name in ("checkpoint-dir", "processed-ranges", "profile"):
+            directory = config.get(argument_name, "")
+            if directory and os.path.exists(directory) and not os.path.isdir(directory):
+                raise NotAllowedArgumentValueException(
+                    f"{argument_name} must be a directory"
+                )
+
+        for input_name, input_config in config.get("input", {}).items():
+            if input_config.get("type") == "columnar":
+                raise NotAllowedArgumentValueException(
+                    f"input {input_name}: the columnar database is write-only, it can only be used as an output"
+                )
+
+        for output_name, output_config in config.get("output", {}).items():
+            if output_config.get("type") != "columnar":
+                continue
+            if not output_config.get("directory"):
+                raise NotAllowedArgumentValueException(
+                    f"output {output_name}: directory is required"
+                )
+            if output_config.get("model", "PowerReport") != "PowerReport":
+                raise NotAllowedArgumentValueException(
+                    f"output {output_name}: only PowerReport can be written"
+                )
+            if output_config.get("chunk-rows", 1) <= 0:
+                raise NotAllowedArgumentValueException(
+                    f"output {output_name}: chunk-rows must be a strictly positive value"
+                )
+            if output_config.get("flush-interval", 0) < 0:
+                raise NotAllowedArgumentValueException(
+                    f"output {output_name}: flush-interval must be a positive value"
+                )
+
+        shared_power_reports = config.get("shared-power-reports", False)
+        for output_name, output_config in config.get("output", {}).items():
+            is_shared = output_config.get("model", "PowerReport") == "SharedPowerReport"
+            if is_shared != shared_power_reports:
+                raise NotAllowedArgumentValueException(
+                    f"output {output_name}: the SharedPowerReport model must be used if and only if shared-power-reports is enabled"
+                )
+
+        if shared_power_reports and (
+            config.get("rollup-windows")
+            or config.get("target-groups")
+            or config.get("top-k-targets", 0)
+        ):
+            raise NotAllowedArgumentValueException(
+                "shared-power-reports cannot be used with rollup-windows, target-groups or top-k-targets"
+            )
+
+        if config.get("replay-chunk-size", 1) <= 0:
+            raise NotAllowedArgumentValueException(
+                "replay-chunk-size must be a strictly positive value"
+            )
+
+
+def _names(value: str) -> list[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
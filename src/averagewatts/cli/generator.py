@@ -0,0 +1,171 @@
+import logging
+
+from powerapi.exception import PowerAPIException
+from powerapi.filter import Filter
+from powerapi.puller import PullerActor
+
+from averagewatts.backends import (
+    DATABASE_FACTORIES,
+    INPUT_DATABASE_FACTORIES,
+    create_database,
+    get_report_class,
+)
+from averagewatts.pusher import AverageWattsPusherActor
+
+COMPONENT_TYPE_KEY = "type"
+COMPONENT_MODEL_KEY = "model"
+COMPONENT_DB_MANAGER_KEY = "db_manager"
+COMPONENT_DB_MAX_BUFFER_SIZE_KEY = "max_buffer_size"
+GENERAL_CONF_STREAM_MODE_KEY = "stream"
+GENERAL_CONF_VERBOSE_KEY = "verbose"
+
+
+class DBActorGenerator:
+    """
+    Generate the actors of a group of components using a database, such as the inputs or the outputs.
+    Unlike the PowerAPI CLI generators, only the backends of the configured databases are imported.
+    """
+
+    def __init__(
+        self, component_group_name: str, database_factories=DATABASE_FACTORIES
+    ):
+        """
+        :param component_group_name: Name of the group of components in the configuration
+        :param database_factories: Database factories, by database type
+        """
+        self.component_group_name = component_group_name
+        self.database_factories = database_factories
+
+    def generate(self, main_config: dict) -> dict:
+        """
+        Generate the actors of the components of the group.
+        :param main_config: CLI configuration
+        :return: The generated actors, by component name
+        """
+        if self.component_group_name not in main_config:
+            raise PowerAPIException(
+                "Configuration error : no " + self.component_group_name + " specified"
+            )
+
+        actors = {}
+        for component_name, component_config in main_config[
+            self.component_group_name
+        ].items():
+            component_type = ""
+            try:
+                component_type = component_config[COMPONENT_TYPE_KEY]
+                actors[component_name] = self._gen_actor(
+                    component_config, main_config, component_name
+                )
+            except KeyError as exn:
+                msg = "Configuration error : argument " + exn.args[0]
+                msg += " needed with output " + component_type
+                raise PowerAPIException(msg) from exn
+
+        return actors
+
+    def _gen_actor(
+        self, component_config: dict, main_config: dict, component_name: str
+    ):
+        component_config[COMPONENT_MODEL_KEY] = get_report_class(
+            component_config[COMPONENT_MODEL_KEY]
+        )
+        component_config[COMPONENT_DB_MANAGER_KEY] = create_database(
+            component_config, self.database_factories
+        )
+        return self._actor_factory(component_name, main_config, component_config)
+
+    def _actor_factory(
+        self, actor_name: str, main_config: dict, component_config: dict
+    ):
+        raise NotImplementedError()
+
+
+class AverageWattsPullerGenerator(DBActorGenerator):
+    """
+    Generate the puller actors of the inputs.
+    """
+
+    def __init__(self, report_filter: Filter):
+        """
+        :param report_filter: Filter routing the pulled reports to the dispatchers
+        """
+        super().__init__("input", INPUT_DATABASE_FACTORIES)
+        self.report_filter = report_filter
+
+    def _actor_factory(
+        self, actor_name: str, main_config: dict, component_config: dict
+    ):
+        return PullerActor(
+            name=actor_name,
+            database=component_config[COMPONENT_DB_MANAGER_KEY],
+            report_filter=self.report_filter,
+            stream_mode=main_config[GENERAL_CONF_STREAM_MODE_KEY],
+            report_model=component_config[COMPONENT_MODEL_KEY],
+            level_logger=logging.DEBUG
+            if main_config[GENERAL_CONF_VERBOSE_KEY]
+            else logging.INFO,
+        )
+
+
+class AverageWattsPusherGenerator(DBActorGenerator):
+    """
+    Generate the pusher actors able to handle the power reports batches sent by the formula actors.
+    """
+
+    def __init__(self):
+        super().__init__("output")
+
+    def _actor_factory(
+        self, actor_name: str, main_config: dict, component_config: dict
+    ):
+        kwargs = {}
+        if COMPONENT_DB_MAX_BUFFER_SIZE_KEY in component_config:
+            kwargs["max_size"] = component_config[COMPONENT_DB_MAX_BUFFER_SIZE_KEY]
+
+        return AverageWattsPusherActor(
+            name=actor_name,
+            report_model=component_config[COMPONENT_MODEL_KEY],
+            database=component_config[COMPONENT_DB_MANAGER_KEY],
+            level_logger=logging.DEBUG
+            if main_config[GENERAL_CONF_VERBOSE_KEY]
+            else logging.INFO,
+            **kwargs,
+        )
+
+
+class AverageWattsInputDatabaseGenerator(DBActorGenerator):
+    """
+    Generate the databases of the inputs, for the engines running without actors.
+    """
+
+    def __init__(self):
+        super().__init__("input", INPUT_DATABASE_FACTORIES)
+
+    def _actor_factory(
+        self, actor_name: str, main_config: dict, component_config: dict
+    ):
+        return component_config[COMPONENT_DB_MANAGER_KEY]
+
+
+class AverageWattsOutputDatabaseGenerator(DBActorGenerator):
+    """
+    Generate the databases of the outputs and their maximum buffer size, for the engines running without actors.
+    """
+
+    def __init__(self, default_max_buffer_size: int):
+        """
+        :param default_max_buffer_size: Maximum buffer size of the outputs not setting it
+        """
+        super().__init__("output")
+        self.default_max_buffer_size = default_max_buffer_size
+
+    def _actor_factory(
+        self, actor_name: str, main_config: dict, component_config: dict
+    ):
+        return (
+            component_config[COMPONENT_DB_MANAGER_KEY],
+            component_config.get(
+                COMPONENT_DB_MAX_BUFFER_SIZE_KEY, self.default_max_buffer_size
+            ),
+        )
@@ -0,0 +1,236 @@
+from powerapi.cli.common_cli_parsing_manager import CommonCLIParsingManager
+from powerapi.cli.config_parser import store_true
+from powerapi.cli.parsing_manager import SubgroupConfigParsingManager
+
+from averagewatts.actor.config import (
+    DEFAULT_ALLOWED_LATENESS,
+    DEFAULT_BATCH_DELIVERY,
+    DEFAULT_EXPECTED_TARGETS,
+    DEFAULT_SENSOR_LEVEL,
+    DEFAULT_MAX_BUFFERED_REPORTS,
+    DEFAULT_MAX_BUFFERED_TICKS,
+    DEFAULT_OVERFLOW_POLICY,
+    DEFAULT_SHARED_POWER_REPORTS,
+    DEFAULT_TOP_K_TARGETS,
+)
+from averagewatts.database.columnar import DEFAULT_CHUNK_ROWS, DEFAULT_FLUSH_INTERVAL
+from averagewatts.dispatch import DEFAULT_DISPATCHER_SHARDS
+from averagewatts.engine import ACTORS_ENGINE, DEFAULT_QUEUE_SIZE, ENGINES
+from averagewatts.metrics import DEFAULT_METRICS_ADDRESS, DEFAULT_METRICS_PORT
+from averagewatts.replay import DEFAULT_CHUNK_SIZE
+from averagewatts.tick import OVERFLOW_POLICIES
+from averagewatts.transport import DEFAULT_RING_CAPACITY
+
+
+class AverageWattsCLIParsingManager(CommonCLIParsingManager):
+    """
+    AverageWatts formula configuration parser.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self.add_argument(
+            "allowed-lateness",
+            argument_type=int,
+            default_value=DEFAULT_ALLOWED_LATENESS,
+            help_text="delay (in ms) to wait for the late reports of a tick before processing it",
+        )
+        self.add_argument(
+            "expected-targets",
+            argument_type=int,
+            default_value=DEFAULT_EXPECTED_TARGETS,
+            help_text="number of target reports that completes a tick, 0 to only rely on the allowed lateness",
+        )
+        self.add_argument(
+            "batch-delivery",
+            is_flag=True,
+            action=store_true,
+            default_value=DEFAULT_BATCH_DELIVERY,
+            help_text="send the power reports of a tick in a single message to each pusher",
+        )
+        self.add_argument(
+            "shared-power-reports",
+            is_flag=True,
+            action=store_true,
+            default_value=DEFAULT_SHARED_POWER_REPORTS,
+            help_text="send a single SharedPowerReport per socket and tick, its targets sharing the same power, instead of the power reports of the targets",
+        )
+        self.add_argument(
+            "sensor-level",
+            is_flag=True,
+            action=store_true,
+            default_value=DEFAULT_SENSOR_LEVEL,
+            help_text="use a single formula actor per sensor that processes all the sockets at once",
+        )
+        self.add_argument(
+            "rollup-windows",
+            default_value="",
+            help_text="comma-separated durations of the windows the power reports are rolled up over (such as 10s,1m), empty to send the power reports of every tick",
+        )
+        self.add_argument(
+            "full-resolution-outputs",
+            default_value="",
+            help_text="comma-separated names of the outputs still receiving the power reports of every tick when rolling up",
+        )
+        self.add_argument(
+            "target-groups",
+            default_value="",
+            help_text="semicolon-separated rules grouping the targets: pod, namespace, a regex, or a regex and its replacement separated by ->",
+        )
+        self.add_argument(
+            "top-k-targets",
+            argument_type=int,
+            default_value=DEFAULT_TOP_K_TARGETS,
+            help_text="maximum number of targets per socket, the other ones being folded into an 'other' target, 0 to disable it",
+        )
+        self.add_argument(
+            "max-buffered-ticks",
+            argument_type=int,
+            default_value=DEFAULT_MAX_BUFFERED_TICKS,
+            help_text="maximum number of ticks buffered by each formula actor",
+        )
+        self.add_argument(
+            "max-buffered-reports",
+            argument_type=int,
+            default_value=DEFAULT_MAX_BUFFERED_REPORTS,
+            help_text="maximum number of reports buffered by each formula actor, 0 for no limit",
+        )
+        self.add_argument(
+            "overflow-policy",
+            default_value=DEFAULT_OVERFLOW_POLICY,
+            help_text=f"policy applied when a report would exceed the buffer limits of a formula actor: {', '.join(OVERFLOW_POLICIES)}",
+        )
+        self.add_argument(
+            "shared-memory-transport",
+            is_flag=True,
+            action=store_true,
+            default_value=False,
+            help_text="send the projected reports to the formula actors through shared memory rings instead of their mailbox",
+        )
+        self.add_argument(
+            "ring-capacity",
+            argument_type=int,
+            default_value=DEFAULT_RING_CAPACITY,
+            help_text="maximum number of reports stored in the shared memory ring of each formula actor",
+        )
+        self.add_argument(
+            "engine",
+            default_value=ACTORS_ENGINE,
+            help_text=f"engine running the formula: {' or '.join(ENGINES)} (single process, for a single node deployment)",
+        )
+        self.add_argument(
+            "engine-queue-size",
+            argument_type=int,
+            default_value=DEFAULT_QUEUE_SIZE,
+            help_text="maximum number of messages waiting in each queue of the asyncio engine",
+        )
+        self.add_argument(
+            "dispatcher-shards",
+            argument_type=int,
+            default_value=DEFAULT_DISPATCHER_SHARDS,
+            help_text="number of dispatcher processes, the reports of a sensor are always routed to the same one",
+        )
+        self.add_argument(
+            "checkpoint-dir",
+            default_value="",
+            help_text="directory where the formulas save their buffered ticks when stopping and resume them from when starting, empty to disable it",
+        )
+        self.add_argument(
+            "processed-ranges",
+            default_value="",
+            help_text="directory of the ranges of ticks already processed, skipped by the formulas and the replay to make the reruns incremental, empty to disable it",
+        )
+        self.add_argument(
+            "replay-chunk-size",
+            argument_type=int,
+            default_value=DEFAULT_CHUNK_SIZE,
+            help_text="number of rows (or documents) read at once from each input in replay mode",
+        )
+        self.add_argument(
+            "metrics-port",
+            argument_type=int,
+            default_value=DEFAULT_METRICS_PORT,
+            help_text="port of the HTTP endpoint exposing the formula metrics in the Prometheus text format, 0 to disable it",
+        )
+        self.add_argument(
+            "metrics-address",
+            default_value=DEFAULT_METRICS_ADDRESS,
+            help_text="address the metrics HTTP endpoint listens on",
+        )
+        self.add_argument(
+            "profile",
+            default_value="",
+            help_text="directory where each actor writes its CPU profile when stopping, empty to disable the profiling",
+        )
+        self.add_argument(
+            "profile-memory",
+            is_flag=True,
+            action=store_true,
+            default_value=False,
+            help_text="also trace the memory allocations of the profiled actors with tracemalloc",
+        )
+        self.add_argument(
+            "startup-profile",
+            is_flag=True,
+            action=store_true,
+            default_value=False,
+            help_text="log the duration of the startup phases (imports, configuration parsing, actors generation and launch)",
+        )
+
+        subparser_columnar_output = SubgroupConfigParsingManager("columnar")
+        subparser_columnar_output.add_argument(
+            "d",
+            "directory",
+            help_text="directory where the chunk files of the power reports and their index are written",
+        )
+        subparser_columnar_output.add_argument(
+            "m",
+            "model",
+            help_text="specify data type that will be stored in the database",
+            default_value="PowerReport",
+        )
+        subparser_columnar_output.add_argument(
+            "chunk-rows",
+            argument_type=int,
+            default_value=DEFAULT_CHUNK_ROWS,
+            help_text="maximum number of power reports of a chunk file",
+        )
+        subparser_columnar_output.add_argument(
+            "flush-interval",
+            argument_type=int,
+            default_value=DEFAULT_FLUSH_INTERVAL,
+            help_text="delay (in ms) after which the buffered power reports are written, even if the chunk is not full",
+        )
+        subparser_columnar_output.add_argument(
+            "n",
+            "name",
+            help_text="specify pusher name",
+            default_value="pusher_columnar",
+        )
+        self.add_subgroup_parser(
+            subgroup_name="output", subgroup_parser=subparser_columnar_output
+        )
+
+        # The columnar database is write-only, its input is only parsed for the validator to reject it.
+        subparser_columnar_input = SubgroupConfigParsingManager("columnar")
+        subparser_columnar_input.add_argument(
+            "d",
+            "directory",
+            help_text="rejected, the columnar database can only be used as an output",
+        )
+        subparser_columnar_input.add_argument(
+            "m",
+            "model",
+            help_text="specify data type that will be read from the database",
+            default_value="HWPCReport",
+        )
+        subparser_columnar_input.add_argument(
+            "n",
+            "name",
+            help_text="specify puller name",
+            default_value="puller_columnar",
+        )
+        self.add_subgroup_parser(
+            subgroup_name="input", subgroup_parser=subparser_columnar_input
+        )
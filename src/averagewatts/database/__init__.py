@@ -0,0 +1,18 @@
+from .columnar import (
+    ColumnarDB,
+    ColumnarFormatError,
+    ColumnarReader,
+    WriteOnlyDatabaseError,
+)
+from .mmap_csv import MmapCsvDB, MmapCsvFile, MmapCsvIterDB, ReadOnlyDatabaseError
+
+__all__ = [
+    "ColumnarDB",
+    "ColumnarFormatError",
+    "ColumnarReader",
+    "MmapCsvDB",
+    "MmapCsvFile",
+    "MmapCsvIterDB",
+    "ReadOnlyDatabaseError",
+    "WriteOnlyDatabaseError",
+]
@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import time
+from collections.abc import Iterator
+
+import numpy as np
+from powerapi.database.base_db import BaseDB, DBError
+from powerapi.report import PowerReport, Report
+
+from averagewatts.tick.store import timestamp_to_key
+
+# Maximum number of rows of a chunk file.
+DEFAULT_CHUNK_ROWS = 65536
+
+# Delay (in ms) after which the buffered rows are written, even if the chunk is not full.
+DEFAULT_FLUSH_INTERVAL = 10000
+
+# Name of the index of the chunk files, in the directory of the database.
+INDEX_FILENAME = "index.json"
+
+FORMAT_NAME = "averagewatts-columnar"
+FORMAT_VERSION = 1
+
+# Columns of the chunk files and their dtype, the sensors, targets and sockets being ids in the dictionaries of the
+# index. The timestamps are in milliseconds since the epoch.
+COLUMNS = (
+    ("timestamp", "<i8"),
+    ("sensor", "<u4"),
+    ("target", "<u4"),
+    ("socket", "<u4"),
+    ("power", "<f8"),
+    ("ratio", "<f8"),
+)
+
+# Alignment (in bytes) of the columns in the chunk files.
+COLUMN_ALIGNMENT = 64
+
+# Dictionaries of the string columns, in the index.
+_DICTIONARIES = {"sensor": "sensors", "target": "targets", "socket": "sockets"}
+
+
+class ColumnarFormatError(Exception):
+    """
+    Exception raised when a directory does not hold a columnar database readable by this version.
+    """
+
+
+class WriteOnlyDatabaseError(DBError):
+    """
+    Exception raised when reports are read from a database that can only be written.
+    """
+
+
+def _chunk_filename(sequence: int) -> str:
+    return f"chunk-{sequence:08d}.bin"
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+
+def _read_index(directory: str) -> dict | None:
+    try:
+        with open(os.path.join(directory, INDEX_FILENAME)) as file:
+            index = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    if index.get("format") != FORMAT_NAME or index.get("version") != FORMAT_VERSION:
+        raise ColumnarFormatError(f"{directory} is not a columnar database")
+    return index
+
+
+class ColumnarDB(BaseDB):
+    """
+    Write-only database storing the power reports in binary chunk files, one contiguous array per column.
+    The reports are buffered in typed column arrays and written as a chunk when the chunk is full or when the flush
+    interval has elapsed, the index listing the chunks and the dictionaries of the sensors, targets and sockets being
+    replaced once the chunk is written. The chunk files can be memory-mapped by ColumnarReader.
+    """
+
+    def __init__(
+        self,
+        report_type: type[Report],
+        directory: str,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        flush_interval: int = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """
+        :param report_type: Type of the reports, only PowerReport is supported
+        :param directory: Directory of the chunk files and of their index, the chunks of a previous run are kept
+        :param chunk_rows: Maximum number of rows of a chunk
+        :param flush_interval: Delay (in ms) after which the buffered rows are written, checked when saving reports
+        """
+        super().__init__(report_type)
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval / 1000
+
+        self._columns = {
+            name: np.empty(chunk_rows, dtype=dtype) for name, dtype in COLUMNS
+        }
+        self._rows = 0
+        self._first_buffered = 0.0
+        self._dictionaries: dict[str, dict[str, int]] = {
+            column: {} for column in _DICTIONARIES
+        }
+        self._chunks: list[dict] = []
+
+    def connect(self):
+        """
+        Create the directory, or resume the chunk sequence of the index it holds.
+        :raise ColumnarFormatError: When the directory holds an index of another format
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        index = _read_index(self.directory)
+        if index is not None:
+            self._chunks = index["chunks"]
+            for column, key in _DICTIONARIES.items():
+                self._dictionaries[column] = {
+                    value: code for code, value in enumerate(index[key])
+                }
+
+    def disconnect(self):
+        """
+        Write the buffered rows.
+        """
+        self.flush()
+
+    def iter(self, stream_mode: bool = False):
+        """
+        The columnar database is write-only, its files are read by the ColumnarReader.
+        :raise WriteOnlyDatabaseError: Always
+        """
+        raise WriteOnlyDatabaseError(
+            "ColumnarDB is a write-only database, it cannot be used as an input"
+        )
+
+    def save(self, report: Report):
+        self.save_many([report])
+
+    def save_many(self, reports: list[Report]):
+        """
+        Buffer the reports in the column arrays, writing the chunks that are full or older than the flush interval.
+        :param reports: Power reports to save
+        """
+        begin = 0
+        while begin < len(reports):
+            end = min(len(reports), begin + self.chunk_rows - self._rows)
+            self._buffer(reports[begin:end])
+            begin = end
+            if self._rows == self.chunk_rows:
+                self.flush()
+
+        if (
+            self._rows
+            and time.monotonic() - self._first_buffered >= self.flush_interval
+        ):
+            self.flush()
+
+    def _buffer(self, reports: list[PowerReport]) -> None:
+        sensors = self._dictionaries["sensor"]
+        targets = self._dictionaries["target"]
+        sockets = self._dictionaries["socket"]
+        rows = slice(self._rows, self._rows + len(reports))
+        if not self._rows:
+            self._first_buffered = time.monotonic()
+
+        self._columns["timestamp"][rows] = [
+            timestamp_to_key(report.timestamp) for report in reports
+        ]
+        self._columns["sensor"][rows] = [
+            sensors.setdefault(report.sensor, len(sensors)) for report in reports
+        ]
+        self._columns["target"][rows] = [
+            targets.setdefault(report.target, len(targets)) for report in reports
+        ]
+        self._columns["socket"][rows] = [
+            sockets.setdefault(str(report.metadata.get("socket", "")), len(sockets))
+            for report in reports
+        ]
+        self._columns["power"][rows] = [report.power for report in reports]
+        self._columns["ratio"][rows] = [
+            report.metadata.get("ratio", np.nan) for report in reports
+        ]
+        self._rows += len(reports)
+
+    def flush(self) -> None:
+        """
+        Write the buffered rows as a chunk file, then replace the index.
+        """
+        if not self._rows:
+            return
+
+        filename = _chunk_filename(len(self._chunks))
+        offsets = {}
+        with open(os.path.join(self.directory, filename), "wb") as file:
+            for name, _ in COLUMNS:
+                offset = _aligned(file.tell())
+                file.write(b"\0" * (offset - file.tell()))
+                offsets[name] = offset
+                file.write(self._columns[name][: self._rows].tobytes())
+
+        timestamps = self._columns["timestamp"][: self._rows]
+        self._chunks.append(
+            {
+                "file": filename,
+                "rows": self._rows,
+                "offsets": offsets,
+                "first_timestamp": int(timestamps.min()),
+                "last_timestamp": int(timestamps.max()),
+            }
+        )
+        self._write_index()
+        logging.debug("Wrote %d rows to %s", self._rows, filename)
+        self._rows = 0
+
+    def _write_index(self) -> None:
+        """
+        Replace the index atomically, for the readers to never see a partial index.
+        """
+        index = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "columns": dict(COLUMNS),
+            "chunks": self._chunks,
+        }
+        for column, key in _DICTIONARIES.items():
+            index[key] = list(self._dictionaries[column])
+
+        path = os.path.join(self.directory, INDEX_FILENAME)
+        with open(path + ".tmp", "w") as file:
+            json.dump(index, file)
+        os.replace(path + ".tmp", path)
+
+
+class ColumnarReader:
+    """
+    Reader of the chunk files written by ColumnarDB, whose columns are memory-mapped without being copied.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Directory of the chunk files and of their index
+        :raise ColumnarFormatError: When the directory does not hold a columnar database
+        """
+        index = _read_index(directory)
+        if index is None:
+            raise ColumnarFormatError(f"{directory} does not hold a columnar index")
+
+        self.directory = directory
+        self.chunks: list[dict] = index["chunks"]
+        self.columns: dict[str, str] = index["columns"]
+        self.sensors: list[str] = index["sensors"]
+        self.targets: list[str] = index["targets"]
+        self.sockets: list[str] = index["sockets"]
+
+    def __len__(self) -> int:
+        return sum(chunk["rows"] for chunk in self.chunks)
+
+    def iter_chunks(self) -> Iterator[dict[str, np.ndarray]]:
+        """
+        Iterate over the chunks, in the order they were written.
+        :return: Iterator of the columns of each chunk, read-only views of the memory-mapped file
+        """
+        for chunk in self.chunks:
+            data = np.memmap(
+                os.path.join(self.directory, chunk["file"]), dtype=np.uint8, mode="r"
+            )
+            yield {
+                name: np.frombuffer(
+                    data,
+                    dtype=dtype,
+                    count=chunk["rows"],
+                    offset=chunk["offsets"][name],
+                )
+                for name, dtype in self.columns.items()
+            }
+
+    def read(self) -> dict[str, np.ndarray]:
+        """
+        Read every chunk in memory.
+        :return: Concatenated columns of the chunks
+        """
+        chunks = list(self.iter_chunks())
+        return {
+            name: np.concatenate([chunk[name] for chunk in chunks])
+            if chunks
+            else np.empty(0, dtype=dtype)
+            for name, dtype in self.columns.items()
+        }
+
+    def decode(self, column: str, codes: np.ndarray) -> np.ndarray:
+        """
+        Decode the ids of a dictionary-encoded column.
+        :param column: Name of the column: sensor, target or socket
+        :param codes: Ids read from the column
+        :return: Values of the ids
+        """
+        values = np.array(getattr(self, _DICTIONARIES[column]), dtype=object)
+        return values[codes]
@@ -0,0 +1,276 @@
+import heapq
+import logging
+import mmap
+import os
+from collections.abc import Iterator
+
+from powerapi.database.base_db import BaseDB, DBError, IterDB
+from powerapi.database.csv.csvdb import CsvBadCommonKeysError, CsvBadFilePathError
+from powerapi.report import HWPCReport, Report
+
+from averagewatts.projection import ReportProjection
+from averagewatts.tick.store import timestamp_to_key
+
+# Number of bytes of a file parsed at once.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Columns that are not events counters.
+COMMON_COLUMNS = ("timestamp", "sensor", "target", "socket", "cpu")
+
+
+class ReadOnlyDatabaseError(DBError):
+    """
+    Exception raised when reports are written to a database that can only be read.
+    """
+
+
+def _parse_timestamp(timestamp: str) -> int:
+    """
+    Convert a timestamp read from a CSV file to milliseconds, as done by the PowerAPI CSV reader.
+    :raise ValueError: When the timestamp is neither in milliseconds nor in ISO 8601 format
+    """
+    try:
+        return int(timestamp)
+    except ValueError:
+        return timestamp_to_key(Report._extract_timestamp(timestamp))
+
+
+class MmapCsvFile:
+    """
+    Memory-mapped HWPC CSV file, parsed by chunks of lines.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        projection: ReportProjection | None = None,
+    ):
+        """
+        :param filename: Path of the CSV file
+        :param chunk_size: Number of bytes parsed at once
+        :param projection: Projection of the reports, the columns of the events it drops are not parsed
+        :raise CsvBadFilePathError: When the file does not exist
+        :raise CsvBadCommonKeysError: When a common column is missing from the header of the file
+        """
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.group = os.path.basename(filename).removesuffix(".csv")
+
+        try:
+            self._file = open(filename, "rb")
+        except FileNotFoundError as error:
+            raise CsvBadFilePathError(error) from error
+
+        self._mmap = None
+        self._position = 0
+        self.header: list[str] = []
+        if os.fstat(self._file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            header_end = self._mmap.find(b"\n")
+            if header_end == -1:
+                header_end = len(self._mmap)
+            self.header = self._mmap[:header_end].decode().strip().split(",")
+            self._position = header_end + 1
+
+        if self.header and not all(column in self.header for column in COMMON_COLUMNS):
+            self.close()
+            raise CsvBadCommonKeysError("Wrong columns keys")
+
+        self.timestamp_column = self.header.index("timestamp") if self.header else 0
+        self.sensor_column = self.header.index("sensor") if self.header else 0
+        self.target_column = self.header.index("target") if self.header else 0
+        self.socket_column = self.header.index("socket") if self.header else 0
+        self.cpu_column = self.header.index("cpu") if self.header else 0
+        self.events = [
+            (column, name)
+            for column, name in enumerate(self.header)
+            if name not in COMMON_COLUMNS
+            and (projection is None or projection.keeps_event(self.group, name))
+        ]
+
+    def rows(self) -> Iterator[tuple[int, int, list[str]]]:
+        """
+        Parse the rows of the file, a chunk of lines at a time.
+        :return: Iterator of (timestamp, line number, fields) tuples
+        """
+        if self._mmap is None:
+            return
+
+        size = len(self._mmap)
+        line_number = 0
+        while self._position < size:
+            end = min(self._position + self.chunk_size, size)
+            if end < size:
+                # Cut the chunk after its last complete line
+                newline = self._mmap.rfind(b"\n", self._position, end)
+                if newline == -1:
+                    newline = self._mmap.find(b"\n", end)
+                end = size if newline == -1 else newline + 1
+
+            chunk = self._mmap[self._position : end].decode()
+            self._position = end
+            for line in chunk.splitlines():
+                if not line:
+                    continue
+                fields = line.split(",")
+                line_number += 1
+                try:
+                    timestamp = _parse_timestamp(fields[self.timestamp_column])
+                except (ValueError, IndexError):
+                    logging.warning(
+                        "Skipped invalid line %d of %s", line_number, self.filename
+                    )
+                    continue
+                yield timestamp, line_number, fields
+
+    def close(self):
+        """
+        Unmap and close the file.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+class MmapCsvIterDB(IterDB):
+    """
+    Iterator over the HWPC reports of memory-mapped CSV files.
+    The rows of the files (each sorted by timestamp) are merged by timestamp with a streaming k-way merge, and the
+    reports are assembled one tick at a time: only the rows of the current tick are kept in memory.
+    """
+
+    def __init__(self, db, report_type, stream_mode, files: list[MmapCsvFile]):
+        super().__init__(db, report_type, stream_mode)
+        self.files = files
+
+        merged = heapq.merge(
+            *(
+                self._indexed_rows(index, csv_file)
+                for index, csv_file in enumerate(files)
+            ),
+            key=lambda row: row[0],
+        )
+        self._reports = self._assemble_ticks(merged)
+
+    @staticmethod
+    def _indexed_rows(
+        index: int, csv_file: MmapCsvFile
+    ) -> Iterator[tuple[int, int, list[str]]]:
+        for timestamp, _, fields in csv_file.rows():
+            yield timestamp, index, fields
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> HWPCReport:
+        try:
+            return next(self._reports)
+        except StopIteration:
+            for csv_file in self.files:
+                csv_file.close()
+            raise
+
+    def _assemble_ticks(self, rows) -> Iterator[HWPCReport]:
+        tick_timestamp = None
+        tick_rows = []
+        for row in rows:
+            if row[0] != tick_timestamp and tick_rows:
+                yield from self._tick_reports(tick_timestamp, tick_rows)
+                tick_rows = []
+            tick_timestamp = row[0]
+            tick_rows.append(row)
+
+        if tick_rows:
+            yield from self._tick_reports(tick_timestamp, tick_rows)
+
+    def _tick_reports(self, timestamp: int, rows: list) -> Iterator[HWPCReport]:
+        """
+        Build the reports of a tick, one for each (sensor, target) pair, whose groups are the files of its rows.
+        """
+        report_timestamp = Report._extract_timestamp(str(timestamp))
+        reports: dict[tuple[str, str], dict] = {}
+        for _, index, fields in rows:
+            csv_file = self.files[index]
+            try:
+                key = (fields[csv_file.sensor_column], fields[csv_file.target_column])
+                socket = fields[csv_file.socket_column]
+                cpu = fields[csv_file.cpu_column]
+                events = {name: int(fields[column]) for column, name in csv_file.events}
+            except (ValueError, IndexError):
+                logging.warning(
+                    "Skipped incomplete line at timestamp %d of %s",
+                    timestamp,
+                    csv_file.filename,
+                )
+                continue
+
+            groups = reports.setdefault(key, {})
+            group = groups.setdefault(csv_file.group, {})
+            group.setdefault(socket, {})[cpu] = events
+
+        for (sensor, target), groups in reports.items():
+            yield HWPCReport(report_timestamp, sensor, target, groups)
+
+
+class MmapCsvDB(BaseDB):
+    """
+    Read-only database of HWPC reports stored in CSV files (such as rapl.csv, msr.csv and core.csv), memory-mapped
+    and parsed by chunks.
+    """
+
+    def __init__(
+        self,
+        report_type: type[Report],
+        files: list[str],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        projection: ReportProjection | None = None,
+    ):
+        """
+        :param report_type: Type of the reports, only HWPCReport is supported
+        :param files: Path of the CSV files, each one sorted by timestamp
+        :param chunk_size: Number of bytes of a file parsed at once
+        :param projection: Projection of the reports, None to parse every column
+        """
+        super().__init__(report_type)
+        self.files = files
+        self.chunk_size = chunk_size
+        self.projection = projection
+
+    def connect(self):
+        """
+        Check that the files exist, they are mapped when iterating over the reports.
+        """
+        for filename in self.files:
+            if not os.path.isfile(filename):
+                raise CsvBadFilePathError(f"No such file: {filename}")
+
+    def iter(self, stream_mode: bool = False) -> MmapCsvIterDB:
+        """
+        Create an iterator over the reports of the files.
+        """
+        # Every file is read, even without events kept: its rows define the sockets and cpus of the reports.
+        files = [
+            MmapCsvFile(filename, self.chunk_size, self.projection)
+            for filename in self.files
+        ]
+        return MmapCsvIterDB(self, self.report_type, stream_mode, files)
+
+    def save(self, report: Report):
+        """
+        The memory-mapped CSV database is read-only.
+        :raise ReadOnlyDatabaseError: Always
+        """
+        raise ReadOnlyDatabaseError(
+            "MmapCsvDB is a read-only database, it cannot be used as an output"
+        )
+
+    def save_many(self, reports: list[Report]):
+        """
+        The memory-mapped CSV database is read-only.
+        :raise ReadOnlyDatabaseError: Always
+        """
+        raise ReadOnlyDatabaseError(
+            "MmapCsvDB is a read-only database, it cannot be used as an output"
+        )
@@ -0,0 +1,62 @@
+from typing import Any
+
+from powerapi.database.mongodb import MongoDB
+from powerapi.database.mongodb.mongodb import MongoIterDB
+from powerapi.report import Report
+
+
+class ProjectedMongoIterDB(MongoIterDB):
+    """
+    Iterator over the reports of a MongoDB collection, reading only the projected fields of the documents.
+    """
+
+    def __iter__(self):
+        if not self.stream_mode:
+            self.cursor = self.db.collection.find({}, self.db.projection)
+        return self
+
+    def __next__(self) -> Report:
+        """
+        :raise StopIteration: In stream mode when no report was found, otherwise when the cursor is exhausted
+        """
+        if not self.stream_mode:
+            document = self.cursor.next()
+        else:
+            document = self.db.collection.find_one_and_delete(
+                {}, projection=self.db.projection
+            )
+            if document is None:
+                raise StopIteration()
+
+        return self.report_type.from_mongodb(document)
+
+
+class ProjectedMongoDB(MongoDB):
+    """
+    MongoDB database whose documents are projected by the server, for the fields not read by the formula to be
+    neither transferred nor deserialized.
+    """
+
+    def __init__(
+        self,
+        report_type: type[Report],
+        uri: str,
+        db_name: str,
+        collection_name: str,
+        projection: dict[str, Any],
+    ):
+        """
+        :param report_type: Type of the reports
+        :param uri: URI of the MongoDB server
+        :param db_name: Name of the database
+        :param collection_name: Name of the collection
+        :param projection: Projection of the documents (see ReportProjection.mongodb_projection)
+        """
+        super().__init__(report_type, uri, db_name, collection_name)
+        self.projection = projection
+
+    def iter(self, stream_mode: bool = False) -> ProjectedMongoIterDB:
+        """
+        Create an iterator over the projected reports of the collection.
+        """
+        return ProjectedMongoIterDB(self, self.report_type, stream_mode)
@@ -0,0 +1,32 @@
+import zlib
+
+DEFAULT_DISPATCHER_SHARDS = 1
+
+
+def sensor_shard(sensor: str, shards: int) -> int:
+    """
+    Return the shard of the given sensor.
+    The shard is computed from a CRC32 of the sensor name, which (unlike the builtin hash of a string) is stable across
+    processes, so every puller routes the reports of a sensor to the same dispatcher.
+    :param sensor: Name of the sensor
+    :param shards: Number of dispatcher shards
+    :return: Index of the shard of the sensor
+    """
+    return zlib.crc32(sensor.encode()) % shards
+
+
+class SensorShardRule:
+    """
+    Filter rule accepting the reports of the sensors belonging to a dispatcher shard.
+    """
+
+    def __init__(self, shard: int, shards: int):
+        """
+        :param shard: Index of the dispatcher shard
+        :param shards: Number of dispatcher shards
+        """
+        self.shard = shard
+        self.shards = shards
+
+    def __call__(self, report) -> bool:
+        return sensor_shard(report.sensor, self.shards) == self.shard
@@ -0,0 +1,21 @@
+from .inprocess import (
+    ACTORS_ENGINE,
+    ASYNCIO_ENGINE,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_READ_BATCH_SIZE,
+    ENGINES,
+    PUSHER_MAX_SIZE,
+    AsyncioEngine,
+    QueuedPusher,
+)
+
+__all__ = [
+    "ACTORS_ENGINE",
+    "ASYNCIO_ENGINE",
+    "DEFAULT_QUEUE_SIZE",
+    "DEFAULT_READ_BATCH_SIZE",
+    "ENGINES",
+    "PUSHER_MAX_SIZE",
+    "AsyncioEngine",
+    "QueuedPusher",
+]
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import signal
+from types import SimpleNamespace
+
+from powerapi.database import BaseDB
+from powerapi.dispatcher import RouteTable
+from powerapi.formula import FormulaActor
+from powerapi.pusher.handlers import ReportHandler
+from powerapi.report import BadInputData, HWPCReport
+
+from averagewatts.actor import AverageWattsFormulaConfig, AverageWattsFormulaState
+from averagewatts.backends import disconnect_database
+from averagewatts.handler import HWPCReportHandler
+from averagewatts.projection import ReportProjection
+from averagewatts.pusher import PowerReportBatch, PowerReportBatchHandler
+
+# Engines running the formula: the PowerAPI actors (a process per actor) or the in-process asyncio engine.
+ACTORS_ENGINE = "actors"
+ASYNCIO_ENGINE = "asyncio"
+ENGINES = (ACTORS_ENGINE, ASYNCIO_ENGINE)
+
+# Maximum number of messages waiting in each queue of the engine.
+DEFAULT_QUEUE_SIZE = 1024
+
+# Maximum number of reports read from an input at once.
+DEFAULT_READ_BATCH_SIZE = 256
+
+# Delay (in ms) before the buffered reports of an output are written, as for the pusher actors.
+PUSHER_DELAY = 100
+
+# Maximum number of reports buffered by an output before being written, as for the pusher actors.
+PUSHER_MAX_SIZE = 50
+
+# Delay (in ms) between two reads of an exhausted input in stream mode, as for the puller actors.
+PULLER_TIMEOUT = 100
+
+# Marker of the end of the messages of a queue.
+_END = None
+
+
+class QueuedPusher:
+    """
+    Stand-in for a pusher actor given to the formula handlers.
+    The messages sent by a handler are buffered until the engine puts them in the bounded queue of the output.
+    """
+
+    def __init__(self, queue: asyncio.Queue):
+        """
+        :param queue: Queue of the output
+        """
+        self.queue = queue
+        self.pending = []
+
+    def send_data(self, msg) -> None:
+        """
+        Buffer a message for the output.
+        :param msg: Power report or batch of power reports
+        """
+        self.pending.append(msg)
+
+    async def flush(self) -> None:
+        """
+        Put the buffered messages in the queue of the output, waiting for room in the queue if it is full.
+        """
+        pending, self.pending = self.pending, []
+        for msg in pending:
+            await self.queue.put(msg)
+
+
+class AsyncioEngine:
+    """
+    Run the pullers, the dispatcher, the formula handlers and the pushers as coroutines of a single process.
+    The inputs are read in a worker thread by batches, and the stages are connected by bounded queues: a slow output
+    slows down the formula, which slows down the reading of the inputs. The reports are handled by the same dispatch
+    rules and handlers as the actors, without being serialized between processes.
+    """
+
+    def __init__(
+        self,
+        inputs: dict[str, BaseDB],
+        outputs: dict[str, tuple[BaseDB, int]],
+        route_table: RouteTable,
+        formula_config: AverageWattsFormulaConfig,
+        stream_mode: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        dispatcher_name: str = "naive_dispatcher",
+        projection: ReportProjection | None = None,
+    ):
+        """
+        :param inputs: Input databases, by name
+        :param outputs: Output databases and their maximum buffer size, by name
+        :param route_table: Route table of the reports to the formula handlers
+        :param formula_config: Configuration of the formula handlers
+        :param stream_mode: Keep reading the inputs once exhausted
+        :param queue_size: Maximum number of messages waiting in each queue
+        :param dispatcher_name: Name of the dispatcher, used to name the formula handlers like the actors
+        :param projection: Projection of the reports read from the inputs, None to keep every field
+        """
+        self.inputs = inputs
+        self.outputs = outputs
+        self.route_table = route_table
+        self.formula_config = formula_config
+        self.stream_mode = stream_mode
+        self.queue_size = queue_size
+        self.dispatcher_name = dispatcher_name
+        self.projection = projection
+
+        self.pushers: dict[str, QueuedPusher] = {}
+        self.handlers: dict[tuple, HWPCReportHandler] = {}
+        self._pullers: list[asyncio.Task] = []
+
+    def run(self) -> None:
+        """
+        Process the reports of the inputs until they are exhausted (or until SIGTERM/SIGINT in stream mode).
+        On the first signal, the engine stops reading the inputs and drains the formula handlers, a second signal
+        interrupts it right away.
+        """
+        try:
+            asyncio.run(self._run())
+        except asyncio.CancelledError:
+            logging.info("Engine interrupted")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._stop, task)
+
+        iterators = {}
+        for name, database in self.inputs.items():
+            await asyncio.to_thread(database.connect)
+            iterators[name] = database.iter(self.stream_mode)
+        for database, _ in self.outputs.values():
+            await asyncio.to_thread(database.connect)
+
+        reports = asyncio.Queue(self.queue_size)
+        self.pushers = {
+            name: QueuedPusher(asyncio.Queue(self.queue_size)) for name in self.outputs
+        }
+        pushers = [
+            asyncio.create_task(self._push(name, database, max_size))
+            for name, (database, max_size) in self.outputs.items()
+        ]
+        pullers = self._pullers = [
+            asyncio.create_task(self._pull(name, iterator, reports))
+            for name, iterator in iterators.items()
+        ]
+
+        try:
+            try:
+                await self._dispatch(reports, len(pullers))
+            except asyncio.CancelledError:
+                self._stop_handlers(graceful=False)
+                raise
+
+            self._stop_handlers(graceful=True)
+            for pusher in self.pushers.values():
+                await pusher.flush()
+                await pusher.queue.put(_END)
+            await asyncio.gather(*pushers)
+        finally:
+            for stage in pullers + pushers:
+                stage.cancel()
+            await asyncio.gather(*pullers, *pushers, return_exceptions=True)
+
+    def _stop(self, task: asyncio.Task) -> None:
+        """
+        Stop reading the inputs, or interrupt the engine if it is already stopping.
+        """
+        if all(puller.done() for puller in self._pullers):
+            task.cancel()
+            return
+
+        logging.info("Engine stopping, draining the formula handlers")
+        for puller in self._pullers:
+            puller.cancel()
+
+    def _stop_handlers(self, graceful: bool) -> None:
+        """
+        Drain and checkpoint the buffered ticks of the formula handlers, as done by the formula actors when stopping.
+        """
+        for handler in self.handlers.values():
+            handler.stop(graceful)
+
+    def _read_batch(self, iterator) -> tuple[list[HWPCReport], bool]:
+        """
+        Read a batch of reports from an input and project them, in a worker thread.
+        :return: The reports and whether the input is exhausted
+        """
+        batch = []
+        while len(batch) < DEFAULT_READ_BATCH_SIZE:
+            try:
+                report = next(iterator)
+                if self.projection is not None:
+                    self.projection.project(report)
+                batch.append(report)
+            except BadInputData as exn:
+                logging.error("Received malformed report from database: %s", exn.msg)
+                logging.debug("Raw report value: %s", exn.input_data)
+            except StopIteration:
+                return batch, True
+        return batch, False
+
+    async def _pull(self, name: str, iterator, reports: asyncio.Queue) -> None:
+        """
+        Read the reports of an input and put them in the queue of the dispatcher.
+        """
+        try:
+            while True:
+                batch, exhausted = await asyncio.to_thread(self._read_batch, iterator)
+                for report in batch:
+                    await reports.put(report)
+
+                if exhausted:
+                    if not self.stream_mode:
+                        break
+                    await asyncio.sleep(PULLER_TIMEOUT / 1000)
+
+            logging.debug("Input %s is exhausted", name)
+        finally:
+            await reports.put(_END)
+
+    async def _dispatch(self, reports: asyncio.Queue, pullers: int) -> None:
+        """
+        Route the reports to their formula handlers until every input is exhausted, and forward the power reports of
+        the handlers to the outputs.
+        """
+        while pullers:
+            report = await reports.get()
+            if report is _END:
+                pullers -= 1
+                continue
+
+            dispatch_rule = self.route_table.get_dispatch_rule(report)
+            for formula_id in dispatch_rule.get_formula_id(report):
+                handler = self.handlers.get(formula_id)
+                if handler is None:
+                    handler = self._create_handler(formula_id)
+                handler.handle(report)
+
+            for pusher in self.pushers.values():
+                if pusher.pending:
+                    await pusher.flush()
+
+    def _create_handler(self, formula_id: tuple) -> HWPCReportHandler:
+        """
+        Create the formula handler of the given formula id, named like the formula actor of the dispatcher.
+        """
+        name = str((self.dispatcher_name, *formula_id))
+        actor = SimpleNamespace(name=name)
+        state = AverageWattsFormulaState(
+            actor,
+            self.pushers,
+            FormulaActor._extract_formula_metadata(name),
+            self.formula_config,
+        )
+        handler = HWPCReportHandler(state)
+        self.handlers[formula_id] = handler
+        return handler
+
+    async def _push(self, name: str, database: BaseDB, max_size: int) -> None:
+        """
+        Write the power reports put in the queue of an output, using the handlers of the pusher actors.
+        """
+        state = SimpleNamespace(
+            actor=SimpleNamespace(name=name, logger=logging.getLogger(name)),
+            database=database,
+            buffer=[],
+        )
+        report_handler = ReportHandler(state, PUSHER_DELAY, max_size)
+        batch_handler = PowerReportBatchHandler(state, PUSHER_DELAY, max_size)
+
+        queue = self.pushers[name].queue
+        try:
+            while (msg := await queue.get()) is not _END:
+                if isinstance(msg, PowerReportBatch):
+                    batch_handler.handle(msg)
+                else:
+                    report_handler.handle(msg)
+        finally:
+            if state.buffer:
+                database.save_many(state.buffer)
+            disconnect_database(database)
@@ -1,3 +1,4 @@
 from .hwpc_report import HWPCReportHandler
+from .poison_pill import DrainingPoisonPillMessageHandler
 
-__all__ = ["HWPCReportHandler"]
+__all__ = ["DrainingPoisonPillMessageHandler", "HWPCReportHandler"]
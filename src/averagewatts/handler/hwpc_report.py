@@ -1,12 +1,36 @@
 import datetime
 import logging
-import math
-from collections import OrderedDict
+import time
 from typing import Any
 
+import numpy as np
 from powerapi.handler import Handler
 from powerapi.report import HWPCReport, PowerReport
 
+from averagewatts.checkpoint import (
+    FormulaCheckpoint,
+    ProcessedRangeIndex,
+    checkpoint_path,
+)
+from averagewatts.kernel import estimate_power, estimate_tick_power
+from averagewatts.metrics import FormulaMetrics
+from averagewatts.pusher import PowerReportBatch
+from averagewatts.rollup import PowerRollup
+from averagewatts.shared import SharedPowerEncoder
+from averagewatts.target import TargetGrouper, TargetReducer, parse_group_rules
+from averagewatts.tick import (
+    DROP_NEWEST_POLICY,
+    DROP_OLDEST_POLICY,
+    Tick,
+    TickStore,
+)
+from averagewatts.tick.store import timestamp_to_key
+
+from .report_metadata import ReportMetadataCache, new_power_report
+
+# Number of ready ticks from which the formula catches up on its backlog, processing and pushing them in one batch.
+CATCH_UP_MIN_TICKS = 2
+
 
 class HWPCReportHandler(Handler):
     """
@@ -15,97 +39,694 @@ class HWPCReportHandler(Handler):
 
     def __init__(self, state):
         super().__init__(state)
-        self.ticks: OrderedDict[datetime.datetime, dict[str, HWPCReport]] = (
-            OrderedDict()
+        self.sensor_level = state.config.sensor_level
+        self.ticks = TickStore(
+            None if self.sensor_level else state.socket,
+            state.config.max_buffered_ticks,
         )
+        self.max_buffered_reports = state.config.max_buffered_reports
+        self.overflow_policy = state.config.overflow_policy
+        self.allowed_lateness = state.config.allowed_lateness
+        self.expected_targets = state.config.expected_targets
+        self.batch_delivery = state.config.batch_delivery
+
+        # The hot path skips its debug logs, and the formatting of their arguments, when the debug level is disabled.
+        self.debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        self.report_metadata = ReportMetadataCache()
+
+        # Watermark state, in milliseconds of sensor time.
+        self.newest_key: int | None = None
+        self.last_processed_key: int | None = None
+        self.late_reports = 0
+
+        self.metrics = FormulaMetrics(state.actor.name, state.config.metrics_queue)
+
+        # When rolling up, only the full resolution outputs receive the power reports of every tick.
+        self.rollup = (
+            PowerRollup(state.config.rollup_windows)
+            if state.config.rollup_windows
+            else None
+        )
+        self.full_resolution_outputs = state.config.full_resolution_outputs
+
+        # The targets of a socket share the same power estimation, it can be sent once per tick along with the targets
+        # encoded against the dictionary of the socket.
+        self.shared_power = (
+            SharedPowerEncoder() if state.config.shared_power_reports else None
+        )
+
+        # Bound the number of targets of the power reports, by grouping them and folding the ones outside the top-K.
+        self.target_reducer = None
+        if state.config.target_groups or state.config.top_k_targets:
+            grouper = None
+            if state.config.target_groups:
+                grouper = TargetGrouper(parse_group_rules(state.config.target_groups))
+            self.target_reducer = TargetReducer(grouper, state.config.top_k_targets)
+
+        # The buffered ticks of the previous instance of the formula are resumed from its checkpoint.
+        self.drain_ticks = state.config.drain_ticks
+        self.checkpoint_path = None
+        if state.config.checkpoint_dir:
+            self.checkpoint_path = checkpoint_path(
+                state.config.checkpoint_dir,
+                state.sensor,
+                None if self.sensor_level else state.socket,
+            )
+            checkpoint = FormulaCheckpoint.load(self.checkpoint_path)
+            if checkpoint is not None:
+                self._resume(checkpoint)
+
+        # The ticks already processed by a previous run are skipped, for the reruns to only process the missing ones.
+        self.processed_ranges = None
+        if state.config.processed_ranges_dir:
+            self.processed_ranges = ProcessedRangeIndex(
+                state.config.processed_ranges_dir
+            )
 
     def handle(self, msg: HWPCReport) -> None:
         """
         Process a HWPC report and send the result(s) to a pusher actor.
         :param msg: Received HWPC report
         """
-        logging.debug("received message: %s", msg)
+        if self.debug:
+            logging.debug("received message: %s", msg)
+        self.metrics.reports_received += 1
+
+        key = timestamp_to_key(msg.timestamp)
+        if self._drop_late_report(msg, key):
+            return
 
-        current_tick = self.ticks.setdefault(msg.timestamp, {})
-        if msg.target in current_tick:
+        if self._is_buffer_full(key):
+            self.metrics.buffer_overflows += 1
+            if not self._make_room() or self._drop_late_report(msg, key):
+                return
+
+        if self.ticks.append(msg):
+            self.metrics.duplicate_reports += 1
             logging.warning(
                 "Duplicate HWPCReport for target %s at timestamp %s. ",
                 msg.target,
                 msg.timestamp,
             )
 
-        current_tick[msg.target] = msg
-        # Start to process the oldest tick only after receiving at least 5 ticks.
-        # We wait before processing the ticks in order to mitigate the possible delay between the sensor/database.
-        if len(self.ticks) >= 5:
-            power_reports = self._process_oldest_tick()
-            for report in power_reports:
-                for name, pusher in self.state.pushers.items():
-                    pusher.send_data(report)
+        if self.newest_key is None or key > self.newest_key:
+            self.newest_key = key
+
+        # Ticks are processed in timestamp order, as soon as the sensor time went past their allowed lateness or all
+        # their expected reports have been received.
+        self._emit_ready_ticks(self._ready_ticks_count())
+
+        self.metrics.buffer_depth = len(self.ticks)
+        self.metrics.maybe_publish()
+
+    def _drop_late_report(self, msg: HWPCReport, key: int) -> bool:
+        """
+        Drop the report if its tick has already been processed (or shed).
+        :return: True if the report has been dropped, False otherwise
+        """
+        if self.last_processed_key is None or key > self.last_processed_key:
+            return False
+
+        self.late_reports += 1
+        self.metrics.late_reports += 1
+        if self.debug:
+            logging.debug(
+                "Dropped late HWPCReport for target %s at timestamp %s (%d late reports)",
+                msg.target,
+                msg.timestamp,
+                self.late_reports,
+            )
+        return True
+
+    def _is_buffer_full(self, key: int) -> bool:
+        """
+        Check if storing a report of the given tick would exceed the buffer limits.
+        """
+        if self.ticks.is_full() and key not in self.ticks:
+            return True
+        return 0 < self.max_buffered_reports <= self.ticks.report_count
+
+    def _make_room(self) -> bool:
+        """
+        Apply the overflow policy to make room for a new report.
+        :return: True if the report can be stored, False if it has to be dropped
+        """
+        if self.overflow_policy == DROP_NEWEST_POLICY:
+            self.metrics.reports_shed += 1
+            return False
+
+        if self.overflow_policy == DROP_OLDEST_POLICY:
+            tick = self.ticks.pop_oldest()
+            self.last_processed_key = tick.key
+            self.metrics.ticks_shed += 1
+            self.metrics.reports_shed += len(tick) + tick.has_global_report
+            logging.debug("Shed buffered tick %s", tick)
+            if self.processed_ranges is not None:
+                sockets = (
+                    set(tick.sockets) | (tick.rapl_energies or {}).keys()
+                    if self.sensor_level
+                    else {self.state.socket}
+                )
+                for socket in sockets:
+                    self.processed_ranges.interrupt(self.state.sensor, socket)
+            return True
+
+        # The oldest tick is processed early, its power reports only covering the reports it has received so far.
+        self._emit_oldest_tick()
+        return True
+
+    def stop(self, graceful: bool) -> None:
+        """
+        Drain the buffered ticks, emit the current rollup windows and checkpoint the remaining ticks when the formula
+        stops.
+        :param graceful: True if the formula is stopped gracefully, its pushers still receiving the power reports
+        """
+        if graceful and self.drain_ticks:
+            self.drain(keep_incomplete=self.checkpoint_path is not None)
+
+        # The pushers still receive the reports, the current windows are emitted without waiting for their end.
+        if graceful and self.rollup is not None:
+            _, rollup_pushers = self._split_pushers()
+            self._send_power_reports(self.rollup.flush(), rollup_pushers)
+
+        if self.checkpoint_path is not None:
+            FormulaCheckpoint(
+                self.last_processed_key, self.newest_key, self.ticks.export()
+            ).save(self.checkpoint_path)
+            logging.info(
+                "Checkpointed %d buffered ticks to %s",
+                len(self.ticks),
+                self.checkpoint_path,
+            )
+
+        # The ranges are only written once the reports of the processed ticks have been sent to the pushers.
+        if graceful and self.processed_ranges is not None:
+            self.processed_ranges.save()
+
+        self.metrics.buffer_depth = len(self.ticks)
+        self.metrics.publish()
+
+    def drain(self, keep_incomplete: bool) -> None:
+        """
+        Process the buffered ticks without waiting for their allowed lateness.
+        :param keep_incomplete: Stop at the oldest tick missing its global report or its expected target reports, to
+        keep it (and the following ones) buffered
+        """
+        if keep_incomplete:
+            self._emit_ready_ticks(
+                self.ticks.ready_count(None, max(self.expected_targets, 1))
+            )
+        else:
+            self._emit_ready_ticks(len(self.ticks))
+
+    def _resume(self, checkpoint: FormulaCheckpoint) -> None:
+        """
+        Restore the buffered ticks and the watermark of a checkpoint.
+        """
+        self.ticks.restore(checkpoint.ticks[-self.ticks.capacity :])
+        self.last_processed_key = checkpoint.last_processed_key
+        self.newest_key = checkpoint.newest_key
+        self.metrics.buffer_depth = len(self.ticks)
+        logging.info(
+            "Resumed %d buffered ticks from %s", len(self.ticks), self.checkpoint_path
+        )
+
+    def _ready_ticks_count(self) -> int:
+        """
+        Count the oldest buffered ticks that can be processed in a row.
+        :return: Number of ticks the watermark went past or that are complete
+        """
+        watermark = (
+            self.newest_key - self.allowed_lateness
+            if self.newest_key is not None
+            else None
+        )
+        return self.ticks.ready_count(watermark, self.expected_targets)
+
+    def _emit_ready_ticks(self, count: int) -> None:
+        """
+        Process the given number of oldest ticks, in a single catch-up batch if there are enough of them.
+        :param count: Number of ready ticks
+        """
+        if count >= CATCH_UP_MIN_TICKS:
+            self._catch_up(count)
+            return
+
+        for _ in range(count):
+            self._emit_oldest_tick()
+
+    def _emit_oldest_tick(self) -> None:
+        """
+        Process the oldest tick and send its power reports, or the rolled-up reports of the windows it closes, to the
+        pushers.
+        """
+        power_reports = self._process_oldest_tick()
+        if power_reports:
+            self.metrics.power_reports_sent += len(power_reports)
+            self.metrics.push_latency_seconds.observe(
+                time.time() - power_reports[0].timestamp.timestamp()
+            )
+
+        if self.rollup is None:
+            self._send_power_reports(power_reports, self.state.pushers)
+            return
+
+        full_resolution_pushers, rollup_pushers = self._split_pushers()
+        self._send_power_reports(power_reports, full_resolution_pushers)
+        self._send_power_reports(
+            self.rollup.add(self.last_processed_key, power_reports), rollup_pushers
+        )
+
+    def _catch_up(self, count: int) -> None:
+        """
+        Process the given number of oldest ticks at once and send all their power reports, or the rolled-up reports of
+        the windows they close, in a single batch to each pusher, whether the batch delivery is enabled or not.
+        :param count: Number of ticks to process
+        """
+        begin = time.perf_counter()
+        ticks = [self.ticks.pop_oldest() for _ in range(count)]
+        self.last_processed_key = ticks[-1].key
+        self.report_metadata.tick(count)
+        if self.sensor_level:
+            ticks_power_reports = [self._process_sensor_tick(tick) for tick in ticks]
+        else:
+            ticks_power_reports = self._process_socket_ticks(ticks)
+
+        tick_processing_seconds = (time.perf_counter() - begin) / count
+        self.metrics.ticks_processed += count
+        self.metrics.catch_up_batches += 1
+        self.metrics.catch_up_ticks += count
+        now = time.time()
+        power_reports = []
+        for tick_power_reports in ticks_power_reports:
+            self.metrics.tick_processing_seconds.observe(tick_processing_seconds)
+            if tick_power_reports:
+                self.metrics.push_latency_seconds.observe(
+                    now - tick_power_reports[0].timestamp.timestamp()
+                )
+            power_reports.extend(tick_power_reports)
+        self.metrics.power_reports_sent += len(power_reports)
+        if self.debug:
+            logging.debug("caught up on %d ticks", count)
+
+        if self.rollup is None:
+            self._send_batch(power_reports, self.state.pushers)
+            return
+
+        full_resolution_pushers, rollup_pushers = self._split_pushers()
+        self._send_batch(power_reports, full_resolution_pushers)
+        rolled_up_reports = []
+        for tick, tick_power_reports in zip(ticks, ticks_power_reports, strict=True):
+            rolled_up_reports.extend(self.rollup.add(tick.key, tick_power_reports))
+        self._send_batch(rolled_up_reports, rollup_pushers)
+
+    def _split_pushers(self) -> tuple[dict, dict]:
+        """
+        Split the pushers between the full resolution outputs and the rolled-up ones.
+        :return: Full resolution pushers and rolled-up pushers, by name
+        """
+        full_resolution_pushers = {}
+        rollup_pushers = {}
+        for name, pusher in self.state.pushers.items():
+            if name in self.full_resolution_outputs:
+                full_resolution_pushers[name] = pusher
+            else:
+                rollup_pushers[name] = pusher
+        return full_resolution_pushers, rollup_pushers
+
+    def _send_batch(self, power_reports: list[PowerReport], pushers: dict) -> None:
+        """
+        Send the given power reports in a single message to each of the given pushers.
+        :param power_reports: Power reports to send
+        :param pushers: Pushers to send the reports to, by name
+        """
+        if not power_reports:
+            return
+
+        batch = PowerReportBatch(self.state.actor.name, power_reports)
+        for name, pusher in pushers.items():
+            pusher.send_data(batch)
+            if self.debug:
+                logging.debug("sent batch: %s to %s", batch, name)
+
+    def _send_power_reports(
+        self, power_reports: list[PowerReport], pushers: dict
+    ) -> None:
+        """
+        Send the given power reports to the given pushers.
+        In batch delivery mode, the reports are sent in a single message to each pusher.
+        :param power_reports: Power reports to send
+        :param pushers: Pushers to send the reports to, by name
+        """
+        if self.batch_delivery:
+            self._send_batch(power_reports, pushers)
+            return
+
+        for report in power_reports:
+            for name, pusher in pushers.items():
+                pusher.send_data(report)
+                if self.debug:
                     logging.debug("sent report: %s to %s", report, name)
 
     def _process_oldest_tick(self) -> list[PowerReport]:
         """
-        Process the oldest tick stored in the stack and generate power reports for the running target(s).
+        Process the oldest tick stored in the buffer and generate power reports for the running target(s).
+        :return: Power reports of the running target(s)
+        """
+        begin = time.perf_counter()
+        tick = self.ticks.pop_oldest()
+        self.last_processed_key = tick.key
+        self.report_metadata.tick()
+
+        if self.sensor_level:
+            power_reports = self._process_sensor_tick(tick)
+        else:
+            power_reports = self._process_socket_tick(tick)
+
+        self.metrics.ticks_processed += 1
+        self.metrics.tick_processing_seconds.observe(time.perf_counter() - begin)
+        return power_reports
+
+    def _process_socket_tick(self, tick: Tick) -> list[PowerReport]:
+        """
+        Generate the power reports of the monitored socket for the given tick.
+        :param tick: Tick to process
         :return: Power reports of the running target(s)
         """
-        timestamp, hwpc_reports = self.ticks.popitem(last=False)
+        if not self._is_socket_tick_valid(tick):
+            return []
+
+        return self._gen_socket_power_reports(
+            tick, *estimate_tick_power(tick.rapl_energy, len(tick))
+        )
+
+    def _process_socket_ticks(self, ticks: list[Tick]) -> list[list[PowerReport]]:
+        """
+        Generate the power reports of the monitored socket for the given ticks, their power being computed at once.
+        :param ticks: Ticks to process
+        :return: Power reports of the running target(s) of each tick
+        """
+        valid = [self._is_socket_tick_valid(tick) for tick in ticks]
+        valid_ticks = [
+            tick for tick, is_valid in zip(ticks, valid, strict=True) if is_valid
+        ]
+
+        estimation = estimate_power(
+            [tick.key for tick in valid_ticks],
+            [tick.rapl_energy for tick in valid_ticks],
+            [len(tick) for tick in valid_ticks],
+        )
+        estimations = zip(
+            estimation.socket_power.tolist(),
+            estimation.target_power.tolist(),
+            strict=True,
+        )
+        return [
+            self._gen_socket_power_reports(tick, *next(estimations)) if is_valid else []
+            for tick, is_valid in zip(ticks, valid, strict=True)
+        ]
+
+    def _is_socket_tick_valid(self, tick: Tick) -> bool:
+        """
+        Check if the given tick can be processed, counting it as dropped otherwise, and record it in the processed
+        ranges.
+        :param tick: Tick to check
+        :return: True if the tick has its global report, its RAPL energy and target reports and was not already
+        processed by a previous run, False otherwise
+        """
+        if self._is_already_processed(tick, self.state.socket):
+            return False
+
+        is_valid = self._has_socket_tick_reports(tick)
+        self._record_processed(tick, self.state.socket, is_valid)
+        return is_valid
 
-        global_report: HWPCReport = hwpc_reports.pop("all", None)
-        if not global_report:
+    def _has_socket_tick_reports(self, tick: Tick) -> bool:
+        """
+        Check if the given tick has the reports needed to be processed, counting it as dropped otherwise.
+        :param tick: Tick to check
+        :return: True if the tick has its global report, its RAPL energy and target reports, False otherwise
+        """
+        if not tick.has_global_report:
+            self.metrics.drop_tick("missing_global_report")
             logging.warning(
-                "Failed to process tick %s: missing global report", timestamp
+                "Failed to process tick %s: missing global report", tick.timestamp
             )
-            return []
+            return False
 
-        if "rapl" not in global_report.groups.keys():
-            logging.warning("Failed to process tick %s: missing rapl report", timestamp)
-            return []
+        if tick.rapl_energy is None:
+            self.metrics.drop_tick("missing_rapl_report")
+            logging.warning(
+                "Failed to process tick %s: missing rapl report", tick.timestamp
+            )
+            return False
 
-        if not hwpc_reports:
+        if not tick.target_names:
             # Pre-processor can drop reports
+            self.metrics.drop_tick("no_target_report")
             logging.warning("No available reports !")
-            return []
+            return False
 
-        logging.debug("processing tick %s", timestamp)
-        logging.debug("global report: %s", hwpc_reports)
+        return True
 
-        # Retrieve rapl energy measurement
-        energy = next(
-            iter(global_report.groups["rapl"][str(self.state.socket)].values())
-        )
-        # Convert Joules to Watts
-        energy_in_watts = math.ldexp(energy["RAPL_ENERGY_PKG"], -32)
+    def _is_already_processed(self, tick: Tick, socket) -> bool:
+        """
+        Check if the tick of the given socket is in the processed ranges, counting it as dropped if so.
+        :param tick: Tick to check
+        :param socket: Socket of the tick
+        :return: True if the tick was already processed by a previous run, False otherwise
+        """
+        if self.processed_ranges is None or not self.processed_ranges.is_processed(
+            self.state.sensor, socket, tick.key
+        ):
+            return False
+
+        self.metrics.drop_tick("already_processed")
+        if self.debug:
+            logging.debug(
+                "Skipped tick %s of socket %s: already processed",
+                tick.timestamp,
+                socket,
+            )
+        return True
+
+    def _record_processed(self, tick: Tick, socket, is_processed: bool) -> None:
+        """
+        Record the tick of the given socket in the processed ranges, the ticks without output interrupting them.
+        :param tick: Tick gone through
+        :param socket: Socket of the tick
+        :param is_processed: True if the power reports of the tick are generated, False if it is dropped
+        """
+        if self.processed_ranges is None:
+            return
+        if is_processed:
+            self.processed_ranges.add(self.state.sensor, socket, tick.key)
+        else:
+            self.processed_ranges.interrupt(self.state.sensor, socket)
+
+    def _gen_socket_power_reports(
+        self, tick: Tick, energy_in_watts: float, power_estimation: float
+    ) -> list[PowerReport]:
+        """
+        Generate the power reports of the targets of the monitored socket and its RAPL power report, or its shared power
+        report.
+        :param tick: Processed tick
+        :param energy_in_watts: Power of the socket
+        :param power_estimation: Power estimation of each target
+        :return: Power reports of the running target(s)
+        """
+        if self.debug:
+            logging.debug("processing tick %s", tick.timestamp)
+            logging.debug("tick reports: %s", tick)
 
-        event_count = len(hwpc_reports)
-        power_estimation = energy_in_watts / event_count
+        if self.shared_power is not None:
+            return [
+                self.shared_power.encode(
+                    tick.timestamp,
+                    self.state.sensor,
+                    self.state.socket,
+                    energy_in_watts,
+                    power_estimation,
+                    tick.target_names,
+                    tick.target_metadata,
+                    tick.global_metadata,
+                )
+            ]
 
         # per-target power estimation
-        power_reports: list[PowerReport] = [
-            self._gen_power_report(
-                timestamp,
-                target_name,
-                "naive",
-                power_estimation,
-                1.0,
-                target_report.metadata,
-            )
-            for target_name, target_report in hwpc_reports.items()
-        ]
+        power_reports = self._gen_target_power_reports(
+            tick.timestamp,
+            tick.target_names,
+            tick.target_metadata,
+            power_estimation,
+            tick.global_metadata,
+            self.state.socket,
+        )
 
         # rapl power
         power_reports.append(
             self._gen_power_report(
-                timestamp,
+                tick.timestamp,
                 "rapl",
                 "naive",
                 energy_in_watts,
                 1.0,
-                global_report.metadata,
+                tick.global_metadata,
+                self.state.socket,
             )
         )
         return power_reports
 
+    def _process_sensor_tick(self, tick: Tick) -> list[PowerReport]:
+        """
+        Generate the power reports of every socket of the sensor for the given tick.
+        The per-socket power and the per-target estimations of all the sockets are computed in a single pass.
+        :param tick: Tick to process
+        :return: Power reports of the running target(s) for each socket
+        """
+        timestamp = tick.timestamp
+        rapl_energies = tick.rapl_energies or {}
+
+        # Sockets used by each target, as a (targets, sockets) boolean matrix
+        masks = np.frombuffer(tick.target_sockets, dtype=np.uint64)
+        socket_bits = np.arange(len(tick.sockets), dtype=np.uint64)
+        membership = ((masks[:, np.newaxis] >> socket_bits) & 1).astype(bool)
+        target_counts = membership.sum(axis=0)
+
+        socket_targets_count = {
+            socket: int(count)
+            for socket, count in zip(tick.sockets, target_counts, strict=True)
+            if count
+        }
+
+        sockets = []
+        for socket in sorted(socket_targets_count.keys() | rapl_energies.keys()):
+            if self._is_already_processed(tick, socket):
+                continue
+
+            is_valid = False
+            if not tick.has_global_report or socket not in rapl_energies:
+                self.metrics.drop_tick("missing_global_report")
+                logging.warning(
+                    "Failed to process tick %s of socket %s: missing global report",
+                    timestamp,
+                    socket,
+                )
+            elif rapl_energies[socket] is None:
+                self.metrics.drop_tick("missing_rapl_report")
+                logging.warning(
+                    "Failed to process tick %s of socket %s: missing rapl report",
+                    timestamp,
+                    socket,
+                )
+            elif socket not in socket_targets_count:
+                # Pre-processor can drop reports
+                self.metrics.drop_tick("no_target_report")
+                logging.warning("No available reports !")
+            else:
+                is_valid = True
+                sockets.append(socket)
+            self._record_processed(tick, socket, is_valid)
+
+        if not sockets:
+            return []
+
+        if self.debug:
+            logging.debug("processing tick %s", timestamp)
+            logging.debug("tick reports: %s", tick)
+
+        estimation = estimate_power(
+            [tick.key] * len(sockets),
+            [rapl_energies[socket] for socket in sockets],
+            [socket_targets_count[socket] for socket in sockets],
+        )
+
+        power_reports: list[PowerReport] = []
+        for socket, energy_in_watts, power_estimation in zip(
+            sockets,
+            estimation.socket_power.tolist(),
+            estimation.target_power.tolist(),
+            strict=True,
+        ):
+            rows = np.flatnonzero(membership[:, tick.sockets.index(socket)]).tolist()
+            target_names = [tick.target_names[row] for row in rows]
+            target_metadata = [tick.target_metadata[row] for row in rows]
+            if self.shared_power is not None:
+                power_reports.append(
+                    self.shared_power.encode(
+                        timestamp,
+                        self.state.sensor,
+                        socket,
+                        energy_in_watts,
+                        power_estimation,
+                        target_names,
+                        target_metadata,
+                        tick.global_metadata,
+                    )
+                )
+                continue
+
+            power_reports.extend(
+                self._gen_target_power_reports(
+                    timestamp,
+                    target_names,
+                    target_metadata,
+                    power_estimation,
+                    tick.global_metadata,
+                    socket,
+                )
+            )
+            power_reports.append(
+                self._gen_power_report(
+                    timestamp,
+                    "rapl",
+                    "naive",
+                    energy_in_watts,
+                    1.0,
+                    tick.global_metadata,
+                    socket,
+                )
+            )
+        return power_reports
+
+    def _gen_target_power_reports(
+        self,
+        timestamp: datetime,
+        target_names: list[str],
+        target_metadata: list[dict[str, Any]],
+        power: float,
+        global_metadata: dict[str, Any],
+        socket: str,
+    ) -> list[PowerReport]:
+        """
+        Generate the power reports of the targets of a socket, reduced by the target reducer if any.
+        :param timestamp: Timestamp of the measurements
+        :param target_names: Name of the targets
+        :param target_metadata: Metadata of the targets
+        :param power: Power estimation of each target
+        :param global_metadata: Metadata of the global report
+        :param socket: Socket of the measurements
+        :return: Power reports of the targets
+        """
+        if self.target_reducer is None:
+            return [
+                self._gen_power_report(
+                    timestamp, target_name, "naive", power, 1.0, metadata, socket
+                )
+                for target_name, metadata in zip(
+                    target_names, target_metadata, strict=True
+                )
+            ]
+
+        return [
+            self._gen_power_report(
+                timestamp, target_name, "naive", target_power, 1.0, metadata, socket
+            )
+            for target_name, target_power, metadata in self.target_reducer.reduce(
+                target_names, target_metadata, power, global_metadata
+            )
+        ]
+
     def _gen_power_report(
         self,
         timestamp: datetime,
@@ -114,6 +735,7 @@ class HWPCReportHandler(Handler):
         power: float,
         ratio: float,
         metadata: dict[str, Any],
+        socket: str,
     ) -> PowerReport:
         """
         Generate a power report using the given parameters.
@@ -121,12 +743,15 @@ class HWPCReportHandler(Handler):
         :param target: Target name
         :param formula: Formula identifier
         :param power: Power estimation
+        :param ratio: Ratio of the power estimation
+        :param metadata: Metadata of the measurements
+        :param socket: Socket of the measurements
         :return: Power report filled with the given parameters
         """
-        report_metadata = metadata | {
-            "scope": "cpu",
-            "socket": self.state.socket,
-            "formula": formula,
-            "ratio": ratio,
-        }
-        return PowerReport(timestamp, self.state.sensor, target, power, report_metadata)
+        return new_power_report(
+            timestamp,
+            self.state.sensor,
+            target,
+            power,
+            self.report_metadata.get(target, socket, formula, ratio, metadata),
+        )
@@ -0,0 +1,22 @@
+from powerapi.formula.handlers import FormulaPoisonPillMessageHandler
+
+from .hwpc_report import HWPCReportHandler
+
+
+class DrainingPoisonPillMessageHandler(FormulaPoisonPillMessageHandler):
+    """
+    Drain (when stopped gracefully) and checkpoint the buffered ticks of the formula before it terminates.
+    """
+
+    def __init__(self, state, report_handler: HWPCReportHandler):
+        """
+        :param state: State of the formula actor
+        :param report_handler: Handler of the HWPC reports, holding the buffered ticks
+        """
+        super().__init__(state)
+        self.report_handler = report_handler
+
+    def teardown(self, soft=False):
+        self.report_handler.stop(graceful=soft)
+        # Closing the sockets of the pushers waits for the delivery of the drained power reports.
+        super().teardown(soft)
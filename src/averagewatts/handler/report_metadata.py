@@ -0,0 +1,109 @@
+import datetime
+from typing import Any
+
+from powerapi.report import PowerReport
+
+# Number of processed ticks after which the entries not used since the previous eviction are evicted.
+DEFAULT_EVICTION_TICKS = 64
+
+
+class ReportMetadataCache:
+    """
+    Metadata of the power reports of each (target, socket) pair, built from the metadata of the target reports and the
+    formula fields, and reused by the following ticks as long as the metadata of the target does not change.
+    The entries are kept in two generations: the entries not used during a whole generation are evicted, for the cache
+    to forget the targets that stopped running.
+    """
+
+    def __init__(self, eviction_ticks: int = DEFAULT_EVICTION_TICKS):
+        """
+        :param eviction_ticks: Number of processed ticks of a generation
+        """
+        self.eviction_ticks = eviction_ticks
+        self._entries: dict[tuple[str, str], tuple] = {}
+        self._previous_entries: dict[tuple[str, str], tuple] = {}
+        self._ticks = 0
+
+    def __len__(self) -> int:
+        return len(self._entries.keys() | self._previous_entries.keys())
+
+    def get(
+        self,
+        target: str,
+        socket: str,
+        formula: str,
+        ratio: float,
+        metadata: dict[str, Any],
+    ) -> dict[str, Any]:
+        """
+        Return the metadata of the power reports of a target, shared by its reports: it must not be modified.
+        :param target: Name of the target
+        :param socket: Socket of the measurements
+        :param formula: Formula identifier
+        :param ratio: Ratio of the power estimation
+        :param metadata: Metadata of the target reports
+        :return: Metadata of the target reports along with the formula fields
+        """
+        key = (target, socket)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._previous_entries.get(key)
+            if entry is not None:
+                self._entries[key] = entry
+
+        # The tick store shares the metadata of a target between its reports as long as it does not change.
+        if (
+            entry is not None
+            and (entry[0] is metadata or entry[0] == metadata)
+            and entry[1] == formula
+            and entry[2] == ratio
+        ):
+            return entry[3]
+
+        report_metadata = metadata | {
+            "scope": "cpu",
+            "socket": socket,
+            "formula": formula,
+            "ratio": ratio,
+        }
+        self._entries[key] = (metadata, formula, ratio, report_metadata)
+        return report_metadata
+
+    def tick(self, count: int = 1) -> None:
+        """
+        Count processed ticks, starting a new generation every eviction_ticks ticks.
+        :param count: Number of processed ticks
+        """
+        self._ticks += count
+        if self._ticks >= self.eviction_ticks:
+            self._ticks = 0
+            self._previous_entries = self._entries
+            self._entries = {}
+
+
+def new_power_report(
+    timestamp: datetime.datetime,
+    sensor: str,
+    target: str,
+    power: float,
+    metadata: dict[str, Any],
+) -> PowerReport:
+    """
+    Create a power report referencing the given metadata, where PowerReport.__init__ copies it.
+    The attributes are set in the order of the constructor, for the reports to share the keys of their attributes.
+    :param timestamp: Timestamp of the measurements
+    :param sensor: Sensor name
+    :param target: Target name
+    :param power: Power estimation
+    :param metadata: Metadata of the report, shared with the other reports of the target
+    :return: The power report
+    """
+    report = PowerReport.__new__(PowerReport)
+    report.sender_name = None
+    report.timestamp = timestamp
+    report.sensor = sensor
+    report.target = target
+    report.metadata = metadata
+    report.dispatcher_report_id = None
+    report.power = power
+    return report
@@ -0,0 +1,15 @@
+from .estimation import (
+    RAPL_ENERGY_EXPONENT,
+    PowerEstimation,
+    estimate_power,
+    estimate_tick_power,
+    rapl_power,
+)
+
+__all__ = [
+    "RAPL_ENERGY_EXPONENT",
+    "PowerEstimation",
+    "estimate_power",
+    "estimate_tick_power",
+    "rapl_power",
+]
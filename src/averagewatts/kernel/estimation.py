@@ -0,0 +1,92 @@
+import math
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+# Exponent converting the RAPL package energy reported by the sensor (in 2^-32 J over a tick of one second) to Watts.
+RAPL_ENERGY_EXPONENT = -32
+
+
+class PowerEstimation:
+    """
+    Power estimation of a batch of ticks, each tick being the measurements of a (sensor, socket) pair at a timestamp.
+    The power of the ticks that cannot be estimated is NaN.
+    """
+
+    __slots__ = ("socket_power", "target_power", "targets", "timestamps", "valid")
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        socket_power: np.ndarray,
+        target_power: np.ndarray,
+        valid: np.ndarray,
+        targets: np.ndarray | None = None,
+    ):
+        """
+        :param timestamps: Timestamp of each tick
+        :param socket_power: Power of the socket of each tick (in W), reported as the rapl target
+        :param target_power: Power estimation of each target of each tick (in W)
+        :param valid: Whether each tick has been estimated
+        :param targets: Power estimation of each target row, None if the targets rows were not given
+        """
+        self.timestamps = timestamps
+        self.socket_power = socket_power
+        self.target_power = target_power
+        self.valid = valid
+        self.targets = targets
+
+    def __len__(self) -> int:
+        return len(self.socket_power)
+
+
+def rapl_power(energies: ArrayLike) -> np.ndarray:
+    """
+    Convert RAPL package energies, as reported by the sensor for a tick, to Watts.
+    :param energies: RAPL package energies (in 2^-32 J)
+    :return: Power of the sockets (in W)
+    """
+    return np.ldexp(np.asarray(energies, dtype=float), RAPL_ENERGY_EXPONENT)
+
+
+def estimate_tick_power(energy: float, target_count: int) -> tuple[float, float]:
+    """
+    Estimate the power of a single valid tick, as estimate_power does for a batch but without the cost of the arrays.
+    :param energy: RAPL package energy of the socket (in 2^-32 J)
+    :param target_count: Number of target reports of the tick, strictly positive
+    :return: Power of the socket and power estimation of each target (in W)
+    """
+    socket_power = math.ldexp(energy, RAPL_ENERGY_EXPONENT)
+    return socket_power, socket_power / target_count
+
+
+def estimate_power(
+    timestamps: ArrayLike,
+    energies: ArrayLike,
+    target_counts: ArrayLike,
+    target_ticks: ArrayLike | None = None,
+) -> PowerEstimation:
+    """
+    Estimate the power of a batch of ticks, with the semantics of the formula: the power of a socket is evenly split
+    between the targets reported on it during the tick. A tick without RAPL energy (NaN, such as when its global report
+    is missing) or without target is not estimated.
+    :param timestamps: Timestamp of each tick, returned as is
+    :param energies: RAPL package energy of the socket of each tick (in 2^-32 J), NaN when missing
+    :param target_counts: Number of target reports of each tick (see numpy.bincount to count the targets rows)
+    :param target_ticks: Index of the tick of each target row, to also get the power estimation of each row
+    :return: Power estimation of the ticks
+    """
+    energies = np.asarray(energies, dtype=float)
+    target_counts = np.asarray(target_counts)
+    valid = ~np.isnan(energies) & (target_counts > 0)
+
+    socket_power = np.where(valid, rapl_power(energies), np.nan)
+    target_power = socket_power / np.where(valid, target_counts, 1)
+
+    targets = None
+    if target_ticks is not None:
+        targets = target_power[np.asarray(target_ticks, dtype=np.intp)]
+
+    return PowerEstimation(
+        np.asarray(timestamps), socket_power, target_power, valid, targets
+    )
@@ -0,0 +1,18 @@
+from .registry import FormulaMetrics, Histogram
+from .server import (
+    DEFAULT_METRICS_ADDRESS,
+    DEFAULT_METRICS_PORT,
+    METRICS_QUEUE_SIZE,
+    MetricsServer,
+    render_metrics,
+)
+
+__all__ = [
+    "DEFAULT_METRICS_ADDRESS",
+    "DEFAULT_METRICS_PORT",
+    "METRICS_QUEUE_SIZE",
+    "FormulaMetrics",
+    "Histogram",
+    "MetricsServer",
+    "render_metrics",
+]
@@ -0,0 +1,151 @@
+import queue
+import time
+from bisect import bisect_left
+from typing import Any
+
+# Minimum delay (in seconds) between two snapshots published by a formula actor.
+DEFAULT_PUBLISH_INTERVAL = 1.0
+
+TICK_PROCESSING_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+)
+PUSH_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Histogram of observed values, counted in fixed buckets.
+    """
+
+    __slots__ = ("buckets", "count", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """
+        :param buckets: Upper bounds of the buckets, in increasing order
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Count the given value in its bucket.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return the state of the histogram as a picklable dictionary.
+        """
+        return {
+            "buckets": self.buckets,
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class FormulaMetrics:
+    """
+    Metrics of a formula actor.
+    The metrics live in the actor process, snapshots are periodically published to the given queue to be collected
+    by the main process.
+    """
+
+    def __init__(
+        self,
+        actor_name: str,
+        metrics_queue=None,
+        publish_interval: float = DEFAULT_PUBLISH_INTERVAL,
+    ):
+        """
+        :param actor_name: Name of the formula actor
+        :param metrics_queue: Multiprocessing queue where the snapshots are published, None to not publish them
+        :param publish_interval: Minimum delay (in seconds) between two published snapshots
+        """
+        self.actor_name = actor_name
+        self.metrics_queue = metrics_queue
+        self.publish_interval = publish_interval
+        self._next_publish = 0.0
+
+        self.reports_received = 0
+        self.duplicate_reports = 0
+        self.late_reports = 0
+        self.ticks_processed = 0
+        self.ticks_dropped: dict[str, int] = {}
+        self.power_reports_sent = 0
+        self.buffer_depth = 0
+        self.buffer_overflows = 0
+        self.ticks_shed = 0
+        self.reports_shed = 0
+        self.catch_up_batches = 0
+        self.catch_up_ticks = 0
+        self.tick_processing_seconds = Histogram(TICK_PROCESSING_BUCKETS)
+        self.push_latency_seconds = Histogram(PUSH_LATENCY_BUCKETS)
+
+    def drop_tick(self, reason: str) -> None:
+        """
+        Count a tick that could not be processed.
+        :param reason: Reason why the tick has been dropped
+        """
+        self.ticks_dropped[reason] = self.ticks_dropped.get(reason, 0) + 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return the current value of the metrics as a picklable dictionary.
+        """
+        return {
+            "reports_received": self.reports_received,
+            "duplicate_reports": self.duplicate_reports,
+            "late_reports": self.late_reports,
+            "ticks_processed": self.ticks_processed,
+            "ticks_dropped": dict(self.ticks_dropped),
+            "power_reports_sent": self.power_reports_sent,
+            "buffer_depth": self.buffer_depth,
+            "buffer_overflows": self.buffer_overflows,
+            "ticks_shed": self.ticks_shed,
+            "reports_shed": self.reports_shed,
+            "catch_up_batches": self.catch_up_batches,
+            "catch_up_ticks": self.catch_up_ticks,
+            "tick_processing_seconds": self.tick_processing_seconds.snapshot(),
+            "push_latency_seconds": self.push_latency_seconds.snapshot(),
+        }
+
+    def maybe_publish(self) -> None:
+        """
+        Publish a snapshot of the metrics if the publish interval has elapsed since the last one.
+        """
+        if self.metrics_queue is None:
+            return
+
+        now = time.monotonic()
+        if now < self._next_publish:
+            return
+
+        self._next_publish = now + self.publish_interval
+        self.publish()
+
+    def publish(self) -> None:
+        """
+        Publish a snapshot of the metrics, the snapshot is dropped if the queue is full.
+        """
+        if self.metrics_queue is None:
+            return
+
+        try:
+            self.metrics_queue.put_nowait((self.actor_name, self.snapshot()))
+        except queue.Full:
+            pass
@@ -0,0 +1,196 @@
+import logging
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+METRICS_PREFIX = "averagewatts"
+DEFAULT_METRICS_ADDRESS = "127.0.0.1"
+DEFAULT_METRICS_PORT = 0
+
+# Maximum number of snapshots waiting to be collected, snapshots are dropped by the actors when it is reached.
+METRICS_QUEUE_SIZE = 1024
+
+_COUNTERS = (
+    ("reports_received", "HWPC reports received by the formula"),
+    ("duplicate_reports", "HWPC reports received twice for the same target and tick"),
+    ("late_reports", "HWPC reports dropped because their tick was already processed"),
+    ("ticks_processed", "Ticks processed by the formula"),
+    ("power_reports_sent", "Power reports sent to the pushers"),
+    ("buffer_overflows", "HWPC reports received while the buffer limits were reached"),
+    ("ticks_shed", "Buffered ticks dropped to make room for new reports"),
+    ("reports_shed", "HWPC reports dropped because the buffer limits were reached"),
+    (
+        "catch_up_batches",
+        "Batches of ready ticks processed at once to catch up on a backlog",
+    ),
+    ("catch_up_ticks", "Ticks processed in catch-up batches"),
+)
+_HISTOGRAMS = (
+    ("tick_processing_seconds", "Processing time of a tick"),
+    (
+        "push_latency_seconds",
+        "Delay between the sensor timestamp of a tick and the push of its power reports",
+    ),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def render_metrics(snapshots: dict[str, dict[str, Any]]) -> str:
+    """
+    Render the snapshots of the formula actors in the Prometheus text exposition format.
+    :param snapshots: Last snapshot of each formula actor, by actor name
+    :return: Metrics in the Prometheus text format
+    """
+    lines = []
+    actors = sorted(snapshots.items())
+
+    for name, help_text in _COUNTERS:
+        metric = f"{METRICS_PREFIX}_{name}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for actor, snapshot in actors:
+            lines.append(f'{metric}{{actor="{_escape(actor)}"}} {snapshot[name]}')
+
+    metric = f"{METRICS_PREFIX}_ticks_dropped_total"
+    lines.append(f"# HELP {metric} Ticks that could not be processed, by reason")
+    lines.append(f"# TYPE {metric} counter")
+    for actor, snapshot in actors:
+        for reason, count in sorted(snapshot["ticks_dropped"].items()):
+            lines.append(
+                f'{metric}{{actor="{_escape(actor)}",reason="{reason}"}} {count}'
+            )
+
+    metric = f"{METRICS_PREFIX}_buffer_depth"
+    lines.append(f"# HELP {metric} Number of ticks buffered by the formula")
+    lines.append(f"# TYPE {metric} gauge")
+    for actor, snapshot in actors:
+        lines.append(f'{metric}{{actor="{_escape(actor)}"}} {snapshot["buffer_depth"]}')
+
+    for name, help_text in _HISTOGRAMS:
+        metric = f"{METRICS_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for actor, snapshot in actors:
+            histogram = snapshot[name]
+            labels = f'actor="{_escape(actor)}"'
+            cumulative = 0
+            for bound, count in zip(
+                histogram["buckets"], histogram["counts"], strict=False
+            ):
+                cumulative += count
+                lines.append(
+                    f'{metric}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}'
+                )
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram['sum']}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    HTTP server exposing the metrics of the formula actors in the Prometheus text format.
+    The snapshots published by the actor processes are collected from a multiprocessing queue by a background thread.
+    """
+
+    def __init__(
+        self, metrics_queue, port: int, address: str = DEFAULT_METRICS_ADDRESS
+    ):
+        """
+        :param metrics_queue: Multiprocessing queue where the formula actors publish their snapshots
+        :param port: Port of the HTTP server
+        :param address: Address the HTTP server listens on
+        """
+        self.metrics_queue = metrics_queue
+        self.port = port
+        self.address = address
+        self.snapshots: dict[str, dict[str, Any]] = {}
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._http_server = None
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        """
+        Start the HTTP server and the snapshots collector in background threads.
+        """
+        server = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = server.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug("metrics request: %s", format % args)
+
+        self._http_server = ThreadingHTTPServer(
+            (self.address, self.port), MetricsRequestHandler
+        )
+        self.port = self._http_server.server_address[1]
+        self._threads = [
+            threading.Thread(
+                target=self._http_server.serve_forever,
+                name="metrics-http",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._collect, name="metrics-collector", daemon=True
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logging.info(
+            "Metrics available at http://%s:%d/metrics", self.address, self.port
+        )
+
+    def stop(self) -> None:
+        """
+        Stop the HTTP server and the snapshots collector.
+        """
+        self._stopped.set()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+
+    def collect(self, actor_name: str, snapshot: dict[str, Any]) -> None:
+        """
+        Store the last snapshot of the given actor.
+        """
+        with self._lock:
+            self.snapshots[actor_name] = snapshot
+
+    def render(self) -> str:
+        """
+        Render the last snapshot of every actor in the Prometheus text format.
+        """
+        with self._lock:
+            return render_metrics(self.snapshots)
+
+    def _collect(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                actor_name, snapshot = self.metrics_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self.collect(actor_name, snapshot)
@@ -0,0 +1,23 @@
+from .profiler import (
+    DISPATCHER_STAGE,
+    ENGINE_STAGE,
+    FORMULA_STAGE,
+    PULLER_STAGE,
+    PUSHER_STAGE,
+    ActorProfiler,
+    profile_actor,
+    profile_path,
+)
+from .summary import summarize_profiles
+
+__all__ = [
+    "DISPATCHER_STAGE",
+    "ENGINE_STAGE",
+    "FORMULA_STAGE",
+    "PULLER_STAGE",
+    "PUSHER_STAGE",
+    "ActorProfiler",
+    "profile_actor",
+    "profile_path",
+    "summarize_profiles",
+]
@@ -0,0 +1,15 @@
+import argparse
+import sys
+
+from .summary import DEFAULT_TOP_ENTRIES, summarize_profiles
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="python -m averagewatts.profiling",
+        description="Summarize the profiles written by the actors of a formula run with --profile.",
+    )
+    parser.add_argument("directory", help="directory of the profiles")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_ENTRIES)
+    args = parser.parse_args()
+    print(summarize_profiles(args.directory, args.top))
+    sys.exit(0)
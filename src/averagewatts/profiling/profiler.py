@@ -0,0 +1,134 @@
+import cProfile
+import os
+import tracemalloc
+import urllib.parse
+
+# Stages of the pipeline, each actor being profiled with the stage it belongs to.
+PULLER_STAGE = "puller"
+DISPATCHER_STAGE = "dispatcher"
+FORMULA_STAGE = "formula"
+PUSHER_STAGE = "pusher"
+ENGINE_STAGE = "engine"
+
+# Suffix of the CPU profiles (in the pstats format) and of the memory profiles (tracemalloc snapshots).
+CPU_PROFILE_SUFFIX = ".prof"
+MEMORY_PROFILE_SUFFIX = ".tracemalloc"
+
+# Number of frames of the tracebacks of the allocations traced by tracemalloc.
+TRACEMALLOC_FRAMES = 5
+
+# Profiler of the current process, inherited by the processes forked from it.
+_active_profiler = None
+
+
+def profile_path(directory: str, stage: str, name: str, suffix: str) -> str:
+    """
+    Return the path of the profile of an actor.
+    :param directory: Directory of the profiles
+    :param stage: Stage of the actor, separated from its name by the first dash of the file name
+    :param name: Name of the actor
+    :param suffix: Suffix of the kind of profile
+    """
+    return os.path.join(
+        directory, f"{stage}-{urllib.parse.quote(name, safe='')}{suffix}"
+    )
+
+
+class ActorProfiler:
+    """
+    CPU profiler (and optionally memory profiler) of the process of an actor, writing its profiles when stopped.
+    """
+
+    def __init__(self, directory: str, stage: str, name: str, memory: bool = False):
+        """
+        :param directory: Directory where the profiles are written
+        :param stage: Stage of the profiled actor
+        :param name: Name of the profiled actor
+        :param memory: Also trace the memory allocations with tracemalloc
+        """
+        self.directory = directory
+        self.stage = stage
+        self.name = name
+        self.memory = memory
+        self._profile: cProfile.Profile | None = None
+
+    def start(self) -> None:
+        """
+        Start profiling the current process, discarding the profiler inherited from the parent process.
+        """
+        global _active_profiler
+        if _active_profiler is not None:
+            _active_profiler.discard()
+
+        if self.memory:
+            tracemalloc.stop()
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        _active_profiler = self
+
+    def discard(self) -> None:
+        """
+        Stop profiling without writing the profiles.
+        """
+        global _active_profiler
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = None
+        if self.memory:
+            tracemalloc.stop()
+        _active_profiler = None
+
+    def stop(self) -> None:
+        """
+        Stop profiling and write the profiles of the actor to the directory.
+        """
+        if self._profile is None:
+            return
+
+        self._profile.disable()
+        snapshot = None
+        if self.memory:
+            # Taken before dumping the CPU profile, so that the allocations of the dump are not part of it.
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, cProfile.__file__),
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                )
+            )
+        os.makedirs(self.directory, exist_ok=True)
+        self._profile.dump_stats(
+            profile_path(self.directory, self.stage, self.name, CPU_PROFILE_SUFFIX)
+        )
+        if snapshot is not None:
+            snapshot.dump(
+                profile_path(
+                    self.directory, self.stage, self.name, MEMORY_PROFILE_SUFFIX
+                )
+            )
+        self.discard()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+
+def profile_actor(actor, directory: str, stage: str, memory: bool = False) -> None:
+    """
+    Profile the process of an actor once started, its profiles being written when the actor stops (even on SIGTERM).
+    :param actor: Actor (a multiprocessing.Process) not yet started
+    :param directory: Directory where the profiles are written
+    :param stage: Stage of the actor
+    :param memory: Also trace the memory allocations with tracemalloc
+    """
+    run = actor.run
+
+    def profiled_run():
+        with ActorProfiler(directory, stage, actor.name, memory):
+            run()
+
+    actor.run = profiled_run
@@ -0,0 +1,117 @@
+import io
+import os
+import pstats
+import tracemalloc
+
+from .profiler import CPU_PROFILE_SUFFIX, MEMORY_PROFILE_SUFFIX
+
+# Number of functions (or allocation sites) listed for each stage.
+DEFAULT_TOP_ENTRIES = 10
+
+# Functions where the actors (or the asyncio engine) wait for their messages, as (file name, function name).
+_WAITING_FUNCTIONS = {
+    ("poll.py", "poll"),
+    ("~", "<method 'poll' of 'select.epoll' objects>"),
+    ("~", "<method 'select' of 'select.epoll' objects>"),
+}
+
+
+def _stage_files(directory: str, suffix: str) -> dict[str, list[str]]:
+    stages: dict[str, list[str]] = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(suffix) and "-" in filename:
+            stage = filename.split("-", 1)[0]
+            stages.setdefault(stage, []).append(os.path.join(directory, filename))
+    return stages
+
+
+def _function_label(function: tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def _is_waiting(function: tuple[str, int, str]) -> bool:
+    filename, _, name = function
+    return (os.path.basename(filename), name) in _WAITING_FUNCTIONS
+
+
+def _waiting_time(stats: pstats.Stats) -> float:
+    return sum(
+        entry[2] for function, entry in stats.stats.items() if _is_waiting(function)
+    )
+
+
+def _cpu_summary(
+    stage: str, stats: pstats.Stats, actors: int, total: float, top: int
+) -> list[str]:
+    waiting = _waiting_time(stats)
+    busy = stats.total_tt - waiting
+    share = busy / total if total else 0.0
+    lines = [
+        f"{stage}: {actors} actor(s), busy {busy:.3f}s ({share:.1%} of the busy time), waiting {waiting:.3f}s",
+        f"  {'own time':>10} {'cumulative':>10} {'calls':>10}  function",
+    ]
+    functions = sorted(
+        (item for item in stats.stats.items() if not _is_waiting(item[0])),
+        key=lambda item: item[1][2],
+        reverse=True,
+    )[:top]
+    for function, (_, calls, own_time, cumulative_time, _) in functions:
+        lines.append(
+            f"  {own_time:9.3f}s {cumulative_time:9.3f}s {calls:10d}  {_function_label(function)}"
+        )
+    return lines
+
+
+def _memory_summary(stage: str, files: list[str], top: int) -> list[str]:
+    sites: dict[str, list[int]] = {}
+    for filename in files:
+        snapshot = tracemalloc.Snapshot.load(filename)
+        for statistic in snapshot.statistics("lineno"):
+            frame = statistic.traceback[0]
+            site = sites.setdefault(
+                f"{os.path.basename(frame.filename)}:{frame.lineno}", [0, 0]
+            )
+            site[0] += statistic.size
+            site[1] += statistic.count
+
+    lines = [
+        f"{stage}: {sum(size for size, _ in sites.values()) / 1024:.1f} KiB retained by {len(files)} actor(s)",
+        f"  {'size':>12} {'blocks':>10}  allocation site",
+    ]
+    for site, (size, count) in sorted(
+        sites.items(), key=lambda item: item[1][0], reverse=True
+    )[:top]:
+        lines.append(f"  {size / 1024:10.1f}KiB {count:10d}  {site}")
+    return lines
+
+
+def summarize_profiles(directory: str, top: int = DEFAULT_TOP_ENTRIES) -> str:
+    """
+    Merge the profiles of the actors of each stage, and list where the time is spent and the memory retained.
+    :param directory: Directory of the profiles written by the actors
+    :param top: Number of functions (or allocation sites) listed for each stage
+    :return: Text summary of the profiles
+    """
+    cpu_stages = _stage_files(directory, CPU_PROFILE_SUFFIX)
+    memory_stages = _stage_files(directory, MEMORY_PROFILE_SUFFIX)
+    if not cpu_stages and not memory_stages:
+        return f"No profile found in {directory}"
+
+    cpu_stats = {
+        stage: pstats.Stats(*files, stream=io.StringIO())
+        for stage, files in cpu_stages.items()
+    }
+    total = sum(stats.total_tt - _waiting_time(stats) for stats in cpu_stats.values())
+    lines = ["CPU time by stage"]
+    for stage, stats in cpu_stats.items():
+        lines.extend(_cpu_summary(stage, stats, len(cpu_stages[stage]), total, top))
+
+    if memory_stages:
+        lines.append("")
+        lines.append("Memory retained at shutdown by stage")
+        for stage, files in memory_stages.items():
+            lines.extend(_memory_summary(stage, files, top))
+    return "\n".join(lines)
@@ -0,0 +1,150 @@
+from typing import Any
+
+from powerapi.dispatch_rule.hwpc_dispatch_rule import _extract_non_shared_group
+from powerapi.filter import Filter
+from powerapi.report import HWPCReport
+
+from averagewatts.tick.store import GLOBAL_TARGET, RAPL_EVENT, RAPL_GROUP
+
+
+class ReportProjection:
+    """
+    Fields of the HWPC reports read by the formula: the identity of the reports (timestamp, sensor, target and
+    metadata), the RAPL package energy of the global reports, and the sockets and cpus of the group the reports are
+    dispatched by. The other groups and events are dropped by the inputs, before being dispatched.
+    """
+
+    def __init__(
+        self, rapl_group: str = RAPL_GROUP, rapl_events: tuple[str, ...] = (RAPL_EVENT,)
+    ):
+        """
+        :param rapl_group: Name of the group of the RAPL events
+        :param rapl_events: RAPL events read from the global reports
+        """
+        self.rapl_group = rapl_group
+        self.rapl_events = rapl_events
+
+    def keeps_event(self, group: str, event: str) -> bool:
+        """
+        Return whether the given event of a group is read by the formula.
+        :param group: Name of the group
+        :param event: Name of the event
+        """
+        return group == self.rapl_group and event in self.rapl_events
+
+    def project(self, report: HWPCReport) -> HWPCReport:
+        """
+        Drop the groups and events of a report not read by the formula.
+        The group the report is dispatched by keeps its sockets and cpus, for the report to be dispatched to the same
+        sockets, and the groups are kept in their original order as it breaks the ties between them.
+        :param report: HWPC report, projected in place
+        :return: The projected report
+        """
+        try:
+            dispatch_group = _extract_non_shared_group(report)
+        except (AttributeError, IndexError):
+            # Reports without groups or with an empty group are left to the dispatch rule.
+            return report
+
+        groups = {}
+        for name, group in report.groups.items():
+            if name == self.rapl_group and report.target == GLOBAL_TARGET:
+                groups[name] = {
+                    socket: {
+                        cpu: {
+                            event: value
+                            for event, value in events.items()
+                            if event in self.rapl_events
+                        }
+                        for cpu, events in cpus.items()
+                    }
+                    for socket, cpus in group.items()
+                }
+            elif group is dispatch_group:
+                groups[name] = {
+                    socket: {cpu: {} for cpu in cpus} for socket, cpus in group.items()
+                }
+
+        report.groups = groups
+        return report
+
+    def mongodb_projection(self) -> dict[str, Any]:
+        """
+        Return the projection of the HWPC documents of a MongoDB collection (requires MongoDB 4.4 or newer).
+        The groups keep their sockets and cpus, only the RAPL events of the global reports are kept.
+        """
+
+        def map_object(value: str, variable: str, expression: Any) -> dict[str, Any]:
+            return {
+                "$arrayToObject": {
+                    "$map": {
+                        "input": {"$objectToArray": value},
+                        "as": variable,
+                        "in": {"k": f"$${variable}.k", "v": expression},
+                    }
+                }
+            }
+
+        rapl_events = {
+            "$arrayToObject": {
+                "$filter": {
+                    "input": {"$objectToArray": "$$cpu.v"},
+                    "as": "event",
+                    "cond": {"$in": ["$$event.k", list(self.rapl_events)]},
+                }
+            }
+        }
+        events = {
+            "$cond": [
+                {
+                    "$and": [
+                        {"$eq": ["$$group.k", self.rapl_group]},
+                        {"$eq": ["$target", GLOBAL_TARGET]},
+                    ]
+                },
+                rapl_events,
+                {"$literal": {}},
+            ]
+        }
+        groups = map_object(
+            "$groups",
+            "group",
+            map_object("$$group.v", "socket", map_object("$$socket.v", "cpu", events)),
+        )
+        return {
+            "timestamp": 1,
+            "sensor": 1,
+            "target": 1,
+            "metadata": 1,
+            # Malformed documents are left to the report parser.
+            "groups": {
+                "$cond": [{"$eq": [{"$type": "$groups"}, "object"]}, groups, "$groups"]
+            },
+        }
+
+
+# Projection of the reports read by the AverageWatts formula.
+FORMULA_PROJECTION = ReportProjection()
+
+
+class ProjectionFilter(Filter):
+    """
+    Filter of the pullers projecting the HWPC reports before routing them, for the dispatchers and the formulas to
+    only receive the fields they read.
+    """
+
+    def __init__(self, projection: ReportProjection = FORMULA_PROJECTION):
+        """
+        :param projection: Projection of the reports
+        """
+        super().__init__()
+        self.projection = projection
+
+    def route(self, report):
+        """
+        Project the report in place and get the list of dispatchers to whom send it.
+        :param report: Report read by the puller
+        """
+        if isinstance(report, HWPCReport):
+            self.projection.project(report)
+        return super().route(report)
@@ -0,0 +1,9 @@
+from .actor import AverageWattsPusherActor
+from .batch import PowerReportBatch
+from .handlers import PowerReportBatchHandler
+
+__all__ = [
+    "AverageWattsPusherActor",
+    "PowerReportBatch",
+    "PowerReportBatchHandler",
+]
@@ -0,0 +1,23 @@
+from powerapi.pusher import PusherActor
+
+from averagewatts.backends import disconnect_database
+
+from .batch import PowerReportBatch
+from .handlers import PowerReportBatchHandler
+
+
+class AverageWattsPusherActor(PusherActor):
+    """
+    Pusher actor that also accepts the batches of power reports sent by the formula actors.
+    """
+
+    def setup(self):
+        super().setup()
+        self.add_handler(
+            PowerReportBatch,
+            PowerReportBatchHandler(self.state, self.delay, self.max_size),
+        )
+
+    def _kill_process(self):
+        disconnect_database(self.state.database)
+        super()._kill_process()
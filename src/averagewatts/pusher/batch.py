@@ -0,0 +1,22 @@
+from powerapi.message import Message
+from powerapi.report import PowerReport
+
+
+class PowerReportBatch(Message):
+    """
+    Message carrying every power report generated for a tick.
+    """
+
+    def __init__(self, sender_name: str, reports: list[PowerReport]):
+        """
+        :param sender_name: Name of the formula actor that generated the reports
+        :param reports: Power reports of the tick
+        """
+        Message.__init__(self, sender_name)
+        self.reports = reports
+
+    def __str__(self):
+        return f"PowerReportBatch({self.sender_name}, {len(self.reports)} reports)"
+
+    def __len__(self):
+        return len(self.reports)
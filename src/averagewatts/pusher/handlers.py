@@ -0,0 +1,21 @@
+from powerapi.pusher.handlers import ReportHandler
+
+from .batch import PowerReportBatch
+
+
+class PowerReportBatchHandler(ReportHandler):
+    """
+    Put the reports of the received batch in the pusher buffer, the buffer is written in bulk using the same rules as
+    the single report handler.
+    """
+
+    def handle(self, msg: PowerReportBatch):
+        """
+        Save the reports of the batch in the database.
+        :param msg: Batch of power reports to save
+        """
+        if not msg.reports:
+            return
+
+        self.state.buffer.extend(msg.reports[:-1])
+        super().handle(msg.reports[-1])
@@ -0,0 +1,20 @@
+from .engine import ReplayEngine
+from .generator import generate_replay_databases, generate_replay_sources
+from .source import (
+    DEFAULT_CHUNK_SIZE,
+    CsvReplaySource,
+    MongoReplaySource,
+    ReportRows,
+    reports_to_rows,
+)
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "CsvReplaySource",
+    "MongoReplaySource",
+    "ReplayEngine",
+    "ReportRows",
+    "generate_replay_databases",
+    "generate_replay_sources",
+    "reports_to_rows",
+]
@@ -0,0 +1,286 @@
+import datetime
+import logging
+import time
+from collections.abc import Iterable
+
+import numpy as np
+from powerapi.database import BaseDB
+from powerapi.report import PowerReport
+
+from averagewatts.backends import disconnect_database
+from averagewatts.checkpoint import ProcessedRangeIndex
+from averagewatts.kernel import estimate_power
+from averagewatts.replay.source import ReportRows
+from averagewatts.shared import SharedPowerEncoder
+from averagewatts.tick.store import GLOBAL_TARGET
+
+
+def _boundaries(*columns: np.ndarray) -> np.ndarray:
+    """
+    Return a boolean mask flagging the rows where any of the given (sorted) columns changes value.
+    """
+    changes = np.zeros(len(columns[0]), dtype=bool)
+    if len(changes):
+        changes[0] = True
+    for column in columns:
+        changes[1:] |= column[1:] != column[:-1]
+    return changes
+
+
+class ReplayEngine:
+    """
+    Offline estimation engine processing HWPC reports by large chunks, without the actor framework.
+    The reports are grouped by (timestamp, sensor, socket) and the power of each socket is split between the targets
+    dispatched to it, the same way the formula actors do.
+    """
+
+    def __init__(
+        self,
+        databases: Iterable[BaseDB],
+        processed_ranges: ProcessedRangeIndex | None = None,
+        shared_power: SharedPowerEncoder | None = None,
+    ):
+        """
+        :param databases: Output databases of the power reports
+        :param processed_ranges: Ranges of the ticks already processed, that are skipped, None to not skip any tick
+        :param shared_power: Encoder of a single shared power report per tick, None to generate the power reports of
+        the targets
+        """
+        self.databases = list(databases)
+        self.processed_ranges = processed_ranges
+        self.shared_power = shared_power
+        self.power_reports = 0
+        self.skipped_ticks = 0
+
+    def run(self, source: Iterable[ReportRows]) -> None:
+        """
+        Replay the reports of the given source and save the power reports in the output databases.
+        :param source: Chunks of report rows, in timestamp order
+        """
+        for database in self.databases:
+            database.connect()
+
+        begin = time.perf_counter()
+        pending = None
+        for chunk in source:
+            rows = (
+                chunk if pending is None else ReportRows.concatenate([pending, chunk])
+            )
+            if not len(rows):
+                continue
+
+            # The newest tick of the chunk can continue in the next chunk, it is kept for later.
+            newest_key = rows.keys.max()
+            complete = rows.keys < newest_key
+            pending = rows.take(~complete)
+            self._save(self.estimate(rows.take(complete)))
+
+        if pending is not None:
+            self._save(self.estimate(pending))
+        for database in self.databases:
+            disconnect_database(database)
+
+        elapsed = time.perf_counter() - begin
+        logging.info(
+            "Replay done: %d power reports generated in %.3fs, %d ticks skipped",
+            self.power_reports,
+            elapsed,
+            self.skipped_ticks,
+        )
+
+    def _save(self, power_reports: list[PowerReport]) -> None:
+        if power_reports:
+            self.power_reports += len(power_reports)
+            for database in self.databases:
+                database.save_many(power_reports)
+
+        # The ticks are only recorded as processed once their power reports are saved
+        if self.processed_ranges is not None:
+            self.processed_ranges.save()
+
+    def estimate(self, rows: ReportRows) -> list[PowerReport]:
+        """
+        Compute the power reports of the ticks of the given rows.
+        Every tick of the rows is expected to be complete.
+        :param rows: Report rows of complete ticks
+        :return: Power reports of the ticks, ordered by timestamp
+        """
+        if not len(rows):
+            return []
+
+        # Integer codes of the string columns, targets codes keep the global target apart
+        sensor_names, sensor_codes = np.unique(rows.sensors, return_inverse=True)
+        socket_names, socket_codes = np.unique(rows.sockets, return_inverse=True)
+        target_names, target_codes = np.unique(rows.targets, return_inverse=True)
+        is_global = rows.targets == GLOBAL_TARGET
+
+        # Stable sort, the rows of a (tick, socket, target) keep their reading order
+        order = np.lexsort((target_codes, socket_codes, sensor_codes, rows.keys))
+        keys = rows.keys[order]
+        sensor_codes = sensor_codes[order]
+        socket_codes = socket_codes[order]
+        target_codes = target_codes[order]
+        is_global = is_global[order]
+        energies = rows.energies[order]
+
+        # A group is a (timestamp, sensor, socket) tick, a pair a target within a group
+        group_starts = _boundaries(keys, sensor_codes, socket_codes)
+        groups = np.cumsum(group_starts) - 1
+        group_count = int(groups[-1]) + 1
+        pair_starts = group_starts | _boundaries(target_codes)
+        pair_first = np.flatnonzero(pair_starts)
+        pair_last = np.append(pair_first[1:] - 1, len(keys) - 1)
+        pair_groups = groups[pair_first]
+        pair_is_global = is_global[pair_first]
+
+        # RAPL energy of the first cpu of each socket in the global report
+        has_global = np.zeros(group_count, dtype=bool)
+        has_global[groups[is_global]] = True
+        with_energy = np.flatnonzero(is_global & ~np.isnan(energies))
+        group_energies = np.full(group_count, np.nan)
+        energy_groups, first_energy = np.unique(groups[with_energy], return_index=True)
+        group_energies[energy_groups] = energies[with_energy[first_energy]]
+
+        target_pairs = ~pair_is_global
+        target_counts = np.bincount(pair_groups[target_pairs], minlength=group_count)
+
+        # The ticks already processed by a previous run are skipped, the other ones recorded if they are processed
+        already_processed = np.zeros(group_count, dtype=bool)
+        if self.processed_ranges is not None:
+            group_first = np.flatnonzero(group_starts)
+            is_processable = (
+                has_global & ~np.isnan(group_energies) & (target_counts > 0)
+            )
+            for group, (sensor, socket, key, is_processed) in enumerate(
+                zip(
+                    sensor_names[sensor_codes[group_first]].tolist(),
+                    socket_names[socket_codes[group_first]].tolist(),
+                    keys[group_first].tolist(),
+                    is_processable.tolist(),
+                    strict=True,
+                )
+            ):
+                if self.processed_ranges.is_processed(sensor, socket, key):
+                    already_processed[group] = True
+                elif is_processed:
+                    self.processed_ranges.add(sensor, socket, key)
+                else:
+                    self.processed_ranges.interrupt(sensor, socket)
+            if already_processed.any():
+                logging.info(
+                    "Skipped %d ticks: already processed",
+                    int(np.count_nonzero(already_processed)),
+                )
+
+        missing_global = ~already_processed & ~has_global
+        missing_rapl = ~already_processed & has_global & np.isnan(group_energies)
+        no_targets = (
+            ~already_processed & has_global & ~missing_rapl & (target_counts == 0)
+        )
+        for mask, reason in (
+            (missing_global, "missing global report"),
+            (missing_rapl, "missing rapl report"),
+            (no_targets, "no target report"),
+        ):
+            if mask.any():
+                logging.warning(
+                    "Skipped %d ticks: %s", int(np.count_nonzero(mask)), reason
+                )
+        valid = ~already_processed & has_global & ~missing_rapl & ~no_targets
+        self.skipped_ticks += group_count - int(np.count_nonzero(valid))
+
+        # The groups without global report have no RAPL energy, they are not estimated either
+        estimation = estimate_power(keys[group_starts], group_energies, target_counts)
+        powers = estimation.socket_power
+        estimations = estimation.target_power
+
+        # Generate the reports of the valid groups: the targets followed by the rapl power
+        group_first = np.flatnonzero(group_starts)
+        metadata = rows.metadata
+        if metadata is not None:
+            metadata = [metadata[position] for position in order.tolist()]
+
+        keys = keys.tolist()
+        sensor_codes = sensor_codes.tolist()
+        socket_codes = socket_codes.tolist()
+        powers = powers.tolist()
+        estimations = estimations.tolist()
+        pair_group_bounds = np.searchsorted(
+            pair_groups, np.arange(group_count + 1)
+        ).tolist()
+        pair_targets = target_names[target_codes[pair_first]].tolist()
+        pair_is_global = pair_is_global.tolist()
+        pair_last = pair_last.tolist()
+        group_first = group_first.tolist()
+
+        power_reports = []
+        timestamps = {}
+        for group in np.flatnonzero(valid).tolist():
+            first_row = group_first[group]
+            key = keys[first_row]
+            timestamp = timestamps.get(key)
+            if timestamp is None:
+                timestamp = timestamps[key] = datetime.datetime.fromtimestamp(
+                    key / 1000
+                )
+            sensor = sensor_names[sensor_codes[first_row]]
+            socket = socket_names[socket_codes[first_row]]
+            report_metadata = {
+                "scope": "cpu",
+                "socket": socket,
+                "formula": "naive",
+                "ratio": 1.0,
+            }
+
+            global_metadata = {}
+            target_names = []
+            target_metadata = []
+            for pair in range(pair_group_bounds[group], pair_group_bounds[group + 1]):
+                # The last report received for a target replaces the previous ones
+                row_metadata = (
+                    metadata[pair_last[pair]] if metadata is not None else None
+                ) or {}
+                if pair_is_global[pair]:
+                    global_metadata = row_metadata
+                    continue
+
+                target_names.append(pair_targets[pair])
+                target_metadata.append(row_metadata)
+
+            if self.shared_power is not None:
+                power_reports.append(
+                    self.shared_power.encode(
+                        timestamp,
+                        sensor,
+                        socket,
+                        powers[group],
+                        estimations[group],
+                        target_names,
+                        target_metadata,
+                        global_metadata,
+                    )
+                )
+                continue
+
+            power_reports.extend(
+                PowerReport(
+                    timestamp,
+                    sensor,
+                    target_name,
+                    estimations[group],
+                    row_metadata | report_metadata,
+                )
+                for target_name, row_metadata in zip(
+                    target_names, target_metadata, strict=True
+                )
+            )
+            power_reports.append(
+                PowerReport(
+                    timestamp,
+                    sensor,
+                    "rapl",
+                    powers[group],
+                    global_metadata | report_metadata,
+                )
+            )
+        return power_reports
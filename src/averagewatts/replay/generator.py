@@ -0,0 +1,63 @@
+from collections.abc import Iterable
+
+from powerapi.database import BaseDB
+from powerapi.exception import PowerAPIException
+from powerapi.report import HWPCReport
+
+from averagewatts.backends import create_database, get_report_class
+from averagewatts.projection import FORMULA_PROJECTION
+from averagewatts.replay.source import (
+    CsvReplaySource,
+    MongoReplaySource,
+    ReportRows,
+)
+
+
+def generate_replay_sources(
+    config: dict, chunk_size: int
+) -> list[Iterable[ReportRows]]:
+    """
+    Generate the replay sources of the inputs of the given configuration.
+    :param config: CLI configuration
+    :param chunk_size: Number of rows (or documents) read at once
+    :return: Replay source of each input
+    """
+    sources = []
+    for name, input_config in config.get("input", {}).items():
+        input_type = input_config.get("type")
+        if input_type == "csv":
+            sources.append(CsvReplaySource(input_config["files"], chunk_size))
+        elif input_type == "mongodb":
+            database = create_database(input_config | {"model": HWPCReport})
+            sources.append(
+                MongoReplaySource(
+                    database, chunk_size, FORMULA_PROJECTION.mongodb_projection()
+                )
+            )
+        else:
+            raise PowerAPIException(
+                f"Configuration error: input {name} of type {input_type} cannot be replayed"
+            )
+
+    if not sources:
+        raise PowerAPIException("Configuration error: no input specified")
+    return sources
+
+
+def generate_replay_databases(config: dict) -> list[BaseDB]:
+    """
+    Generate the output databases of the given configuration, importing only the backends they use.
+    :param config: CLI configuration
+    :return: Output database of each output
+    """
+    databases = []
+    for output_config in config.get("output", {}).values():
+        output_config = dict(output_config)
+        output_config["model"] = get_report_class(
+            output_config.get("model", "PowerReport")
+        )
+        databases.append(create_database(output_config))
+
+    if not databases:
+        raise PowerAPIException("Configuration error: no output specified")
+    return databases
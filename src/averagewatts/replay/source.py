@@ -0,0 +1,314 @@
+import csv
+import logging
+from collections.abc import Iterator
+from typing import Any
+
+import numpy as np
+from powerapi.report import HWPCReport, Report
+
+from averagewatts.tick.store import (
+    GLOBAL_TARGET,
+    RAPL_EVENT,
+    RAPL_GROUP,
+    TickStore,
+    timestamp_to_key,
+)
+
+# Number of rows (or documents) read at once from a replay source.
+DEFAULT_CHUNK_SIZE = 100000
+
+
+class ReportRows:
+    """
+    Columnar projection of HWPC reports, with one row per (report, socket) pair.
+    Only the columns used by the formula are kept: the RAPL package energy is set on the rows of the global reports
+    that carry it and is NaN everywhere else.
+    """
+
+    __slots__ = ("energies", "keys", "metadata", "sensors", "sockets", "targets")
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        sensors: np.ndarray,
+        targets: np.ndarray,
+        sockets: np.ndarray,
+        energies: np.ndarray,
+        metadata: list[dict[str, Any] | None] | None = None,
+    ):
+        """
+        :param keys: Timestamp of the rows in milliseconds
+        :param sensors: Sensor name of the rows
+        :param targets: Target name of the rows
+        :param sockets: Socket of the rows
+        :param energies: RAPL package energy of the rows, NaN when the row does not carry it
+        :param metadata: Metadata of the report of each row, None if the reports do not have metadata
+        """
+        self.keys = keys
+        self.sensors = sensors
+        self.targets = targets
+        self.sockets = sockets
+        self.energies = energies
+        self.metadata = metadata
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def take(self, indices: np.ndarray) -> "ReportRows":
+        """
+        Return the rows at the given indices (or boolean mask).
+        """
+        metadata = None
+        if self.metadata is not None:
+            positions = np.arange(len(self))[indices]
+            metadata = [self.metadata[position] for position in positions.tolist()]
+
+        return ReportRows(
+            self.keys[indices],
+            self.sensors[indices],
+            self.targets[indices],
+            self.sockets[indices],
+            self.energies[indices],
+            metadata,
+        )
+
+    @staticmethod
+    def concatenate(rows: list["ReportRows"]) -> "ReportRows":
+        """
+        Concatenate the given rows, keeping their order.
+        """
+        metadata = None
+        if any(part.metadata is not None for part in rows):
+            metadata = []
+            for part in rows:
+                metadata.extend(part.metadata or [None] * len(part))
+
+        return ReportRows(
+            np.concatenate([part.keys for part in rows]),
+            np.concatenate([part.sensors for part in rows]),
+            np.concatenate([part.targets for part in rows]),
+            np.concatenate([part.sockets for part in rows]),
+            np.concatenate([part.energies for part in rows]),
+            metadata,
+        )
+
+
+def _parse_keys(timestamps: list[str]) -> np.ndarray:
+    """
+    Convert the timestamps read from a CSV file to milliseconds, as done by the PowerAPI CSV reader.
+    """
+    try:
+        return np.array(timestamps, dtype=np.int64)
+    except ValueError:
+        return np.array(
+            [timestamp_to_key(Report._extract_timestamp(ts)) for ts in timestamps],
+            dtype=np.int64,
+        )
+
+
+class CsvFileReader:
+    """
+    Chunked reader of a HWPC CSV file (one row per cpu, as written by the HWPC sensor).
+    """
+
+    def __init__(self, filename: str, chunk_size: int):
+        """
+        :param filename: Path of the CSV file
+        :param chunk_size: Number of rows read at once
+        """
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.exhausted = False
+
+        self._file = open(filename, newline="")
+        self._reader = csv.reader(self._file)
+        header = next(self._reader, None)
+        if header is None:
+            self.exhausted = True
+            return
+
+        self._timestamp = header.index("timestamp")
+        self._sensor = header.index("sensor")
+        self._target = header.index("target")
+        self._socket = header.index("socket")
+        self._energy = header.index(RAPL_EVENT) if RAPL_EVENT in header else None
+
+    def read(self) -> ReportRows | None:
+        """
+        Read the next chunk of rows.
+        :return: The rows read, None when the end of the file has been reached
+        """
+        if self.exhausted:
+            return None
+
+        lines = []
+        for line in self._reader:
+            lines.append(line)
+            if len(lines) == self.chunk_size:
+                break
+        else:
+            self.exhausted = True
+            self._file.close()
+
+        if not lines:
+            return None
+
+        targets = np.array([line[self._target] for line in lines], dtype=object)
+        energies = np.full(len(lines), np.nan)
+        if self._energy is not None:
+            is_global = targets == GLOBAL_TARGET
+            energies[is_global] = [
+                float(line[self._energy])
+                for line, global_row in zip(lines, is_global.tolist(), strict=True)
+                if global_row
+            ]
+
+        return ReportRows(
+            _parse_keys([line[self._timestamp] for line in lines]),
+            np.array([line[self._sensor] for line in lines], dtype=object),
+            targets,
+            np.array([line[self._socket] for line in lines], dtype=object),
+            energies,
+        )
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self._file.close()
+
+
+class CsvReplaySource:
+    """
+    Replay source reading HWPC CSV files (such as rapl.csv, msr.csv and core.csv) in large chunks.
+    The files are expected to be sorted by timestamp, as written by the sensor. Their rows are merged so that the
+    chunks are yielded in timestamp order: once a chunk has been yielded, no later row is older than its rows.
+    """
+
+    def __init__(self, files: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        :param files: Path of the CSV files
+        :param chunk_size: Number of rows read at once from each file
+        """
+        self.files = files
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[ReportRows]:
+        readers = [CsvFileReader(filename, self.chunk_size) for filename in self.files]
+        pending: list[ReportRows | None] = [None] * len(readers)
+
+        try:
+            while True:
+                for i, reader in enumerate(readers):
+                    if not reader.exhausted and (
+                        pending[i] is None or not len(pending[i])
+                    ):
+                        pending[i] = reader.read()
+
+                buffered = [rows for rows in pending if rows is not None and len(rows)]
+                active = [i for i, reader in enumerate(readers) if not reader.exhausted]
+                if not active:
+                    if buffered:
+                        yield ReportRows.concatenate(buffered)
+                    return
+
+                # The rows older than the newest row read from each non exhausted file are complete.
+                bound = min(int(pending[i].keys.max()) for i in active)
+                chunk = []
+                for i, rows in enumerate(pending):
+                    if rows is not None and len(rows):
+                        older = rows.keys < bound
+                        chunk.append(rows.take(older))
+                        pending[i] = rows.take(~older)
+
+                chunk = [rows for rows in chunk if len(rows)]
+                if chunk:
+                    yield ReportRows.concatenate(chunk)
+                    continue
+
+                # Every buffered row has the bound timestamp, read further in the files that stopped at it.
+                for i in active:
+                    if int(pending[i].keys.max()) == bound:
+                        more = readers[i].read()
+                        if more is not None:
+                            pending[i] = ReportRows.concatenate([pending[i], more])
+        finally:
+            for reader in readers:
+                reader.close()
+
+
+def project_report(report: HWPCReport) -> list[tuple]:
+    """
+    Project a HWPC report to the rows used by the replay engine, one for each socket it is dispatched to.
+    :param report: HWPC report to project
+    :return: The (key, sensor, target, socket, energy, metadata) rows of the report
+    """
+    key = timestamp_to_key(report.timestamp)
+    rapl_group = report.groups.get(RAPL_GROUP, {})
+    rows = []
+    for socket in TickStore._report_sockets(report):
+        energy = np.nan
+        if report.target == GLOBAL_TARGET:
+            try:
+                energy = next(iter(rapl_group[socket].values()))[RAPL_EVENT]
+            except (KeyError, StopIteration):
+                pass
+        rows.append(
+            (key, report.sensor, report.target, socket, energy, report.metadata)
+        )
+    return rows
+
+
+def reports_to_rows(reports: list[HWPCReport]) -> ReportRows:
+    """
+    Convert a list of HWPC reports to their columnar projection.
+    """
+    rows = [row for report in reports for row in project_report(report)]
+    return ReportRows(
+        np.array([row[0] for row in rows], dtype=np.int64),
+        np.array([row[1] for row in rows], dtype=object),
+        np.array([row[2] for row in rows], dtype=object),
+        np.array([row[3] for row in rows], dtype=object),
+        np.array([row[4] for row in rows], dtype=float),
+        [row[5] for row in rows],
+    )
+
+
+class MongoReplaySource:
+    """
+    Replay source reading the HWPC reports of a MongoDB collection in timestamp order, by large batches.
+    """
+
+    def __init__(
+        self,
+        database,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        projection: dict[str, Any] | None = None,
+    ):
+        """
+        :param database: PowerAPI MongoDB database of the HWPC reports
+        :param chunk_size: Number of documents read at once
+        :param projection: Projection of the documents (see ReportProjection.mongodb_projection), None to read them whole
+        """
+        self.database = database
+        self.chunk_size = chunk_size
+        self.projection = projection
+
+    def __iter__(self) -> Iterator[ReportRows]:
+        self.database.connect()
+        cursor = (
+            self.database.collection.find({}, self.projection, allow_disk_use=True)
+            .sort("timestamp", 1)
+            .batch_size(self.chunk_size)
+        )
+
+        reports = []
+        for document in cursor:
+            reports.append(HWPCReport.from_mongodb(document))
+            if len(reports) == self.chunk_size:
+                yield reports_to_rows(reports)
+                reports = []
+
+        if reports:
+            yield reports_to_rows(reports)
+        logging.debug("MongoDB collection %s replayed", self.database.collection_name)
@@ -0,0 +1,3 @@
+from .window import PowerRollup, RollupWindow, parse_windows
+
+__all__ = ["PowerRollup", "RollupWindow", "parse_windows"]
@@ -0,0 +1,166 @@
+import datetime
+
+from powerapi.report import PowerReport
+
+# Number of milliseconds of each unit of the windows durations.
+DURATION_UNITS = {"ms": 1, "s": 1000, "m": 60000, "h": 3600000}
+
+
+def parse_windows(value: str) -> tuple[int, ...]:
+    """
+    Parse a comma-separated list of windows durations, such as "10s,1m".
+    A duration is a strictly positive integer followed by a unit (ms, s, m or h), seconds being used by default.
+    :param value: Windows durations
+    :return: Duration of each window, in milliseconds
+    :raise ValueError: When a duration is invalid
+    """
+    durations = []
+    for duration in filter(None, (item.strip() for item in value.split(","))):
+        number = duration.rstrip("smh")
+        unit = duration[len(number) :] or "s"
+        if unit not in DURATION_UNITS or not number.isdigit() or int(number) == 0:
+            raise ValueError(f"invalid window duration: {duration}")
+        durations.append(int(number) * DURATION_UNITS[unit])
+    return tuple(durations)
+
+
+class RollupWindow:
+    """
+    Tumbling window aggregating the power estimations of each (target, socket) pair.
+    The windows are aligned on the epoch, and the aggregates are updated incrementally: only the running sum, maximum,
+    number of samples and energy of each pair are kept in memory.
+    The energy of a power estimation lasts until the next tick, or for the gap between the two previous ticks when the
+    window is flushed before the next tick is known.
+    """
+
+    def __init__(self, duration: int):
+        """
+        :param duration: Duration of the window, in milliseconds
+        """
+        self.duration = duration
+        self.start: int | None = None
+        self.aggregates: dict[tuple[str, str], list] = {}
+        self.last_key: int | None = None
+        self.period: int | None = None
+        # (aggregate, power) of the reports of the last tick, whose energy is known once the next tick is
+        self._pending: list[tuple[list, float]] = []
+
+    def add(self, key: int, power_reports: list[PowerReport]) -> list[PowerReport]:
+        """
+        Aggregate the power reports of a tick, the ticks being added in timestamp order.
+        :param key: Timestamp of the tick, in milliseconds
+        :param power_reports: Power reports of the tick
+        :return: Rolled-up reports of the previous window if the tick belongs to a new one, an empty list otherwise
+        """
+        if self.last_key is not None and key > self.last_key:
+            self.period = key - self.last_key
+            self._add_pending_energy(self.period)
+        self.last_key = key
+
+        start = key - key % self.duration
+        rolled_up_reports = []
+        if self.start is not None and start != self.start:
+            rolled_up_reports = self.flush()
+        self.start = start
+
+        for report in power_reports:
+            pair = (report.target, report.metadata["socket"])
+            aggregate = self.aggregates.get(pair)
+            if aggregate is None:
+                aggregate = self.aggregates[pair] = [
+                    report.power,
+                    report.power,
+                    1,
+                    report,
+                    0.0,
+                ]
+            else:
+                aggregate[0] += report.power
+                aggregate[1] = max(aggregate[1], report.power)
+                aggregate[2] += 1
+                aggregate[3] = report
+            self._pending.append((aggregate, report.power))
+
+        return rolled_up_reports
+
+    def _add_pending_energy(self, gap: int) -> None:
+        """
+        Add the energy of the reports of the last tick to their aggregates.
+        :param gap: Duration of the power estimations of the last tick, in milliseconds
+        """
+        for aggregate, power in self._pending:
+            aggregate[4] += power * gap / 1000
+        self._pending = []
+
+    def flush(self) -> list[PowerReport]:
+        """
+        Generate the rolled-up reports of the current window and reset it.
+        The power of a rolled-up report is the mean of the power estimations of its window, its metadata giving the
+        maximum power estimation, the sum of the estimations of the ticks (in W), the energy of the window (in J) and
+        the number of samples.
+        :return: Rolled-up reports of the current window
+        """
+        if self.start is None:
+            return []
+
+        # The next tick is not known yet, the estimations of the last tick last as long as the previous gap
+        self._add_pending_energy(self.period or 0)
+
+        timestamp = datetime.datetime.fromtimestamp(self.start / 1000)
+        window = self.duration / 1000
+        rolled_up_reports = [
+            PowerReport(
+                timestamp,
+                last_report.sensor,
+                last_report.target,
+                power_sum / samples,
+                last_report.metadata
+                | {
+                    "window": window,
+                    "samples": samples,
+                    "power_max": power_max,
+                    "power_sum": power_sum,
+                    "energy": energy,
+                },
+            )
+            for power_sum, power_max, samples, last_report, energy in (
+                self.aggregates.values()
+            )
+        ]
+        self.start = None
+        self.aggregates = {}
+        return rolled_up_reports
+
+
+class PowerRollup:
+    """
+    Rollup stage of the power reports of a formula actor, aggregating them over one or several windows.
+    """
+
+    def __init__(self, durations: tuple[int, ...]):
+        """
+        :param durations: Duration of each window, in milliseconds
+        """
+        self.windows = [RollupWindow(duration) for duration in durations]
+
+    def add(self, key: int, power_reports: list[PowerReport]) -> list[PowerReport]:
+        """
+        Aggregate the power reports of a tick in every window.
+        :param key: Timestamp of the tick, in milliseconds
+        :param power_reports: Power reports of the tick
+        :return: Rolled-up reports of the windows closed by the tick
+        """
+        rolled_up_reports = []
+        for window in self.windows:
+            rolled_up_reports.extend(window.add(key, power_reports))
+        return rolled_up_reports
+
+    def flush(self) -> list[PowerReport]:
+        """
+        Generate the rolled-up reports of the current (possibly incomplete) window of every window.
+        :return: Rolled-up reports of the current windows
+        """
+        rolled_up_reports = []
+        for window in self.windows:
+            rolled_up_reports.extend(window.flush())
+        return rolled_up_reports
@@ -0,0 +1,15 @@
+from .encoding import (
+    SharedPowerEncoder,
+    SharedPowerExpander,
+    SharedPowerFormatError,
+    TargetDictionary,
+)
+from .report import SharedPowerReport
+
+__all__ = [
+    "SharedPowerEncoder",
+    "SharedPowerExpander",
+    "SharedPowerFormatError",
+    "SharedPowerReport",
+    "TargetDictionary",
+]
@@ -0,0 +1,187 @@
+import datetime
+from typing import Any
+
+from powerapi.report import PowerReport
+
+from .report import SharedPowerReport
+
+
+class SharedPowerFormatError(Exception):
+    """
+    Exception raised when a shared power report refers to targets missing from the dictionary of its stream.
+    """
+
+
+class TargetDictionary:
+    """
+    Dictionary of the targets of a (sensor, socket) stream, giving an id to each target name along with the metadata of
+    its reports. The ids of the targets of a tick, and the entries added or changed, are only encoded when they changed
+    since the previous tick of the stream.
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._metadata: list[dict[str, Any]] = []
+        self._names: list[str] = []
+        self._names_metadata: list[dict[str, Any]] = []
+        self._targets: tuple[int, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def encode(
+        self, target_names: list[str], target_metadata: list[dict[str, Any]]
+    ) -> tuple[tuple[int, ...] | None, dict[int, tuple[str, dict[str, Any]]] | None]:
+        """
+        Encode the targets of a tick.
+        :param target_names: Name of the targets of the tick
+        :param target_metadata: Metadata of the reports of the targets
+        :return: Ids of the targets, None if they did not change, and the entries added to (or changed in) the
+        dictionary, None if there is none
+        """
+        # The tick store shares the metadata of a target between its reports as long as it does not change.
+        if target_names == self._names and all(
+            metadata is previous
+            for metadata, previous in zip(
+                target_metadata, self._names_metadata, strict=True
+            )
+        ):
+            return None, None
+
+        updates = {}
+        targets = []
+        for name, metadata in zip(target_names, target_metadata, strict=True):
+            target_id = self._ids.get(name)
+            if target_id is None:
+                target_id = self._ids[name] = len(self._metadata)
+                self._metadata.append(metadata)
+                updates[target_id] = (name, metadata)
+            elif metadata != self._metadata[target_id]:
+                self._metadata[target_id] = metadata
+                updates[target_id] = (name, metadata)
+            targets.append(target_id)
+
+        self._names = list(target_names)
+        self._names_metadata = list(target_metadata)
+        if tuple(targets) == self._targets:
+            return None, updates or None
+        self._targets = tuple(targets)
+        return self._targets, updates or None
+
+
+class SharedPowerEncoder:
+    """
+    Encoder of the shared power reports, keeping the target dictionary of each (sensor, socket) stream.
+    """
+
+    def __init__(self):
+        self._dictionaries: dict[tuple[str, str], TargetDictionary] = {}
+
+    def encode(
+        self,
+        timestamp: datetime.datetime,
+        sensor: str,
+        socket: str,
+        power: float,
+        target_power: float,
+        target_names: list[str],
+        target_metadata: list[dict[str, Any]],
+        metadata: dict[str, Any],
+    ) -> SharedPowerReport:
+        """
+        Generate the shared power report of a tick.
+        :param timestamp: Timestamp of the measurements
+        :param sensor: Sensor name
+        :param socket: Socket of the measurements
+        :param power: Power of the socket
+        :param target_power: Power estimation of each target
+        :param target_names: Name of the targets of the tick
+        :param target_metadata: Metadata of the reports of the targets
+        :param metadata: Metadata of the global report of the tick
+        :return: Shared power report of the tick
+        """
+        dictionary = self._dictionaries.get((sensor, socket))
+        if dictionary is None:
+            dictionary = self._dictionaries[(sensor, socket)] = TargetDictionary()
+
+        targets, updates = dictionary.encode(target_names, target_metadata)
+        return SharedPowerReport(
+            timestamp,
+            sensor,
+            socket,
+            power,
+            target_power,
+            targets,
+            updates,
+            metadata,
+        )
+
+
+class SharedPowerExpander:
+    """
+    Expander of the shared power reports into the power reports of the targets and of the socket, as generated when the
+    reports are not shared. The reports of each (sensor, socket) stream must be expanded in order, from the first one
+    written by the formula.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[str, str], dict[int, tuple[str, dict]]] = {}
+        self._targets: dict[tuple[str, str], tuple[int, ...]] = {}
+
+    def expand(self, report: SharedPowerReport) -> list[PowerReport]:
+        """
+        Expand a shared power report.
+        :param report: Shared power report of a tick
+        :return: Power reports of the targets of the tick, followed by the rapl power report of the socket
+        :raise SharedPowerFormatError: When a target of the tick is missing from the dictionary of the stream
+        """
+        stream = (report.sensor, report.socket)
+        entries = self._entries.setdefault(stream, {})
+        if report.dictionary:
+            entries.update(report.dictionary)
+        if report.targets is not None:
+            self._targets[stream] = report.targets
+
+        fields = {
+            "scope": "cpu",
+            "socket": report.socket,
+            "formula": "naive",
+            "ratio": 1.0,
+        }
+        power_reports = []
+        for target_id in self._targets.get(stream, ()):
+            entry = entries.get(target_id)
+            if entry is None:
+                raise SharedPowerFormatError(
+                    f"target {target_id} of sensor {report.sensor} socket {report.socket} is not in its dictionary"
+                )
+            power_reports.append(
+                PowerReport(
+                    report.timestamp,
+                    report.sensor,
+                    entry[0],
+                    report.target_power,
+                    entry[1] | fields,
+                )
+            )
+
+        power_reports.append(
+            PowerReport(
+                report.timestamp,
+                report.sensor,
+                report.target,
+                report.power,
+                report.metadata | fields,
+            )
+        )
+        return power_reports
+
+    def expand_many(self, reports: list[SharedPowerReport]) -> list[PowerReport]:
+        """
+        Expand shared power reports, in the order they were generated.
+        :param reports: Shared power reports
+        :return: Power reports of the targets and of the sockets
+        """
+        return [
+            power_report for report in reports for power_report in self.expand(report)
+        ]
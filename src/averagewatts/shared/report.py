@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import datetime
+import json
+from typing import Any
+
+from powerapi.report import Report
+from powerapi.report.report import CSV_HEADER_COMMON, BadInputData, CsvLines
+
+CSV_HEADER_SHARED = [
+    *CSV_HEADER_COMMON,
+    "power",
+    "socket",
+    "target_power",
+    "targets",
+    "dictionary",
+]
+
+# Target of the shared power reports, whose power is the one of the socket as for the rapl power reports.
+SHARED_POWER_TARGET = "rapl"
+
+
+def _dictionary_to_json(
+    dictionary: dict[int, tuple[str, dict[str, Any]]] | None,
+) -> dict | None:
+    if dictionary is None:
+        return None
+    return {
+        str(target_id): {"target": target, "metadata": metadata}
+        for target_id, (target, metadata) in dictionary.items()
+    }
+
+
+class SharedPowerReport(Report):
+    """
+    Power estimation of a (sensor, socket) tick, every target of the tick sharing the same power estimation.
+    The targets are ids in the target dictionary of the (sensor, socket) stream: the ids of the tick are only given when
+    they differ from the previous tick of the stream, and the dictionary entries when they are added or changed.
+    """
+
+    def __init__(
+        self,
+        timestamp: datetime.datetime,
+        sensor: str,
+        socket: str,
+        power: float,
+        target_power: float,
+        targets: tuple[int, ...] | None = None,
+        dictionary: dict[int, tuple[str, dict[str, Any]]] | None = None,
+        metadata: dict[str, Any] | None = None,
+    ):
+        """
+        :param timestamp: Timestamp of the measurements
+        :param sensor: Sensor name
+        :param socket: Socket of the measurements
+        :param power: Power of the socket
+        :param target_power: Power estimation of each target of the tick
+        :param targets: Ids of the targets of the tick, None if they are the ones of the previous tick of the stream
+        :param dictionary: Name and metadata of the targets added to (or changed in) the dictionary, by id
+        :param metadata: Metadata of the global report of the tick
+        """
+        Report.__init__(self, timestamp, sensor, SHARED_POWER_TARGET, metadata or {})
+        self.socket = socket
+        self.power = power
+        self.target_power = target_power
+        self.targets = targets
+        self.dictionary = dictionary
+
+    def __repr__(self) -> str:
+        return f"SharedPowerReport({self.timestamp}, {self.sensor}, {self.socket}, {self.power}, {self.target_power}, {self.targets}, {self.dictionary}, {self.metadata})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SharedPowerReport):
+            return False
+
+        return (
+            super().__eq__(other)
+            and self.socket == other.socket
+            and self.power == other.power
+            and self.target_power == other.target_power
+            and self.targets == other.targets
+            and self.dictionary == other.dictionary
+        )
+
+    @staticmethod
+    def from_json(data: dict) -> SharedPowerReport:
+        """
+        Generate a report using the given data.
+        :param data: Dictionary containing the report attributes
+        :return: The shared power report initialized with the given data
+        """
+        try:
+            targets = data.get("targets")
+            dictionary = data.get("dictionary")
+            return SharedPowerReport(
+                Report._extract_timestamp(data["timestamp"]),
+                data["sensor"],
+                data["socket"],
+                data["power"],
+                data["target_power"],
+                None if targets is None else tuple(targets),
+                None
+                if dictionary is None
+                else {
+                    int(target_id): (entry["target"], entry["metadata"])
+                    for target_id, entry in dictionary.items()
+                },
+                data.get("metadata", {}),
+            )
+        except KeyError as exn:
+            raise BadInputData(
+                f"SharedPowerReport require field {exn.args[0]} in json document", data
+            ) from exn
+        except ValueError as exn:
+            raise BadInputData(exn.args[0], data) from exn
+
+    @staticmethod
+    def to_json(report: SharedPowerReport) -> dict:
+        """
+        :return: A dictionary, that can be converted into json format, from a given shared power report
+        """
+        return {
+            "timestamp": report.timestamp,
+            "sensor": report.sensor,
+            "target": report.target,
+            "socket": report.socket,
+            "power": report.power,
+            "target_power": report.target_power,
+            "targets": None if report.targets is None else list(report.targets),
+            "dictionary": _dictionary_to_json(report.dictionary),
+            "metadata": report.metadata,
+        }
+
+    @staticmethod
+    def from_csv_lines(lines: CsvLines) -> SharedPowerReport:
+        """
+        :param lines: List of pre-parsed lines, a line being a tuple of the name of the file where it was read and of a
+        dictionary of its values by column name
+        :return: The shared power report of the given line
+        """
+        if len(lines) != 1:
+            raise BadInputData(
+                "a shared power report could only be parsed from one csv line", None
+            )
+        file_name, row = lines[0]
+
+        try:
+            data = {
+                "timestamp": int(row["timestamp"]),
+                "sensor": row["sensor"],
+                "socket": row["socket"],
+                "power": float(row["power"]),
+                "target_power": float(row["target_power"]),
+                "targets": [int(target_id) for target_id in row["targets"].split(";")]
+                if row["targets"]
+                else None,
+                "dictionary": json.loads(row["dictionary"])
+                if row["dictionary"]
+                else None,
+                "metadata": {
+                    key: value
+                    for key, value in row.items()
+                    if key not in CSV_HEADER_SHARED
+                },
+            }
+        except KeyError as exn:
+            raise BadInputData(
+                f"missing field {exn.args[0]} in csv file {file_name}", row
+            ) from exn
+        except ValueError as exn:
+            raise BadInputData(exn.args[0], row) from exn
+        return SharedPowerReport.from_json(data)
+
+    @staticmethod
+    def to_csv_lines(report: SharedPowerReport, tags: list[str]) -> CsvLines:
+        """
+        Convert a shared power report into csv lines, the targets ids being separated by semicolons and the dictionary
+        entries being a JSON object, both empty when they did not change.
+        :param report: Report that will be converted into csv lines
+        :param tags: Metadata added as columns in csv file
+        :return: Header and lines of the report
+        """
+        line = dict(report.metadata)
+        for tag in tags:
+            if tag not in report.metadata:
+                raise BadInputData(f"no tag {tag} in shared power report", report)
+
+        line |= {
+            "sensor": report.sensor,
+            "target": report.target,
+            "timestamp": int(datetime.datetime.timestamp(report.timestamp) * 1000),
+            "power": report.power,
+            "socket": report.socket,
+            "target_power": report.target_power,
+            "targets": ""
+            if report.targets is None
+            else ";".join(map(str, report.targets)),
+            "dictionary": ""
+            if report.dictionary is None
+            else json.dumps(_dictionary_to_json(report.dictionary)),
+        }
+        return CSV_HEADER_SHARED, {"SharedPowerReport": [line]}
+
+    @staticmethod
+    def to_mongodb(report: SharedPowerReport) -> dict:
+        """
+        :return: A dictionary, that can be stored into a mongodb, from a given shared power report
+        """
+        return SharedPowerReport.to_json(report)
+
+    @staticmethod
+    def from_mongodb(data: dict) -> SharedPowerReport:
+        """
+        :return: A shared power report from a dictionary pulled from mongodb
+        """
+        return SharedPowerReport.from_json(data)
+
+    @staticmethod
+    def create_empty_report():
+        """
+        Creates an empty report
+        """
+        return SharedPowerReport(None, None, None, 0, 0)
@@ -0,0 +1,57 @@
+import logging
+import time
+from contextlib import contextmanager
+
+# Time at which the averagewatts package started to be imported.
+IMPORT_START_TIME = time.perf_counter()
+
+
+class StartupProfile:
+    """
+    Duration of the startup phases of the formula, from the import of the package to the launch of the last actor.
+    """
+
+    def __init__(self, enabled: bool = True, start_time: float = IMPORT_START_TIME):
+        """
+        :param enabled: Log the profile when reporting it
+        :param start_time: Time (from time.perf_counter) at which the startup began
+        """
+        self.enabled = enabled
+        self.start_time = start_time
+        self.phases: list[tuple[str, float]] = []
+
+    def record(self, name: str, begin: float) -> None:
+        """
+        Record a phase that began at the given time and ends now.
+        :param name: Name of the phase
+        :param begin: Time (from time.perf_counter) at which the phase began
+        """
+        self.phases.append((name, time.perf_counter() - begin))
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Record the duration of the enclosed block as a phase.
+        :param name: Name of the phase
+        """
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, begin)
+
+    def report(self) -> None:
+        """
+        Log the duration of every recorded phase and the total startup time.
+        """
+        if not self.enabled:
+            return
+
+        total = time.perf_counter() - self.start_time
+        width = max((len(name) for name, _ in self.phases), default=0)
+        lines = [
+            f"  {name:<{width}} {duration * 1000:10.1f} ms"
+            for name, duration in self.phases
+        ]
+        lines.append(f"  {'total':<{width}} {total * 1000:10.1f} ms")
+        logging.info("Startup profile:\n%s", "\n".join(lines))
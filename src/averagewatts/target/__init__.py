@@ -0,0 +1,4 @@
+from .grouping import TargetGrouper, parse_group_rules
+from .reducer import OTHER_TARGET, TargetReducer
+
+__all__ = ["OTHER_TARGET", "TargetGrouper", "TargetReducer", "parse_group_rules"]
@@ -0,0 +1,115 @@
+import re
+from typing import Any
+
+# Separator of the rules of a grouping table.
+RULES_SEPARATOR = ";"
+
+# Separator of the pattern and the replacement of a rule.
+REPLACEMENT_SEPARATOR = "->"
+
+# Cgroup directory of a Kubernetes pod, for the cgroupfs (/kubepods/burstable/pod<uid>/<container>) and the systemd
+# (/kubepods.slice/kubepods-burstable.slice/kubepods-burstable-pod<uid>.slice/cri-containerd-<id>.scope) drivers.
+KUBERNETES_POD_PATTERN = (
+    r"^(/kubepods[^/]*(?:/[^/]+)*?/[^/]*pod[0-9a-fA-F_-]+(?:\.slice)?)/"
+)
+
+# Maximum number of targets whose group is cached, the cache is cleared when it is full.
+DEFAULT_CACHE_SIZE = 65536
+
+
+def parse_group_rules(value: str) -> list[tuple[str, str | None]]:
+    """
+    Parse a grouping table, made of rules separated by semicolons.
+    A rule is either a preset (pod or namespace), a regular expression, or a regular expression and its replacement
+    separated by "->" (such as "^/system.slice/(.*)\\.service$->services").
+    :param value: Grouping table
+    :return: (pattern, replacement) pair of each rule, the replacement being None when not given
+    :raise ValueError: When a regular expression is invalid
+    """
+    rules = []
+    for rule in filter(None, (item.strip() for item in value.split(RULES_SEPARATOR))):
+        pattern, separator, replacement = rule.partition(REPLACEMENT_SEPARATOR)
+        if pattern not in TargetGrouper.PRESETS:
+            try:
+                re.compile(pattern)
+            except re.error as exn:
+                raise ValueError(
+                    f"invalid target group pattern {pattern}: {exn}"
+                ) from exn
+        rules.append((pattern, replacement if separator else None))
+    return rules
+
+
+class TargetGrouper:
+    """
+    Map the targets to their group, using the first matching rule of a grouping table.
+    A target matching a regular expression is renamed to its replacement, or to the first group (the whole match if
+    none) of the expression. The pod and namespace presets use the metadata added by the Kubernetes pre-processor,
+    the pod preset falling back to the pod cgroup directory. A target matching no rule is not grouped.
+    """
+
+    PRESETS = ("pod", "namespace")
+
+    def __init__(
+        self, rules: list[tuple[str, str | None]], cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        """
+        :param rules: (pattern, replacement) pair of each rule, as returned by parse_group_rules
+        :param cache_size: Maximum number of targets whose group is cached
+        """
+        self.presets = [pattern for pattern, _ in rules if pattern in self.PRESETS]
+        # (preset, expression, replacement) of each rule in table order, the pod preset falling back to the pod cgroup
+        # directory and the namespace preset having no expression.
+        self.rules = [
+            (
+                pattern if pattern in self.PRESETS else None,
+                None
+                if pattern == "namespace"
+                else re.compile(
+                    KUBERNETES_POD_PATTERN if pattern == "pod" else pattern
+                ),
+                None if pattern in self.PRESETS else replacement,
+            )
+            for pattern, replacement in rules
+        ]
+
+        self.cache_size = cache_size
+        self.cache: dict[str, str | None] = {}
+
+    def group(self, target: str, metadata: dict[str, Any]) -> str | None:
+        """
+        Return the group of the given target.
+        :param target: Name of the target
+        :param metadata: Metadata of the target report
+        :return: Name of the group of the target, None if it matches no rule
+        """
+        # The group of a target with Kubernetes metadata can depend on it, it is not cached.
+        k8s = metadata.get("k8s") if self.presets else None
+        if k8s is not None:
+            return self._match(target, k8s)
+
+        if target in self.cache:
+            return self.cache[target]
+
+        group = self._match(target, {})
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[target] = group
+        return group
+
+    def _match(self, target: str, k8s: dict[str, Any]) -> str | None:
+        for preset, pattern, replacement in self.rules:
+            if preset == "pod" and "namespace" in k8s and "pod_name" in k8s:
+                return f"{k8s['namespace']}/{k8s['pod_name']}"
+            if preset == "namespace" and "namespace" in k8s:
+                return k8s["namespace"]
+            if pattern is None:
+                continue
+
+            match = pattern.search(target)
+            if match is None:
+                continue
+            if replacement is not None:
+                return match.expand(replacement)
+            return match.group(1) if pattern.groups else match.group(0)
+        return None
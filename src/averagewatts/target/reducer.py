@@ -0,0 +1,76 @@
+from typing import Any
+
+from .grouping import TargetGrouper
+
+# Name of the target of the report folding the targets outside the top-K.
+OTHER_TARGET = "other"
+
+
+class TargetReducer:
+    """
+    Bound the number of targets of the power reports of a socket, by grouping them and by folding the targets outside
+    the top-K (by power) into a single "other" target.
+    The reports of the grouped (or folded) targets have the metadata of the tick global report, along with the number
+    of targets they aggregate, whatever this number is: the metadata of a group does not change from a tick to another.
+    """
+
+    def __init__(self, grouper: TargetGrouper | None = None, top_k: int = 0):
+        """
+        :param grouper: Grouper of the targets, None to not group them
+        :param top_k: Maximum number of targets (the other ones being folded), 0 to not fold them
+        """
+        self.grouper = grouper
+        self.top_k = top_k
+
+    def reduce(
+        self,
+        targets: list[str],
+        targets_metadata: list[dict[str, Any]],
+        power: float,
+        global_metadata: dict[str, Any],
+    ) -> list[tuple[str, float, dict[str, Any]]]:
+        """
+        Reduce the targets of a socket, whose power estimation is the same for every target.
+        :param targets: Name of the targets
+        :param targets_metadata: Metadata of the reports of the targets
+        :param power: Power estimation of each target
+        :param global_metadata: Metadata of the tick global report
+        :return: (target, power, metadata) tuple of each reduced target
+        """
+        # Count of the targets of each group, and metadata of the target if it matches no group rule (None otherwise)
+        groups: dict[str, list] = {}
+        for target, metadata in zip(targets, targets_metadata, strict=True):
+            group = self.grouper.group(target, metadata) if self.grouper else None
+            members = groups.get(target if group is None else group)
+            if members is None:
+                groups[target if group is None else group] = [
+                    1,
+                    metadata if group is None else None,
+                ]
+            else:
+                members[0] += 1
+                members[1] = None
+
+        reduced = [
+            (
+                group,
+                power * count,
+                global_metadata | {"grouped_targets": count}
+                if metadata is None
+                else metadata,
+            )
+            for group, (count, metadata) in groups.items()
+        ]
+        if not self.top_k or len(reduced) <= self.top_k:
+            return reduced
+
+        # The largest groups first, ties being broken by name for the output to be deterministic
+        reduced.sort(key=lambda estimation: (-estimation[1], estimation[0]))
+        folded = reduced[self.top_k :]
+        count = sum(groups[group][0] for group, _, _ in folded)
+        other = (
+            OTHER_TARGET,
+            sum(estimation[1] for estimation in folded),
+            global_metadata | {"grouped_targets": count},
+        )
+        return [*reduced[: self.top_k], other]
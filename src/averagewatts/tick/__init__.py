@@ -0,0 +1,19 @@
+from .overflow import (
+    BLOCK_POLICY,
+    DROP_NEWEST_POLICY,
+    DROP_OLDEST_POLICY,
+    OVERFLOW_POLICIES,
+    PROCESS_OLDEST_POLICY,
+)
+from .store import Tick, TickStore, TickStoreFullError
+
+__all__ = [
+    "BLOCK_POLICY",
+    "DROP_NEWEST_POLICY",
+    "DROP_OLDEST_POLICY",
+    "OVERFLOW_POLICIES",
+    "PROCESS_OLDEST_POLICY",
+    "Tick",
+    "TickStore",
+    "TickStoreFullError",
+]
@@ -0,0 +1,10 @@
+# Policies applied when a new report would exceed the buffer limits of a formula: process the oldest tick early, even
+# if it is still missing reports (its partial power reports are emitted), drop the oldest tick, or drop the new report.
+PROCESS_OLDEST_POLICY = "process-oldest"
+DROP_OLDEST_POLICY = "drop-oldest"
+DROP_NEWEST_POLICY = "drop-newest"
+OVERFLOW_POLICIES = (PROCESS_OLDEST_POLICY, DROP_OLDEST_POLICY, DROP_NEWEST_POLICY)
+
+# Blocking the upstream actors is not supported: the oldest tick is only ready once newer reports advance the sensor
+# time past its allowed lateness, blocking them until the buffer has room would never make room.
+BLOCK_POLICY = "block"
@@ -0,0 +1,469 @@
+import datetime
+from array import array
+from typing import Any
+
+from powerapi.dispatch_rule.hwpc_dispatch_rule import _extract_non_shared_group
+from powerapi.exception import PowerAPIException
+from powerapi.report import HWPCReport
+
+GLOBAL_TARGET = "all"
+RAPL_GROUP = "rapl"
+RAPL_EVENT = "RAPL_ENERGY_PKG"
+
+
+class TickStoreFullError(PowerAPIException):
+    """
+    Exception raised when a report opens a new tick while every slot of the store is in use.
+    """
+
+
+def timestamp_to_key(timestamp: datetime.datetime) -> int:
+    """
+    Convert a report timestamp to the integer milliseconds key used to index the ticks.
+    :param timestamp: Timestamp of the report
+    :return: Number of milliseconds since the epoch
+    """
+    return round(timestamp.timestamp() * 1000)
+
+
+class Tick:
+    """
+    Reports of a tick projected down to the fields used by the formula.
+    """
+
+    __slots__ = (
+        "global_metadata",
+        "key",
+        "rapl_energies",
+        "rapl_energy",
+        "sockets",
+        "target_metadata",
+        "target_names",
+        "target_sockets",
+        "timestamp",
+    )
+
+    def __init__(
+        self,
+        key: int,
+        timestamp: datetime.datetime,
+        rapl_energy: int | None,
+        global_metadata: dict[str, Any] | None,
+        target_names: list[str],
+        target_metadata: list[dict[str, Any]],
+        rapl_energies: dict[str, int | None] | None = None,
+        target_sockets: array | None = None,
+        sockets: list[str] | None = None,
+    ):
+        """
+        :param key: Timestamp of the tick in milliseconds
+        :param timestamp: Timestamp of the tick
+        :param rapl_energy: RAPL package energy of the monitored socket
+        :param global_metadata: Metadata of the global report, None if it has not been received
+        :param target_names: Name of the targets
+        :param target_metadata: Metadata of the targets
+        :param rapl_energies: RAPL package energy of each socket of the global report (all sockets mode only)
+        :param target_sockets: Bitmask of the sockets used by each target (all sockets mode only)
+        :param sockets: Name of the sockets indexed by their bit in the masks (all sockets mode only)
+        """
+        self.key = key
+        self.timestamp = timestamp
+        self.rapl_energy = rapl_energy
+        self.global_metadata = global_metadata
+        self.target_names = target_names
+        self.target_metadata = target_metadata
+        self.rapl_energies = rapl_energies
+        self.target_sockets = target_sockets
+        self.sockets = sockets
+
+    @property
+    def has_global_report(self) -> bool:
+        """
+        Return True if the global report of the tick has been received.
+        """
+        return self.global_metadata is not None
+
+    def __len__(self) -> int:
+        return len(self.target_names)
+
+    def __repr__(self) -> str:
+        return f"Tick({self.timestamp}, rapl={self.rapl_energy}, targets={len(self)})"
+
+
+class _TickSlot:
+    """
+    Preallocated storage of a tick, reused once the tick has been popped.
+    """
+
+    __slots__ = (
+        "global_metadata",
+        "key",
+        "positions",
+        "rapl_energies",
+        "rapl_energy",
+        "target_ids",
+        "target_metadata",
+        "target_sockets",
+        "timestamp",
+    )
+
+    def __init__(self):
+        self.key = 0
+        self.timestamp = None
+        self.rapl_energy = None
+        self.rapl_energies = None
+        self.global_metadata = None
+        self.target_ids = array("I")
+        self.target_metadata = []
+        self.target_sockets = array("Q")
+        self.positions = {}
+
+    def reset(self, key: int, timestamp: datetime.datetime):
+        """
+        Prepare the slot to store the reports of a new tick.
+        :param key: Key of the tick
+        :param timestamp: Timestamp of the tick
+        """
+        self.key = key
+        self.timestamp = timestamp
+        self.rapl_energy = None
+        self.rapl_energies = None
+        self.global_metadata = None
+        del self.target_ids[:]
+        self.target_metadata.clear()
+        del self.target_sockets[:]
+        self.positions.clear()
+
+
+class TickStore:
+    """
+    Fixed capacity ring of ticks keyed by their timestamp in milliseconds and kept sorted by timestamp.
+    Incoming HWPC reports are projected to the target name, its metadata and, for the global report, the RAPL package
+    energy of the monitored socket. The counters groups of the reports are never kept.
+
+    When no socket is given, the store keeps the RAPL package energy of every socket and the sockets used by each
+    target, following the socket dispatch rule of PowerAPI.
+    """
+
+    def __init__(self, socket: str | None, capacity: int):
+        """
+        :param socket: Socket whose RAPL energy is extracted from the global reports, None for all the sockets
+        :param capacity: Maximum number of ticks stored at the same time
+        """
+        self.socket = str(socket) if socket is not None else None
+        self.capacity = capacity
+
+        self._slots = [_TickSlot() for _ in range(capacity)]
+        self._head = 0
+        self._size = 0
+        self._index: dict[int, _TickSlot] = {}
+        self._reports = 0
+
+        # Interned target names, an id is released when no stored tick reference it anymore.
+        self._target_ids: dict[str, int] = {}
+        self._target_names: list[str | None] = []
+        self._target_refs = array("I")
+        self._free_ids: list[int] = []
+        self._last_metadata: list[dict[str, Any] | None] = []
+
+        # Sockets indexed by their bit in the targets sockets masks.
+        self.sockets: list[str] = []
+        self._socket_bits: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._index
+
+    @property
+    def report_count(self) -> int:
+        """
+        Number of reports (global and target ones, without the duplicates) of the stored ticks.
+        """
+        return self._reports
+
+    def is_full(self) -> bool:
+        """
+        Return True if every slot of the store is in use.
+        """
+        return self._size == self.capacity
+
+    def oldest_key(self) -> int | None:
+        """
+        Return the key of the oldest stored tick, None if the store is empty.
+        """
+        return self._slots[self._head].key if self._size else None
+
+    def ready_count(self, watermark: int | None, expected_targets: int) -> int:
+        """
+        Count the oldest stored ticks that can be processed in a row, the count stopping at the first tick that is
+        neither past the watermark nor complete.
+        :param watermark: Key up to which the ticks are ready, None if no tick is ready by the watermark
+        :param expected_targets: Number of target reports that completes a tick (with its global report), 0 to only
+        rely on the watermark
+        """
+        count = 0
+        while count < self._size:
+            slot = self._slot_at(count)
+            if watermark is not None and slot.key <= watermark:
+                count += 1
+            elif (
+                expected_targets > 0
+                and slot.global_metadata is not None
+                and len(slot.target_ids) >= expected_targets
+            ):
+                count += 1
+            else:
+                break
+        return count
+
+    def keys(self) -> list[int]:
+        """
+        Return the keys of the stored ticks, from the oldest to the newest.
+        """
+        return [self._slot_at(i).key for i in range(self._size)]
+
+    def append(self, report: HWPCReport) -> bool:
+        """
+        Store the fields of the given report used by the formula.
+        :param report: HWPC report to store
+        :return: True if a report was already stored for the same target and timestamp, False otherwise
+        :raise TickStoreFullError: When the report belongs to a new tick and the store is full
+        """
+        key = timestamp_to_key(report.timestamp)
+        slot = self._index.get(key)
+        if slot is None:
+            slot = self._open_slot(key, report.timestamp)
+
+        if report.target == GLOBAL_TARGET:
+            duplicate = slot.global_metadata is not None
+            if not duplicate:
+                self._reports += 1
+            slot.global_metadata = report.metadata
+            if self.socket is None:
+                slot.rapl_energies = self._extract_rapl_energies(report)
+            else:
+                slot.rapl_energy = self._extract_rapl_energy(report)
+            return duplicate
+
+        target_id = self._intern(report.target, report.metadata)
+        metadata = self._last_metadata[target_id]
+        sockets_mask = (
+            self._sockets_mask(self._report_sockets(report))
+            if self.socket is None
+            else 0
+        )
+        position = slot.positions.get(target_id)
+        if position is not None:
+            self._release(target_id)
+            slot.target_metadata[position] = metadata
+            slot.target_sockets[position] = sockets_mask
+            return True
+
+        slot.positions[target_id] = len(slot.target_ids)
+        slot.target_ids.append(target_id)
+        slot.target_metadata.append(metadata)
+        slot.target_sockets.append(sockets_mask)
+        self._reports += 1
+        return False
+
+    def pop_oldest(self) -> Tick:
+        """
+        Remove the oldest tick from the store.
+        :return: The projected reports of the tick
+        :raise IndexError: When the store is empty
+        """
+        if not self._size:
+            raise IndexError("pop from an empty tick store")
+
+        slot = self._slots[self._head]
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        del self._index[slot.key]
+        self._reports -= len(slot.target_ids) + (slot.global_metadata is not None)
+
+        target_names = [self._target_names[target_id] for target_id in slot.target_ids]
+        tick = Tick(
+            slot.key,
+            slot.timestamp,
+            slot.rapl_energy,
+            slot.global_metadata,
+            target_names,
+            list(slot.target_metadata),
+            slot.rapl_energies,
+            array("Q", slot.target_sockets) if self.socket is None else None,
+            self.sockets if self.socket is None else None,
+        )
+
+        for target_id in slot.target_ids:
+            self._release(target_id)
+        slot.reset(0, None)
+        return tick
+
+    def export(self) -> list[tuple]:
+        """
+        Return the stored ticks, from the oldest to the newest, as picklable
+        (key, timestamp, rapl_energy, rapl_energies, global_metadata, targets) tuples, the targets being
+        (name, metadata, sockets) tuples.
+        """
+        ticks = []
+        for position in range(self._size):
+            slot = self._slot_at(position)
+            targets = [
+                (
+                    self._target_names[target_id],
+                    metadata,
+                    [
+                        socket
+                        for bit, socket in enumerate(self.sockets)
+                        if sockets_mask >> bit & 1
+                    ],
+                )
+                for target_id, metadata, sockets_mask in zip(
+                    slot.target_ids,
+                    slot.target_metadata,
+                    slot.target_sockets,
+                    strict=True,
+                )
+            ]
+            ticks.append(
+                (
+                    slot.key,
+                    slot.timestamp,
+                    slot.rapl_energy,
+                    slot.rapl_energies,
+                    slot.global_metadata,
+                    targets,
+                )
+            )
+        return ticks
+
+    def restore(self, ticks: list[tuple]) -> None:
+        """
+        Store the ticks returned by export, the ones already stored are kept.
+        :param ticks: Exported ticks
+        :raise TickStoreFullError: When there are more ticks than free slots
+        """
+        for (
+            key,
+            timestamp,
+            rapl_energy,
+            rapl_energies,
+            global_metadata,
+            targets,
+        ) in ticks:
+            if key in self._index:
+                continue
+
+            slot = self._open_slot(key, timestamp)
+            slot.rapl_energy = rapl_energy
+            slot.rapl_energies = rapl_energies
+            slot.global_metadata = global_metadata
+            self._reports += len(targets) + (global_metadata is not None)
+            for target, metadata, sockets in targets:
+                target_id = self._intern(target, metadata)
+                slot.positions[target_id] = len(slot.target_ids)
+                slot.target_ids.append(target_id)
+                slot.target_metadata.append(self._last_metadata[target_id])
+                slot.target_sockets.append(
+                    self._sockets_mask(sockets) if self.socket is None else 0
+                )
+
+    def _open_slot(self, key: int, timestamp: datetime.datetime) -> _TickSlot:
+        if self._size == self.capacity:
+            raise TickStoreFullError()
+
+        # Reports are mostly received in order, the position of the new tick is searched from the newest one.
+        position = self._size
+        while position and self._slot_at(position - 1).key > key:
+            position -= 1
+
+        slot = self._slot_at(self._size)
+        for i in range(self._size, position, -1):
+            self._slots[(self._head + i) % self.capacity] = self._slot_at(i - 1)
+        self._slots[(self._head + position) % self.capacity] = slot
+
+        slot.reset(key, timestamp)
+        self._size += 1
+        self._index[key] = slot
+        return slot
+
+    def _slot_at(self, position: int) -> _TickSlot:
+        return self._slots[(self._head + position) % self.capacity]
+
+    def _extract_rapl_energy(self, report: HWPCReport) -> int | None:
+        try:
+            socket_group = report.groups[RAPL_GROUP][self.socket]
+            return next(iter(socket_group.values()))[RAPL_EVENT]
+        except (KeyError, StopIteration):
+            return None
+
+    def _extract_rapl_energies(self, report: HWPCReport) -> dict[str, int | None]:
+        """
+        Extract the RAPL package energy of each socket the global report is dispatched to.
+        """
+        rapl_group = report.groups.get(RAPL_GROUP, {})
+        energies = {}
+        for socket in self._report_sockets(report):
+            try:
+                energies[socket] = next(iter(rapl_group[socket].values()))[RAPL_EVENT]
+            except (KeyError, StopIteration):
+                energies[socket] = None
+        return energies
+
+    def _sockets_mask(self, sockets: list[str]) -> int:
+        """
+        Compute the bitmask of the given sockets.
+        """
+        mask = 0
+        for socket in sockets:
+            bit = self._socket_bits.get(socket)
+            if bit is None:
+                bit = self._socket_bits[socket] = len(self.sockets)
+                self.sockets.append(socket)
+            mask |= 1 << bit
+        return mask
+
+    @staticmethod
+    def _report_sockets(report: HWPCReport) -> list[str]:
+        """
+        Return the sockets of the report, as done by the socket level dispatch rule of PowerAPI.
+        """
+        try:
+            return list(_extract_non_shared_group(report))
+        except (AttributeError, IndexError):
+            # Reports without groups or with an empty group cannot be dispatched to a socket.
+            return []
+
+    def _intern(self, target: str, metadata: dict[str, Any]) -> int:
+        """
+        Return the id of the given target and take a reference on it.
+        The metadata of the target is shared between the ticks as long as it does not change.
+        """
+        target_id = self._target_ids.get(target)
+        if target_id is None:
+            if self._free_ids:
+                target_id = self._free_ids.pop()
+                self._target_names[target_id] = target
+                self._target_refs[target_id] = 0
+            else:
+                target_id = len(self._target_names)
+                self._target_names.append(target)
+                self._target_refs.append(0)
+                self._last_metadata.append(None)
+            self._target_ids[target] = target_id
+
+        if self._last_metadata[target_id] != metadata:
+            self._last_metadata[target_id] = metadata
+
+        self._target_refs[target_id] += 1
+        return target_id
+
+    def _release(self, target_id: int):
+        self._target_refs[target_id] -= 1
+        if self._target_refs[target_id] == 0:
+            del self._target_ids[self._target_names[target_id]]
+            self._target_names[target_id] = None
+            self._last_metadata[target_id] = None
+            self._free_ids.append(target_id)
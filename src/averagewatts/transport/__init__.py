@@ -0,0 +1,28 @@
+from .dispatcher import RingDispatcherActor, RingDispatcherState
+from .handlers import (
+    RingDispatcherPoisonPillMessageHandler,
+    RingDispatcherReportHandler,
+    RingRecordsHandler,
+)
+from .ring import (
+    DEFAULT_RING_CAPACITY,
+    RECORD_DTYPE,
+    ReportRing,
+    RingReader,
+    RingRecords,
+    RingWriter,
+)
+
+__all__ = [
+    "DEFAULT_RING_CAPACITY",
+    "RECORD_DTYPE",
+    "ReportRing",
+    "RingDispatcherActor",
+    "RingDispatcherPoisonPillMessageHandler",
+    "RingDispatcherReportHandler",
+    "RingDispatcherState",
+    "RingReader",
+    "RingRecords",
+    "RingRecordsHandler",
+    "RingWriter",
+]
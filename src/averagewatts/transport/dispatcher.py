@@ -0,0 +1,125 @@
+import logging
+from collections.abc import Callable
+
+from powerapi.dispatcher import DispatcherActor, RouteTable
+from powerapi.dispatcher.dispatcher_actor import DispatcherState
+from powerapi.formula import FormulaActor
+from powerapi.message import PoisonPillMessage
+from powerapi.pusher import PusherActor
+from powerapi.report import Report
+
+from .handlers import (
+    RingDispatcherPoisonPillMessageHandler,
+    RingDispatcherReportHandler,
+)
+from .ring import DEFAULT_RING_CAPACITY, RING_FLUSH_TIMEOUT, ReportRing, RingWriter
+
+
+class RingDispatcherState(DispatcherState):
+    """
+    Dispatcher state creating a shared memory ring for each formula actor.
+    """
+
+    def __init__(
+        self,
+        actor,
+        pushers: dict[str, PusherActor],
+        route_table: RouteTable,
+        ring_capacity: int,
+    ):
+        """
+        :param actor: Dispatcher actor instance
+        :param pushers: Pusher actors, by name
+        :param route_table: Route table to use for reports
+        :param ring_capacity: Maximum number of records stored in the ring of each formula
+        """
+        super().__init__(actor, pushers, route_table)
+        self.ring_capacity = ring_capacity
+        self.writers: dict[tuple, RingWriter] = {}
+
+    def add_formula(self, formula_id: tuple) -> FormulaActor:
+        """
+        Create the ring and the formula corresponding to the given ID, the formula being monitoring a socket.
+        :param formula_id: The formula ID, made of the sensor and the socket
+        :return: The new formula actor
+        """
+        ring = ReportRing(self.ring_capacity)
+        formula = self.actor.formula_init_function(
+            name=str((self.actor.name, *formula_id)), pushers=self.pushers, ring=ring
+        )
+        self.supervisor.launch_actor(formula, False)
+        self.formula_dict[formula_id] = formula
+        self.writers[formula_id] = RingWriter(
+            ring, formula, formula_id[1], self.actor.name
+        )
+        return formula
+
+    def flush_rings(self) -> None:
+        """
+        Notify every formula of its pending records.
+        """
+        for writer in self.writers.values():
+            if writer.formula.is_alive():
+                writer.flush()
+
+    def close_rings(self) -> None:
+        """
+        Destroy the rings of the formulas.
+        """
+        for writer in self.writers.values():
+            writer.ring.close(unlink=True)
+        self.writers.clear()
+
+
+class RingDispatcherActor(DispatcherActor):
+    """
+    Dispatcher actor sending the reports to the formula actors (monitoring a socket) through shared memory rings.
+    Only the projection of the reports used by the formula is written in the rings, and the formulas are notified of
+    the written records by batches: when enough records are pending or when no report has been received for a while.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        formula_init_function: Callable,
+        pushers: dict[str, PusherActor],
+        route_table: RouteTable,
+        ring_capacity: int = DEFAULT_RING_CAPACITY,
+        level_logger=logging.WARNING,
+    ):
+        """
+        :param name: Actor name
+        :param formula_init_function: Factory of the formula actors, taking their ring
+        :param pushers: Pusher actors, by name
+        :param route_table: Routing table to use for dispatching the reports
+        :param ring_capacity: Maximum number of records stored in the ring of each formula
+        :param level_logger: Logging level
+        """
+        super().__init__(
+            name,
+            formula_init_function,
+            pushers,
+            route_table,
+            level_logger,
+            RING_FLUSH_TIMEOUT,
+        )
+        self.state = RingDispatcherState(self, pushers, route_table, ring_capacity)
+
+    def setup(self):
+        """
+        Setup the dispatcher actor handlers, writing the reports in the rings.
+        """
+        super().setup()
+        self.add_handler(Report, RingDispatcherReportHandler(self.state))
+        self.add_handler(
+            PoisonPillMessage, RingDispatcherPoisonPillMessageHandler(self.state)
+        )
+
+    def receive(self):
+        """
+        Wait for a message, notifying the formulas of their pending records when none is received before the timeout.
+        """
+        msg = super().receive()
+        if msg is None:
+            self.state.flush_rings()
+        return msg
@@ -0,0 +1,57 @@
+from powerapi.dispatcher.handlers import DispatcherPoisonPillMessageHandler
+from powerapi.handler import Handler, InitHandler
+from powerapi.report import Report
+
+from .ring import RingReader, RingRecords
+
+
+class RingDispatcherReportHandler(InitHandler):
+    """
+    Write the projection of the received reports in the rings of their corresponding formula(s).
+    """
+
+    def handle(self, msg: Report):
+        """
+        Write the report in the ring of its corresponding formula(s).
+        :param msg: The report to dispatch
+        """
+        dispatch_rule = self.state.route_table.get_dispatch_rule(msg)
+        for formula_id in dispatch_rule.get_formula_id(msg):
+            formula = self.state.get_formula(formula_id)
+            if formula.is_alive():
+                self.state.writers[formula_id].write(msg)
+
+
+class RingDispatcherPoisonPillMessageHandler(DispatcherPoisonPillMessageHandler):
+    """
+    Notify the formulas of their pending records before stopping them, then destroy the rings.
+    """
+
+    def teardown(self, soft=False):
+        self.state.flush_rings()
+        super().teardown(soft)
+        self.state.close_rings()
+
+
+class RingRecordsHandler(Handler):
+    """
+    Read the records notified by the dispatcher and handle the rebuilt reports as if they had been received.
+    """
+
+    def __init__(self, state, reader: RingReader, report_handler: Handler):
+        """
+        :param state: State of the formula actor
+        :param reader: Reader of the ring of the formula
+        :param report_handler: Handler of the HWPC reports
+        """
+        super().__init__(state)
+        self.reader = reader
+        self.report_handler = report_handler
+
+    def handle(self, msg: RingRecords):
+        """
+        Handle the reports of the notified records.
+        :param msg: Notification of the dispatcher
+        """
+        for report in self.reader.read(msg):
+            self.report_handler.handle(report)
@@ -0,0 +1,280 @@
+import datetime
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+from powerapi.message import Message
+from powerapi.report import HWPCReport
+
+from averagewatts.tick.store import GLOBAL_TARGET, RAPL_EVENT, RAPL_GROUP
+
+# Projected HWPC report, as written in the rings.
+RECORD_DTYPE = np.dtype(
+    [("timestamp", "<f8"), ("target", "<u4"), ("flags", "<u4"), ("energy", "<i8")]
+)
+
+# Flag of the records of the global reports having a RAPL package energy for the socket of the formula.
+HAS_ENERGY = 1
+
+# Size of the header of a ring, holding the read position of the formula (padded to a cache line).
+HEADER_SIZE = 64
+
+# Maximum number of records stored in a ring.
+DEFAULT_RING_CAPACITY = 4096
+
+# Number of records written before the formula is notified.
+RING_BATCH_SIZE = 64
+
+# Delay (in ms) without receiving a report after which the dispatcher notifies the formulas of their pending records.
+RING_FLUSH_TIMEOUT = 10
+
+# Maximum number of targets defined at the same time for a ring, the least recently used ones are retired.
+RING_TARGETS_CAPACITY = 65536
+
+# Delay (in s) between two checks of the read position of a full ring.
+_FULL_RING_POLL_INTERVAL = 0.0005
+
+
+class RingRecords(Message):
+    """
+    Notification sent to a formula actor when records have been written in its ring.
+    The targets referenced by the records are defined by the notifications, the records only holding their id.
+    """
+
+    def __init__(
+        self,
+        sender_name: str,
+        end: int,
+        definitions: list[tuple[int, str, dict[str, Any]]],
+        retired: list[int],
+    ):
+        """
+        :param sender_name: Name of the dispatcher
+        :param end: Write position of the ring, every record before it can be read
+        :param definitions: (id, name, metadata) of the targets defined since the previous notification
+        :param retired: Id of the targets no longer referenced by the records written after this notification
+        """
+        Message.__init__(self, sender_name)
+        self.end = end
+        self.definitions = definitions
+        self.retired = retired
+
+    def __str__(self):
+        return f"RingRecords({self.sender_name}, end={self.end}, definitions={len(self.definitions)}, retired={len(self.retired)})"
+
+
+class ReportRing:
+    """
+    Single-producer single-consumer ring of projected HWPC reports stored in shared memory.
+    The write position is only known by the dispatcher (and sent in the notifications), the read position is stored
+    in the header of the ring by the formula for the dispatcher to know the free space.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_RING_CAPACITY, name: str | None = None):
+        """
+        :param capacity: Maximum number of records stored in the ring
+        :param name: Name of the shared memory block to attach to, None to create a new one
+        """
+        # Imported here for the formula not to load it when the shared memory transport is disabled.
+        from multiprocessing.shared_memory import SharedMemory
+
+        self.capacity = capacity
+        self.shm = SharedMemory(
+            name=name,
+            create=name is None,
+            size=HEADER_SIZE + capacity * RECORD_DTYPE.itemsize,
+        )
+        self._header = np.ndarray((1,), dtype="<u8", buffer=self.shm.buf)
+        self.records = np.ndarray(
+            (capacity,), dtype=RECORD_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE
+        )
+        if name is None:
+            self._header[0] = 0
+
+    def __reduce__(self):
+        return ReportRing, (self.capacity, self.shm.name)
+
+    @property
+    def read_position(self) -> int:
+        """
+        Position of the next record to be read by the formula.
+        """
+        return int(self._header[0])
+
+    @read_position.setter
+    def read_position(self, position: int) -> None:
+        self._header[0] = position
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Release the shared memory block.
+        :param unlink: Also destroy the block, done by the dispatcher that created it
+        """
+        del self._header
+        del self.records
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class RingWriter:
+    """
+    Dispatcher side of a ring, projecting the reports sent to a formula actor to records.
+    """
+
+    def __init__(self, ring: ReportRing, formula, socket: str, sender_name: str):
+        """
+        :param ring: Ring of the formula
+        :param formula: Formula actor, notified of the written records
+        :param socket: Socket monitored by the formula
+        :param sender_name: Name of the dispatcher
+        """
+        self.ring = ring
+        self.formula = formula
+        self.socket = socket
+        self.sender_name = sender_name
+
+        self.write_position = 0
+        self.notified_position = 0
+        self.definitions: list[tuple[int, str, dict[str, Any]]] = []
+        self.retired: list[int] = []
+        self._targets: OrderedDict[str, tuple[int, dict[str, Any]]] = OrderedDict()
+        self._next_target_id = 0
+
+    def write(self, report: HWPCReport) -> None:
+        """
+        Write the projection of a report in the ring, waiting for the formula if the ring is full.
+        :param report: HWPC report sent to the formula
+        """
+        flags = 0
+        energy = 0
+        if report.target == GLOBAL_TARGET:
+            try:
+                socket_group = report.groups[RAPL_GROUP][self.socket]
+                energy = next(iter(socket_group.values()))[RAPL_EVENT]
+                flags = HAS_ENERGY
+            except (KeyError, StopIteration):
+                pass
+
+        target_id = self._target_id(report.target, report.metadata)
+        if self.write_position - self.ring.read_position >= self.ring.capacity:
+            self._wait_for_room()
+
+        self.ring.records[self.write_position % self.ring.capacity] = (
+            report.timestamp.timestamp(),
+            target_id,
+            flags,
+            energy,
+        )
+        self.write_position += 1
+        if self.write_position - self.notified_position >= RING_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Notify the formula of the records written (and of the targets defined or retired) since the last notification.
+        """
+        if self.write_position == self.notified_position and not (
+            self.definitions or self.retired
+        ):
+            return
+
+        self.formula.send_data(
+            RingRecords(
+                self.sender_name, self.write_position, self.definitions, self.retired
+            )
+        )
+        self.notified_position = self.write_position
+        self.definitions = []
+        self.retired = []
+
+    def _wait_for_room(self) -> None:
+        self.flush()
+        while self.write_position - self.ring.read_position >= self.ring.capacity:
+            if not self.formula.is_alive():
+                raise BrokenPipeError(f"formula {self.formula.name} is not running")
+            time.sleep(_FULL_RING_POLL_INTERVAL)
+
+    def _target_id(self, target: str, metadata: dict[str, Any]) -> int:
+        """
+        Return the id of the given target, defining a new one if the target is unknown or if its metadata changed.
+        """
+        entry = self._targets.get(target)
+        if entry is not None and entry[1] == metadata:
+            self._targets.move_to_end(target)
+            return entry[0]
+
+        if entry is not None:
+            self.retired.append(entry[0])
+
+        target_id = self._next_target_id
+        self._next_target_id += 1
+        self._targets[target] = (target_id, metadata)
+        self._targets.move_to_end(target)
+        self.definitions.append((target_id, target, metadata))
+
+        if len(self._targets) > RING_TARGETS_CAPACITY:
+            _, (retired_id, _) = self._targets.popitem(last=False)
+            self.retired.append(retired_id)
+        return target_id
+
+
+class RingReader:
+    """
+    Formula side of a ring, rebuilding the reports from the records.
+    """
+
+    def __init__(self, ring: ReportRing, sensor: str, socket: str):
+        """
+        :param ring: Ring of the formula
+        :param sensor: Sensor of the reports
+        :param socket: Socket monitored by the formula
+        """
+        self.ring = ring
+        self.sensor = sensor
+        self.socket = socket
+        self.targets: dict[int, tuple[str, dict[str, Any]]] = {}
+
+    def read(self, msg: RingRecords) -> list[HWPCReport]:
+        """
+        Read the records notified by the given message and release their room in the ring.
+        :param msg: Notification of the dispatcher
+        :return: Reports projected to the fields used by the formula
+        """
+        for target_id, target, metadata in msg.definitions:
+            self.targets[target_id] = (target, metadata)
+
+        start = self.ring.read_position
+        begin = start % self.ring.capacity
+        count = msg.end - start
+        if begin + count <= self.ring.capacity:
+            records = self.ring.records[begin : begin + count].tolist()
+        else:
+            records = (
+                self.ring.records[begin:].tolist()
+                + self.ring.records[: begin + count - self.ring.capacity].tolist()
+            )
+        self.ring.read_position = msg.end
+
+        reports = []
+        for timestamp, target_id, flags, energy in records:
+            target, metadata = self.targets[target_id]
+            groups = (
+                {RAPL_GROUP: {self.socket: {"0": {RAPL_EVENT: energy}}}}
+                if flags & HAS_ENERGY
+                else {}
+            )
+            reports.append(
+                HWPCReport(
+                    datetime.datetime.fromtimestamp(timestamp),
+                    self.sensor,
+                    target,
+                    groups,
+                    metadata,
+                )
+            )
+
+        for target_id in msg.retired:
+            del self.targets[target_id]
+        return reports
@@ -0,0 +1,100 @@
+import subprocess
+import sys
+
+import pytest
+from powerapi.exception import PowerAPIException
+
+from averagewatts.backends import (
+    INPUT_DATABASE_FACTORIES,
+    create_database,
+    get_report_class,
+)
+
+
+def test_create_csv_database(tmp_path):
+    database = create_database(
+        {
+            "type": "csv",
+            "model": get_report_class("PowerReport"),
+            "directory": str(tmp_path),
+        }
+    )
+
+    assert type(database).__name__ == "CsvDB"
+    assert database.current_path == f"{tmp_path}/"
+
+
+def test_csv_inputs_are_memory_mapped():
+    database = create_database(
+        {"type": "csv", "model": get_report_class("HWPCReport"), "files": []},
+        INPUT_DATABASE_FACTORIES,
+    )
+
+    assert type(database).__name__ == "MmapCsvDB"
+
+
+def test_unknown_database_type_is_rejected():
+    with pytest.raises(PowerAPIException):
+        create_database({"type": "unknown", "model": get_report_class("PowerReport")})
+
+
+def test_unknown_report_model_is_rejected():
+    with pytest.raises(PowerAPIException):
+        get_report_class("UnknownReport")
+
+
+def test_entry_point_only_imports_the_used_backends():
+    code = (
+        "import sys\n"
+        "import averagewatts.__main__\n"
+        "from averagewatts.backends import create_database, get_report_class\n"
+        "create_database({'type': 'csv', 'model': get_report_class('PowerReport')})\n"
+        "print(','.join(sorted(name for name in sys.modules if name.startswith(('powerapi.database.', 'kubernetes')))))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": ":".join(sys.path)},
+    )
+
+    modules = set(result.stdout.strip().split(","))
+    assert "powerapi.database.csv" in modules
+    assert "powerapi.database.mongodb" not in modules
+    assert "powerapi.database.influxdb2" not in modules
+    assert not any(module.startswith("kubernetes") for module in modules)
+
+
+def test_entry_point_does_not_import_the_shared_memory_transport():
+    code = (
+        "import sys\n"
+        "import averagewatts.__main__\n"
+        "print('multiprocessing.shared_memory' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": ":".join(sys.path)},
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_package_import_keeps_the_database_package():
+    code = (
+        "import averagewatts.kernel\n"
+        "import powerapi.database\n"
+        "print('CsvDB' in vars(powerapi.database))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": ":".join(sys.path)},
+    )
+
+    assert result.stdout.strip() == "True"
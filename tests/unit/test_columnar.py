@@ -0,0 +1,101 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+from powerapi.database.base_db import DBError
+from powerapi.report import PowerReport
+
+from averagewatts.database import (
+    ColumnarDB,
+    ColumnarFormatError,
+    ColumnarReader,
+    WriteOnlyDatabaseError,
+)
+from averagewatts.database.columnar import COLUMN_ALIGNMENT, INDEX_FILENAME
+
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+def _power_reports(tick: int, targets: list[str]) -> list[PowerReport]:
+    timestamp = START_TIMESTAMP + datetime.timedelta(seconds=tick)
+    return [
+        PowerReport(
+            timestamp,
+            "sensor",
+            target,
+            10.0 * tick + index,
+            {"socket": "0", "ratio": 0.5, "formula": "f"},
+        )
+        for index, target in enumerate(targets)
+    ]
+
+
+def test_chunks_are_written_when_full(tmp_path):
+    database = ColumnarDB(PowerReport, str(tmp_path), chunk_rows=4)
+    database.connect()
+
+    database.save_many(_power_reports(0, ["/a", "/b", "/c"]))
+    database.save_many(_power_reports(1, ["/a", "/b", "/c"]))
+
+    reader = ColumnarReader(str(tmp_path))
+    assert [chunk["rows"] for chunk in reader.chunks] == [4]
+    database.disconnect()
+    reader = ColumnarReader(str(tmp_path))
+    assert [chunk["rows"] for chunk in reader.chunks] == [4, 2]
+    assert reader.targets == ["/a", "/b", "/c"]
+
+    columns = reader.read()
+    assert columns["target"].tolist() == [0, 1, 2, 0, 1, 2]
+    targets = reader.decode("target", columns["target"])
+    assert targets.tolist() == ["/a", "/b", "/c", "/a", "/b", "/c"]
+    assert columns["power"].tolist() == [0.0, 1.0, 2.0, 10.0, 11.0, 12.0]
+    assert columns["ratio"].tolist() == [0.5] * 6
+    assert columns["timestamp"][3] - columns["timestamp"][0] == 1000
+
+
+def test_chunk_columns_are_memory_mapped(tmp_path):
+    database = ColumnarDB(PowerReport, str(tmp_path), flush_interval=0)
+    database.connect()
+    database.save_many(_power_reports(0, ["/a", "/b"]))
+
+    reader = ColumnarReader(str(tmp_path))
+    (chunk,) = reader.iter_chunks()
+    assert all(
+        offset % COLUMN_ALIGNMENT == 0
+        for offset in reader.chunks[0]["offsets"].values()
+    )
+    assert isinstance(chunk["power"].base, np.memmap)
+    assert not chunk["power"].flags.writeable
+    assert chunk["power"].tolist() == [0.0, 1.0]
+
+
+def test_chunks_of_a_previous_run_are_kept(tmp_path):
+    for tick in range(2):
+        database = ColumnarDB(PowerReport, str(tmp_path))
+        database.connect()
+        database.save_many(_power_reports(tick, ["/b", "/a"] if tick else ["/a"]))
+        database.disconnect()
+
+    reader = ColumnarReader(str(tmp_path))
+    assert len(reader) == 3
+    assert reader.targets == ["/a", "/b"]
+    assert reader.read()["target"].tolist() == [0, 1, 0]
+
+
+def test_foreign_index_is_rejected(tmp_path):
+    (tmp_path / INDEX_FILENAME).write_text('{"format": "other"}')
+
+    with pytest.raises(ColumnarFormatError):
+        ColumnarDB(PowerReport, str(tmp_path)).connect()
+    with pytest.raises(ColumnarFormatError):
+        ColumnarReader(os.fspath(tmp_path / "missing"))
+
+
+def test_reports_cannot_be_read(tmp_path):
+    database = ColumnarDB(PowerReport, str(tmp_path))
+    database.connect()
+
+    with pytest.raises(WriteOnlyDatabaseError):
+        database.iter()
+    assert issubclass(WriteOnlyDatabaseError, DBError)
@@ -0,0 +1,54 @@
+import datetime
+
+from powerapi.dispatch_rule import HWPCDepthLevel, HWPCDispatchRule
+from powerapi.dispatcher import RouteTable
+from powerapi.filter import Filter
+from powerapi.report import HWPCReport
+
+from averagewatts.__main__ import setup_dispatchers
+from averagewatts.dispatch import SensorShardRule, sensor_shard
+
+SENSORS = [f"node-{index}" for index in range(32)]
+
+
+def _report(sensor: str) -> HWPCReport:
+    return HWPCReport(datetime.datetime(2025, 2, 12), sensor, "all", {})
+
+
+def test_sensor_shard_is_stable():
+    assert sensor_shard("k8s-master", 3) == 1
+    assert {sensor_shard(sensor, 4) for sensor in SENSORS} == {0, 1, 2, 3}
+
+
+def test_each_sensor_belongs_to_a_single_shard():
+    rules = [SensorShardRule(shard, 4) for shard in range(4)]
+
+    for sensor in SENSORS:
+        assert [rule(_report(sensor)) for rule in rules].count(True) == 1
+
+
+def test_reports_are_routed_to_the_dispatcher_of_their_sensor():
+    route_table = RouteTable()
+    route_table.add_dispatch_rule(
+        HWPCReport, HWPCDispatchRule(HWPCDepthLevel.SOCKET, primary=True)
+    )
+    report_filter = Filter()
+
+    dispatchers = setup_dispatchers(
+        {"dispatcher-shards": 3}, route_table, report_filter, {}
+    )
+
+    assert list(dispatchers) == ["cpu_0", "cpu_1", "cpu_2"]
+    for sensor in SENSORS:
+        routed = report_filter.route(_report(sensor))
+        assert [dispatcher.name for dispatcher in routed] == [
+            f"naive_dispatcher_{sensor_shard(sensor, 3)}"
+        ]
+
+
+def test_single_shard_keeps_the_default_dispatcher():
+    dispatchers = setup_dispatchers({}, RouteTable(), Filter(), {})
+
+    assert [dispatcher.name for dispatcher in dispatchers.values()] == [
+        "naive_dispatcher"
+    ]
@@ -0,0 +1,123 @@
+import datetime
+
+import pytest
+from powerapi.database import BaseDB, IterDB
+from powerapi.dispatch_rule import HWPCDepthLevel, HWPCDispatchRule
+from powerapi.dispatcher import RouteTable
+from powerapi.report import HWPCReport, PowerReport
+
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.engine import AsyncioEngine
+
+RAPL_ENERGY_PKG = 11757944832
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+class ListIterDB(IterDB):
+    def __init__(self, db, reports):
+        super().__init__(db, HWPCReport, False)
+        self.reports = iter(reports)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.reports)
+
+
+class ListDB(BaseDB):
+    def __init__(self, reports=()):
+        super().__init__(PowerReport)
+        self.reports = list(reports)
+        self.saved = []
+
+    def connect(self):
+        pass
+
+    def iter(self, stream_mode=False):
+        return ListIterDB(self, self.reports)
+
+    def save(self, report):
+        self.saved.append(report)
+
+    def save_many(self, reports):
+        self.saved.extend(reports)
+
+
+def _generate_reports(ticks: int, targets: int) -> list[HWPCReport]:
+    reports = []
+    for tick in range(ticks):
+        timestamp = START_TIMESTAMP + datetime.timedelta(seconds=tick)
+        for sensor in ("sensor-a", "sensor-b"):
+            global_groups = {
+                "rapl": {
+                    "0": {"0": {"RAPL_ENERGY_PKG": RAPL_ENERGY_PKG}},
+                    "1": {"1": {"RAPL_ENERGY_PKG": 2 * RAPL_ENERGY_PKG}},
+                }
+            }
+            reports.append(HWPCReport(timestamp, sensor, "all", global_groups))
+            for target in range(targets):
+                socket = str(target % 2)
+                groups = {"core": {socket: {str(target): {"CPU": 42}}}}
+                reports.append(HWPCReport(timestamp, sensor, f"/t{target}", groups))
+    return reports
+
+
+def _route_table(depth_level: HWPCDepthLevel) -> RouteTable:
+    route_table = RouteTable()
+    route_table.add_dispatch_rule(
+        HWPCReport, HWPCDispatchRule(depth_level, primary=True)
+    )
+    return route_table
+
+
+@pytest.mark.parametrize("batch_delivery", [False, True])
+@pytest.mark.parametrize("queue_size", [1, 1024])
+def test_engine_writes_the_power_reports_of_every_processed_tick(
+    batch_delivery, queue_size
+):
+    output = ListDB()
+    engine = AsyncioEngine(
+        {"input": ListDB(_generate_reports(4, 3))},
+        {"output": (output, 50)},
+        _route_table(HWPCDepthLevel.SOCKET),
+        AverageWattsFormulaConfig(batch_delivery=batch_delivery),
+        queue_size=queue_size,
+    )
+
+    engine.run()
+
+    # The last tick of each formula is still buffered, waiting for late reports
+    assert len(engine.handlers) == 4
+    assert len(output.saved) == 2 * 3 * (3 + 2)
+    assert {report.sensor for report in output.saved} == {"sensor-a", "sensor-b"}
+    power = RAPL_ENERGY_PKG / 2**32
+    assert {
+        (report.target, report.metadata["socket"]): report.power
+        for report in output.saved
+        if report.sensor == "sensor-a"
+    } == pytest.approx(
+        {
+            ("/t0", "0"): power / 2,
+            ("/t2", "0"): power / 2,
+            ("rapl", "0"): power,
+            ("/t1", "1"): 2 * power,
+            ("rapl", "1"): 2 * power,
+        }
+    )
+
+
+def test_engine_names_the_formula_handlers_like_the_actors():
+    engine = AsyncioEngine(
+        {"input": ListDB(_generate_reports(2, 2))},
+        {"output": (ListDB(), 50)},
+        _route_table(HWPCDepthLevel.ROOT),
+        AverageWattsFormulaConfig(sensor_level=True),
+    )
+
+    engine.run()
+
+    assert sorted(handler.state.actor.name for handler in engine.handlers.values()) == [
+        "('naive_dispatcher', 'sensor-a')",
+        "('naive_dispatcher', 'sensor-b')",
+    ]
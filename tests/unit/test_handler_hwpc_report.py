@@ -1,11 +1,13 @@
 import datetime
 import random
-from collections import OrderedDict
 
 import pytest
 from powerapi.report import HWPCReport
 
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.checkpoint import FormulaCheckpoint
 from averagewatts.handler import HWPCReportHandler
+from averagewatts.pusher import PowerReportBatch
 
 NUMBER_OF_GENERATED_CORE_REPORTS = 10
 
@@ -14,9 +16,9 @@ RAPL_POWER_IN_WATTS = 2.73760986328125
 ESTIMATED_POWER = RAPL_POWER_IN_WATTS / NUMBER_OF_GENERATED_CORE_REPORTS
 
 
-def _generate_hwpc_reports(all=True, core=True) -> list[HWPCReport]:
-    reports = {}
-    timestamp = datetime.datetime.now()
+def _generate_hwpc_reports(all=True, core=True, timestamp=None) -> list[HWPCReport]:
+    reports = []
+    timestamp = timestamp or datetime.datetime.now()
     rapl_groups = {
         "rapl": {
             "0": {
@@ -27,20 +29,22 @@ def _generate_hwpc_reports(all=True, core=True) -> list[HWPCReport]:
         }
     }
     if all:
-        reports["all"] = HWPCReport(
-            timestamp,
-            "test-sensor",
-            "all",
-            rapl_groups,
+        reports.append(
+            HWPCReport(
+                timestamp,
+                "test-sensor",
+                "all",
+                rapl_groups,
+            )
         )
     if core:
-        for _ in range(NUMBER_OF_GENERATED_CORE_REPORTS):
+        for target_id in random.sample(range(1000), NUMBER_OF_GENERATED_CORE_REPORTS):
             sensor = "test-sensor"
-            target = "/system.test/" + str(random.randrange(1000))
+            target = "/system.test/" + str(target_id)
             groups = {"core": {}}
-            reports[target] = HWPCReport(timestamp, sensor, target, groups)
+            reports.append(HWPCReport(timestamp, sensor, target, groups))
 
-    return OrderedDict([(timestamp, reports)])
+    return reports
 
 
 @pytest.fixture
@@ -48,6 +52,7 @@ def mock_hwpc_handler(mocker):
     mock_state = mocker.MagicMock()
     mock_state.socket = "0"
     mock_state.sensor = "test_sensor"
+    mock_state.config = AverageWattsFormulaConfig()
     return HWPCReportHandler(mock_state)
 
 
@@ -55,8 +60,8 @@ def mock_hwpc_handler(mocker):
 def processed_reports_setup(mocker, mock_hwpc_handler):
     handler = mock_hwpc_handler
 
-    hwpc_reports = _generate_hwpc_reports()
-    handler.ticks = hwpc_reports
+    for report in _generate_hwpc_reports():
+        handler.ticks.append(report)
 
     return handler
 
@@ -83,8 +88,8 @@ def test_power_estimation_is_correct(processed_reports_setup):
 def processed_reports_without_core_reports(mock_hwpc_handler):
     handler = mock_hwpc_handler
 
-    hwpc_reports = _generate_hwpc_reports(core=False)
-    handler.ticks = hwpc_reports
+    for report in _generate_hwpc_reports(core=False):
+        handler.ticks.append(report)
 
     return handler
 
@@ -102,8 +107,8 @@ def test_missing_core_reports(processed_reports_without_core_reports, caplog):
 def processed_reports_without_all_reports(mock_hwpc_handler):
     handler = mock_hwpc_handler
 
-    hwpc_reports = _generate_hwpc_reports(all=False)
-    handler.ticks = hwpc_reports
+    for report in _generate_hwpc_reports(all=False):
+        handler.ticks.append(report)
 
     return handler
 
@@ -116,3 +121,329 @@ def test_missing_all_reports(processed_reports_without_all_reports, caplog):
     for record in caplog.records:
         assert record.levelname == "WARNING"
         assert "Failed to process tick" in record.message
+
+
+def _handle_tick(handler, tick: int, **kwargs):
+    timestamp = datetime.datetime(2025, 2, 12) + datetime.timedelta(seconds=tick)
+    for report in _generate_hwpc_reports(timestamp=timestamp, **kwargs):
+        handler.handle(report)
+
+
+def _sent_reports(handler):
+    pusher = handler.state.pushers["pusher"]
+    return [call.args[0] for call in pusher.send_data.call_args_list]
+
+
+def _pushed_power_reports(handler):
+    power_reports = []
+    for message in _sent_reports(handler):
+        if isinstance(message, PowerReportBatch):
+            power_reports.extend(message.reports)
+        else:
+            power_reports.append(message)
+    return power_reports
+
+
+@pytest.fixture
+def watermark_hwpc_handler(mocker, mock_hwpc_handler):
+    mock_hwpc_handler.state.pushers = {"pusher": mocker.MagicMock()}
+    return mock_hwpc_handler
+
+
+def test_tick_is_processed_once_allowed_lateness_has_passed(watermark_hwpc_handler):
+    _handle_tick(watermark_hwpc_handler, 0)
+    assert not _sent_reports(watermark_hwpc_handler)
+
+    _handle_tick(watermark_hwpc_handler, 1)
+    sent_reports = _sent_reports(watermark_hwpc_handler)
+    assert len(sent_reports) == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    assert {report.timestamp for report in sent_reports} == {
+        datetime.datetime(2025, 2, 12)
+    }
+
+
+def test_complete_tick_is_processed_without_waiting(watermark_hwpc_handler):
+    watermark_hwpc_handler.expected_targets = NUMBER_OF_GENERATED_CORE_REPORTS
+
+    _handle_tick(watermark_hwpc_handler, 0)
+    assert len(_sent_reports(watermark_hwpc_handler)) == (
+        NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    )
+
+
+def test_ticks_are_processed_in_timestamp_order(watermark_hwpc_handler):
+    watermark_hwpc_handler.allowed_lateness = 5000
+    for tick in (2, 0, 1, 3, 8):
+        _handle_tick(watermark_hwpc_handler, tick)
+
+    timestamps = [
+        report.timestamp for report in _pushed_power_reports(watermark_hwpc_handler)
+    ]
+    assert timestamps == sorted(timestamps)
+    assert len(set(timestamps)) == 4
+
+
+def test_late_reports_are_counted_and_dropped(watermark_hwpc_handler):
+    for tick in (0, 1, 2):
+        _handle_tick(watermark_hwpc_handler, tick)
+    sent_reports_count = len(_sent_reports(watermark_hwpc_handler))
+
+    _handle_tick(watermark_hwpc_handler, 0)
+
+    assert watermark_hwpc_handler.late_reports == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    assert len(_sent_reports(watermark_hwpc_handler)) == sent_reports_count
+
+
+def test_batch_delivery_sends_one_message_per_tick_and_pusher(watermark_hwpc_handler):
+    watermark_hwpc_handler.batch_delivery = True
+
+    for tick in (0, 1, 2):
+        _handle_tick(watermark_hwpc_handler, tick)
+
+    batches = _sent_reports(watermark_hwpc_handler)
+    assert len(batches) == 2
+    assert all(isinstance(batch, PowerReportBatch) for batch in batches)
+    assert [len(batch) for batch in batches] == [
+        NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    ] * 2
+
+
+def _generate_multi_socket_reports(timestamp) -> list[HWPCReport]:
+    rapl_groups = {
+        "rapl": {
+            "0": {"0": {"RAPL_ENERGY_PKG": RAPL_ENERGY_PKG}},
+            "1": {"8": {"RAPL_ENERGY_PKG": 2 * RAPL_ENERGY_PKG}},
+        },
+        "msr": {"0": {"0": {}, "1": {}}, "1": {"8": {}, "9": {}}},
+    }
+    reports = [HWPCReport(timestamp, "test-sensor", "all", rapl_groups)]
+    for i in range(6):
+        sockets = ("0", "1") if i < 2 else ("1",)
+        groups = {"core": {socket: {"0": {"CYCLES": 1}} for socket in sockets}}
+        reports.append(HWPCReport(timestamp, "test-sensor", f"/target{i}", groups))
+    return reports
+
+
+@pytest.fixture
+def sensor_level_hwpc_handler(mocker):
+    mock_state = mocker.MagicMock()
+    mock_state.socket = None
+    mock_state.sensor = "test_sensor"
+    mock_state.config = AverageWattsFormulaConfig(sensor_level=True)
+    return HWPCReportHandler(mock_state)
+
+
+def test_sensor_level_processes_every_socket(mocker, sensor_level_hwpc_handler):
+    reports = _generate_multi_socket_reports(datetime.datetime(2025, 2, 12))
+    for report in reports:
+        sensor_level_hwpc_handler.ticks.append(report)
+
+    power_reports = sensor_level_hwpc_handler._process_oldest_tick()
+
+    expected_reports = []
+    for socket in ("0", "1"):
+        mock_state = mocker.MagicMock()
+        mock_state.socket = socket
+        mock_state.sensor = "test_sensor"
+        mock_state.config = AverageWattsFormulaConfig()
+        socket_handler = HWPCReportHandler(mock_state)
+        for report in reports:
+            if socket in report.groups["core" if report.target != "all" else "msr"]:
+                socket_handler.ticks.append(report)
+        expected_reports.extend(socket_handler._process_oldest_tick())
+
+    assert power_reports == expected_reports
+    assert len(power_reports) == 2 + 1 + 6 + 1
+
+
+def test_targets_outside_the_top_k_are_folded(mocker):
+    mock_state = mocker.MagicMock()
+    mock_state.socket = "0"
+    mock_state.sensor = "test_sensor"
+    mock_state.config = AverageWattsFormulaConfig(top_k_targets=3)
+    handler = HWPCReportHandler(mock_state)
+    for report in _generate_hwpc_reports():
+        handler.ticks.append(report)
+
+    processed_reports = handler._process_oldest_tick()
+
+    assert len(processed_reports) == 3 + 2
+    assert processed_reports[-2].target == "other"
+    assert processed_reports[-2].power == pytest.approx(
+        ESTIMATED_POWER * (NUMBER_OF_GENERATED_CORE_REPORTS - 3)
+    )
+    assert processed_reports[-1].power == RAPL_POWER_IN_WATTS
+
+
+def test_stop_drains_the_buffered_ticks(watermark_hwpc_handler):
+    watermark_hwpc_handler.drain_ticks = True
+    _handle_tick(watermark_hwpc_handler, 0)
+    _handle_tick(watermark_hwpc_handler, 1, all=False)
+
+    watermark_hwpc_handler.stop(graceful=True)
+
+    assert len(_sent_reports(watermark_hwpc_handler)) == (
+        NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    )
+    assert watermark_hwpc_handler.metrics.ticks_dropped == {"missing_global_report": 1}
+    assert not len(watermark_hwpc_handler.ticks)
+
+
+def test_incomplete_ticks_are_resumed_from_the_checkpoint(mocker, tmp_path):
+    def checkpointed_handler():
+        mock_state = mocker.MagicMock()
+        mock_state.socket = "0"
+        mock_state.sensor = "test_sensor"
+        mock_state.pushers = {"pusher": mocker.MagicMock()}
+        mock_state.config = AverageWattsFormulaConfig(
+            drain_ticks=True, checkpoint_dir=str(tmp_path)
+        )
+        return HWPCReportHandler(mock_state)
+
+    handler = checkpointed_handler()
+    _handle_tick(handler, 0)
+    _handle_tick(handler, 1, all=False)
+    handler.stop(graceful=True)
+    assert len(_sent_reports(handler)) == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+
+    resumed_handler = checkpointed_handler()
+    assert len(resumed_handler.ticks) == 1
+    _handle_tick(resumed_handler, 0)
+    _handle_tick(resumed_handler, 1, core=False)
+    _handle_tick(resumed_handler, 2)
+
+    sent_reports = _sent_reports(resumed_handler)
+    assert len(sent_reports) == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    assert {report.timestamp for report in sent_reports} == {
+        datetime.datetime(2025, 2, 12, 0, 0, 1)
+    }
+    assert resumed_handler.late_reports == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    # The checkpoint is kept until it is replaced, for a crashed instance not to lose the restored ticks
+    assert len(checkpointed_handler().ticks) == 1
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path):
+    path = tmp_path / "stale.ckpt"
+    path.write_bytes(b"cbuiltins\nremoved_class\n.")
+
+    assert FormulaCheckpoint.load(str(path)) is None
+
+
+def test_ticks_processed_by_a_previous_run_are_skipped(mocker, tmp_path):
+    def rerun_handler():
+        mock_state = mocker.MagicMock()
+        mock_state.socket = "0"
+        mock_state.sensor = "test_sensor"
+        mock_state.pushers = {"pusher": mocker.MagicMock()}
+        mock_state.config = AverageWattsFormulaConfig(
+            drain_ticks=True, processed_ranges_dir=str(tmp_path)
+        )
+        return HWPCReportHandler(mock_state)
+
+    handler = rerun_handler()
+    for tick in range(3):
+        _handle_tick(handler, tick, all=tick != 1)
+    handler.stop(graceful=True)
+    assert len(_sent_reports(handler)) == 2 * (NUMBER_OF_GENERATED_CORE_REPORTS + 1)
+
+    rerun = rerun_handler()
+    for tick in range(4):
+        _handle_tick(rerun, tick)
+    rerun.stop(graceful=True)
+
+    sent_reports = _sent_reports(rerun)
+    assert len(sent_reports) == 2 * (NUMBER_OF_GENERATED_CORE_REPORTS + 1)
+    assert {report.timestamp for report in sent_reports} == {
+        datetime.datetime(2025, 2, 12, 0, 0, 1),
+        datetime.datetime(2025, 2, 12, 0, 0, 3),
+    }
+    assert rerun.metrics.ticks_dropped == {"already_processed": 2}
+
+
+def _bounded_handler(mocker, **config) -> HWPCReportHandler:
+    mock_state = mocker.MagicMock()
+    mock_state.socket = "0"
+    mock_state.sensor = "test_sensor"
+    mock_state.pushers = {"pusher": mocker.MagicMock()}
+    mock_state.config = AverageWattsFormulaConfig(allowed_lateness=60000, **config)
+    return HWPCReportHandler(mock_state)
+
+
+def test_process_oldest_policy_processes_the_oldest_tick_early(mocker):
+    handler = _bounded_handler(mocker, max_buffered_ticks=2)
+    for tick in (0, 1, 2):
+        _handle_tick(handler, tick)
+
+    assert {report.timestamp for report in _sent_reports(handler)} == {
+        datetime.datetime(2025, 2, 12)
+    }
+    assert handler.metrics.buffer_overflows == 1
+    assert handler.metrics.reports_shed == 0
+
+
+def test_drop_oldest_policy_sheds_the_oldest_tick(mocker):
+    handler = _bounded_handler(
+        mocker, max_buffered_ticks=2, overflow_policy="drop-oldest"
+    )
+    for tick in (0, 1, 2, 0):
+        _handle_tick(handler, tick)
+
+    assert not _sent_reports(handler)
+    assert handler.metrics.ticks_shed == 1
+    assert handler.metrics.reports_shed == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    assert handler.late_reports == NUMBER_OF_GENERATED_CORE_REPORTS + 1
+    assert len(handler.ticks) == 2
+
+
+def test_drop_newest_policy_drops_the_reports_over_the_limit(mocker):
+    handler = _bounded_handler(
+        mocker, max_buffered_reports=15, overflow_policy="drop-newest"
+    )
+    for tick in (0, 1):
+        _handle_tick(handler, tick)
+
+    assert not _sent_reports(handler)
+    assert handler.ticks.report_count == 15
+    assert handler.metrics.buffer_overflows == 7
+    assert handler.metrics.reports_shed == 7
+
+
+def test_backlog_is_caught_up_in_a_single_batch(mocker):
+    handler = _bounded_handler(mocker)
+    for tick in range(5):
+        _handle_tick(handler, tick)
+    assert not _sent_reports(handler)
+
+    _handle_tick(handler, 64, core=False)
+
+    batches = _sent_reports(handler)
+    assert len(batches) == 1
+    assert isinstance(batches[0], PowerReportBatch)
+    assert len(batches[0]) == 5 * (NUMBER_OF_GENERATED_CORE_REPORTS + 1)
+    assert handler.metrics.catch_up_batches == 1
+    assert handler.metrics.catch_up_ticks == 5
+    assert handler.metrics.ticks_processed == 5
+    assert handler.last_processed_key == handler.ticks.oldest_key() - 60000
+
+
+def test_caught_up_ticks_have_the_power_of_single_ticks(mocker):
+    handler = _bounded_handler(mocker)
+    for tick in range(3):
+        _handle_tick(handler, tick)
+    _handle_tick(handler, 3, all=False)
+    _handle_tick(handler, 64, core=False)
+
+    power_reports = _pushed_power_reports(handler)
+    assert len(power_reports) == 3 * (NUMBER_OF_GENERATED_CORE_REPORTS + 1)
+    for tick in range(3):
+        tick_reports = power_reports[
+            tick * (NUMBER_OF_GENERATED_CORE_REPORTS + 1) : (tick + 1)
+            * (NUMBER_OF_GENERATED_CORE_REPORTS + 1)
+        ]
+        assert {report.timestamp for report in tick_reports} == {
+            datetime.datetime(2025, 2, 12, 0, 0, tick)
+        }
+        assert [report.power for report in tick_reports] == [ESTIMATED_POWER] * (
+            NUMBER_OF_GENERATED_CORE_REPORTS
+        ) + [RAPL_POWER_IN_WATTS]
+    assert handler.metrics.ticks_dropped == {"missing_global_report": 1}
@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+
+from averagewatts.kernel import estimate_power, estimate_tick_power, rapl_power
+
+RAPL_ENERGY_PKG = 11757944832
+
+
+def test_ticks_without_energy_or_target_are_not_estimated():
+    estimation = estimate_power(
+        [1000, 2000, 3000, 4000],
+        [RAPL_ENERGY_PKG, np.nan, RAPL_ENERGY_PKG, 3 << 32],
+        [2, 3, 0, 3],
+        target_ticks=[0, 0, 1, 3, 3, 3],
+    )
+
+    assert estimation.timestamps.tolist() == [1000, 2000, 3000, 4000]
+    assert estimation.valid.tolist() == [True, False, False, True]
+    assert estimation.socket_power[3] == 3.0
+    assert estimation.target_power[3] == 1.0
+    assert np.isnan(estimation.socket_power[1:3]).all()
+    assert np.isnan(estimation.target_power[1:3]).all()
+    assert estimation.targets[:2].tolist() == [estimation.target_power[0]] * 2
+    assert np.isnan(estimation.targets[2])
+    assert estimation.targets[3:].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_batch_estimation_matches_single_tick_estimation():
+    rng = np.random.default_rng(42)
+    energies = rng.integers(1, 1 << 40, 1000)
+    counts = rng.integers(1, 1000, 1000)
+
+    estimation = estimate_power(np.arange(1000), energies, counts)
+
+    expected = [
+        estimate_tick_power(int(energy), int(count))
+        for energy, count in zip(energies, counts, strict=True)
+    ]
+    assert estimation.socket_power.tolist() == [power for power, _ in expected]
+    assert estimation.target_power.tolist() == [power for _, power in expected]
+    assert rapl_power([RAPL_ENERGY_PKG]).tolist() == [math.ldexp(RAPL_ENERGY_PKG, -32)]
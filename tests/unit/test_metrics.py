@@ -0,0 +1,114 @@
+import datetime
+import queue
+import urllib.request
+
+import pytest
+from powerapi.report import HWPCReport
+
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.handler import HWPCReportHandler
+from averagewatts.metrics import (
+    FormulaMetrics,
+    Histogram,
+    MetricsServer,
+    render_metrics,
+)
+
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+def _report(tick: int, target: str) -> HWPCReport:
+    timestamp = START_TIMESTAMP + datetime.timedelta(seconds=tick)
+    if target == "all":
+        groups = {"rapl": {"0": {"0": {"RAPL_ENERGY_PKG": 11757944832}}}}
+    else:
+        groups = {"core": {"0": {"0": {"CPU_CLK_THREAD_UNHALTED": 42}}}}
+    return HWPCReport(timestamp, "test-sensor", target, groups)
+
+
+@pytest.fixture
+def metrics_queue():
+    return queue.Queue()
+
+
+@pytest.fixture
+def handler(mocker, metrics_queue):
+    mock_state = mocker.MagicMock()
+    mock_state.socket = "0"
+    mock_state.sensor = "test-sensor"
+    mock_state.actor.name = "formula"
+    mock_state.config = AverageWattsFormulaConfig(metrics_queue=metrics_queue)
+    mock_state.pushers = {}
+    return HWPCReportHandler(mock_state)
+
+
+def test_histogram_counts_values_in_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_handler_counts_processed_and_dropped_ticks(handler, metrics_queue):
+    for report in (_report(0, "all"), _report(0, "/a"), _report(0, "/a")):
+        handler.handle(report)
+    handler.handle(_report(1, "/a"))
+    handler.handle(_report(2, "all"))
+    handler.handle(_report(4, "all"))
+
+    metrics = handler.metrics
+    assert metrics.reports_received == 6
+    assert metrics.duplicate_reports == 1
+    assert metrics.ticks_processed == 3
+    assert metrics.ticks_dropped == {
+        "missing_global_report": 1,
+        "no_target_report": 1,
+    }
+    assert metrics.power_reports_sent == 2
+    assert metrics.buffer_depth == 1
+
+    actor_name, snapshot = metrics_queue.get_nowait()
+    assert actor_name == "formula"
+    assert snapshot["reports_received"] == 1
+
+
+def test_metrics_are_rendered_in_prometheus_format():
+    metrics = FormulaMetrics("formula")
+    metrics.reports_received = 3
+    metrics.drop_tick("missing_rapl_report")
+    metrics.tick_processing_seconds.observe(0.002)
+
+    text = render_metrics({"formula": metrics.snapshot()})
+
+    assert 'averagewatts_reports_received_total{actor="formula"} 3' in text
+    assert (
+        'averagewatts_ticks_dropped_total{actor="formula",reason="missing_rapl_report"} 1'
+        in text
+    )
+    assert (
+        'averagewatts_tick_processing_seconds_bucket{actor="formula",le="0.001"} 0'
+        in text
+    )
+    assert (
+        'averagewatts_tick_processing_seconds_bucket{actor="formula",le="0.005"} 1'
+        in text
+    )
+    assert 'averagewatts_tick_processing_seconds_count{actor="formula"} 1' in text
+
+
+def test_metrics_server_serves_collected_snapshots():
+    server = MetricsServer(queue.Queue(), 0)
+    server.collect("formula", FormulaMetrics("formula").snapshot())
+    server.start()
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{server.port}/metrics"
+        ) as response:
+            body = response.read().decode()
+    finally:
+        server.stop()
+
+    assert 'averagewatts_ticks_processed_total{actor="formula"} 0' in body
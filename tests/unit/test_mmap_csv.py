@@ -0,0 +1,120 @@
+import datetime
+
+import pytest
+from powerapi.database.base_db import DBError
+from powerapi.database.csv.csvdb import CsvBadCommonKeysError
+from powerapi.report import HWPCReport
+
+from averagewatts.database import MmapCsvDB, ReadOnlyDatabaseError
+from averagewatts.projection import FORMULA_PROJECTION
+
+RAPL_CSV = """timestamp,sensor,target,socket,cpu,RAPL_ENERGY_PKG
+1000,sensor,all,0,0,100
+2000,sensor,all,0,0,200
+3000,sensor,all,0,0,300
+"""
+
+CORE_CSV = """timestamp,sensor,target,socket,cpu,CPU_CLK_THREAD_UNHALTED
+1000,sensor,/a,0,0,10
+1000,sensor,/a,0,1,11
+1000,sensor,all,0,0,21
+2000,sensor,/a,0,0,20
+3000,sensor,/b,1,2,30
+"""
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    rapl = tmp_path / "rapl.csv"
+    rapl.write_text(RAPL_CSV)
+    core = tmp_path / "core.csv"
+    core.write_text(CORE_CSV)
+    return [str(rapl), str(core)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 16, 1 << 20])
+def test_reports_are_merged_by_timestamp(csv_files, chunk_size):
+    database = MmapCsvDB(HWPCReport, csv_files, chunk_size)
+    database.connect()
+
+    reports = list(database.iter())
+
+    assert [(report.timestamp.timestamp(), report.target) for report in reports] == [
+        (1.0, "all"),
+        (1.0, "/a"),
+        (2.0, "all"),
+        (2.0, "/a"),
+        (3.0, "all"),
+        (3.0, "/b"),
+    ]
+    assert reports[0].groups == {
+        "rapl": {"0": {"0": {"RAPL_ENERGY_PKG": 100}}},
+        "core": {"0": {"0": {"CPU_CLK_THREAD_UNHALTED": 21}}},
+    }
+    assert reports[1].groups == {
+        "core": {
+            "0": {
+                "0": {"CPU_CLK_THREAD_UNHALTED": 10},
+                "1": {"CPU_CLK_THREAD_UNHALTED": 11},
+            }
+        },
+    }
+    assert reports[5].groups == {"core": {"1": {"2": {"CPU_CLK_THREAD_UNHALTED": 30}}}}
+
+
+def test_iso_timestamps_are_parsed(tmp_path):
+    rapl = tmp_path / "rapl.csv"
+    rapl.write_text(
+        "timestamp,sensor,target,socket,cpu,RAPL_ENERGY_PKG\n"
+        "2025-02-12T00:00:01.000,sensor,all,0,0,100\n"
+        "2025-02-12T00:00:01.500,sensor,all,0,0,150\n"
+        "2025-02-12T00:00:02.000,sensor,all,0,0,200\n"
+    )
+    database = MmapCsvDB(HWPCReport, [str(rapl)])
+
+    assert [report.timestamp for report in database.iter()] == [
+        datetime.datetime(2025, 2, 12, 0, 0, 1),
+        datetime.datetime(2025, 2, 12, 0, 0, 1, 500000),
+        datetime.datetime(2025, 2, 12, 0, 0, 2),
+    ]
+
+
+def test_invalid_lines_are_skipped(tmp_path):
+    rapl = tmp_path / "rapl.csv"
+    rapl.write_text(RAPL_CSV + "4000,sensor,all,0,0,invalid\nnot-a-timestamp\n")
+    database = MmapCsvDB(HWPCReport, [str(rapl)])
+
+    assert len(list(database.iter())) == 3
+
+
+def test_missing_common_column_is_rejected(tmp_path):
+    rapl = tmp_path / "rapl.csv"
+    rapl.write_text("timestamp,sensor,target,RAPL_ENERGY_PKG\n1000,sensor,all,100\n")
+
+    with pytest.raises(CsvBadCommonKeysError):
+        MmapCsvDB(HWPCReport, [str(rapl)]).iter()
+
+
+def test_projection_skips_the_columns_of_the_dropped_events(csv_files):
+    database = MmapCsvDB(HWPCReport, csv_files, projection=FORMULA_PROJECTION)
+    database.connect()
+
+    reports = list(database.iter())
+
+    assert reports[0].groups == {
+        "rapl": {"0": {"0": {"RAPL_ENERGY_PKG": 100}}},
+        "core": {"0": {"0": {}}},
+    }
+    assert reports[1].groups == {"core": {"0": {"0": {}, "1": {}}}}
+
+
+def test_reports_cannot_be_written(csv_files):
+    database = MmapCsvDB(HWPCReport, csv_files)
+    database.connect()
+    report = next(iter(database.iter()))
+
+    with pytest.raises(ReadOnlyDatabaseError):
+        database.save(report)
+    with pytest.raises(ReadOnlyDatabaseError):
+        database.save_many([report])
+    assert issubclass(ReadOnlyDatabaseError, DBError)
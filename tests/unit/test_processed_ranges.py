@@ -0,0 +1,43 @@
+from averagewatts.checkpoint import ProcessedRangeIndex, ProcessedRanges, ranges_path
+
+
+def test_run_extends_the_intervals_over_its_processed_ticks():
+    ranges = ProcessedRanges([(3000, 5000), (8000, 9000)])
+
+    processed = []
+    for key in range(1000, 12000, 1000):
+        if ranges.is_processed(key):
+            processed.append(key)
+        elif key == 6000:
+            ranges.interrupt()
+        else:
+            ranges.add(key)
+    assert processed == [3000, 4000, 5000, 8000, 9000]
+    assert ranges.intervals() == [(1000, 5000), (7000, 11000)]
+    assert 6000 not in ranges
+    assert 10500 in ranges
+
+    next_run = ProcessedRanges(ranges.intervals())
+    next_run.add(13000)
+    next_run.interrupt()
+    assert next_run.is_processed(11000)
+    next_run.add(12000)
+    assert next_run.intervals() == [(1000, 5000), (7000, 12000), (13000, 13000)]
+
+
+def test_ranges_are_resumed_by_the_next_run(tmp_path):
+    index = ProcessedRangeIndex(str(tmp_path))
+    for key in (1000, 2000, 3000):
+        assert not index.is_processed("sensor/a", "0", key)
+        index.add("sensor/a", "0", key)
+    index.save()
+
+    assert (tmp_path / "sensor%2Fa-0.ranges").exists()
+    assert ranges_path(str(tmp_path), "sensor/a", "0").endswith("sensor%2Fa-0.ranges")
+    rerun_index = ProcessedRangeIndex(str(tmp_path))
+    assert rerun_index.is_processed("sensor/a", "0", 2000)
+    assert rerun_index.is_processed("sensor/a", "0", 3000)
+    assert not rerun_index.is_processed("sensor/a", "0", 4000)
+    assert not rerun_index.is_processed("sensor/a", "1", 2000)
+    rerun_index.add("sensor/a", "0", 4000)
+    assert rerun_index.ranges("sensor/a", "0").intervals() == [(1000, 4000)]
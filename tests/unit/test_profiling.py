@@ -0,0 +1,52 @@
+import os
+
+from averagewatts.profiling import (
+    DISPATCHER_STAGE,
+    FORMULA_STAGE,
+    ActorProfiler,
+    profile_actor,
+    profile_path,
+    summarize_profiles,
+)
+from averagewatts.profiling.profiler import CPU_PROFILE_SUFFIX, MEMORY_PROFILE_SUFFIX
+
+
+def _busy_tick(size: int) -> list[int]:
+    return [value * value for value in range(size)]
+
+
+class ActorStub:
+    def __init__(self, name: str):
+        self.name = name
+        self.retained = []
+
+    def run(self):
+        for _ in range(100):
+            self.retained.append(_busy_tick(1000))
+
+
+def test_profiled_actor_writes_its_profiles(tmp_path):
+    actor = ActorStub("('naive_dispatcher', 'sensor', '0')")
+    profile_actor(actor, str(tmp_path), FORMULA_STAGE, memory=True)
+
+    actor.run()
+
+    for suffix in (CPU_PROFILE_SUFFIX, MEMORY_PROFILE_SUFFIX):
+        assert os.path.isfile(
+            profile_path(str(tmp_path), FORMULA_STAGE, actor.name, suffix)
+        )
+    summary = summarize_profiles(str(tmp_path))
+    assert "formula: 1 actor(s)" in summary
+    assert "(_busy_tick)" in summary
+    assert "test_profiling.py" in summary.split("Memory retained")[1]
+
+
+def test_profiler_inherited_from_the_parent_process_is_discarded(tmp_path):
+    parent = ActorProfiler(str(tmp_path), DISPATCHER_STAGE, "naive_dispatcher")
+    parent.start()
+
+    with ActorProfiler(str(tmp_path), FORMULA_STAGE, "formula"):
+        _busy_tick(1000)
+    parent.stop()
+
+    assert os.listdir(tmp_path) == [f"formula-formula{CPU_PROFILE_SUFFIX}"]
@@ -0,0 +1,96 @@
+import copy
+import datetime
+
+import pytest
+from powerapi.dispatch_rule import HWPCDepthLevel, HWPCDispatchRule
+from powerapi.report import HWPCReport
+
+from averagewatts.projection import FORMULA_PROJECTION, ProjectionFilter
+from averagewatts.tick import TickStore
+
+TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+def _cpus(cpus, **events):
+    return {str(cpu): dict(events) for cpu in cpus}
+
+
+REPORTS = [
+    HWPCReport(
+        TIMESTAMP,
+        "sensor",
+        "all",
+        {
+            "rapl": {
+                "0": _cpus([0], RAPL_ENERGY_PKG=1 << 32, time_enabled=7),
+                "1": _cpus([4], RAPL_ENERGY_PKG=2 << 32, time_enabled=7),
+            },
+            "msr": {
+                "0": _cpus(range(4), APERF=1, MPERF=2, TSC=3),
+                "1": _cpus(range(4, 8), APERF=1, MPERF=2, TSC=3),
+            },
+        },
+    ),
+    HWPCReport(
+        TIMESTAMP,
+        "sensor",
+        "/a",
+        {"core": {"0": _cpus([0, 1], CPU_CLK_THREAD_UNHALTED=10)}},
+        {"app": "a"},
+    ),
+    # Groups with as many cpus: the first one is the dispatch group
+    HWPCReport(
+        TIMESTAMP,
+        "sensor",
+        "/b",
+        {
+            "core": {"1": _cpus([4], CPU_CLK_THREAD_UNHALTED=10)},
+            "msr": {"0": _cpus([0], APERF=1)},
+        },
+    ),
+    # The RAPL group is the dispatch group of the global report
+    HWPCReport(
+        TIMESTAMP,
+        "other",
+        "all",
+        {
+            "rapl": {"0": _cpus([0, 1], RAPL_ENERGY_PKG=1 << 32)},
+            "msr": {"1": _cpus([4], APERF=1)},
+        },
+    ),
+]
+
+
+@pytest.mark.parametrize("report", REPORTS)
+def test_projected_report_is_dispatched_to_the_same_sockets(report):
+    rule = HWPCDispatchRule(HWPCDepthLevel.SOCKET, primary=True)
+    projected = FORMULA_PROJECTION.project(copy.deepcopy(report))
+
+    assert rule.get_formula_id(projected) == rule.get_formula_id(report)
+    assert projected.metadata == report.metadata
+    assert all(
+        events == {}
+        for name, group in projected.groups.items()
+        if name != "rapl"
+        for cpus in group.values()
+        for events in cpus.values()
+    )
+
+
+def test_projected_reports_have_the_same_ticks():
+    stores = [TickStore(None, 8), TickStore(None, 8)]
+    report_filter = ProjectionFilter()
+    report_filter.filter(lambda msg: True, None)
+    for report in REPORTS[:3]:
+        stores[0].append(copy.deepcopy(report))
+        projected = copy.deepcopy(report)
+        report_filter.route(projected)
+        stores[1].append(projected)
+
+    expected, actual = (store.pop_oldest() for store in stores)
+    assert actual.rapl_energies == {"0": 1 << 32, "1": 2 << 32}
+    assert actual.rapl_energies == expected.rapl_energies
+    assert actual.target_names == expected.target_names
+    assert actual.target_metadata == expected.target_metadata
+    assert actual.target_sockets == expected.target_sockets
+    assert actual.sockets == expected.sockets
@@ -0,0 +1,41 @@
+import datetime
+
+import pytest
+from powerapi.report import PowerReport
+
+from averagewatts.pusher import PowerReportBatch, PowerReportBatchHandler
+
+
+def _generate_power_reports(count: int) -> list[PowerReport]:
+    timestamp = datetime.datetime(2025, 2, 12)
+    return [
+        PowerReport(timestamp, "test-sensor", f"/target{i}", 1.0, {"socket": "0"})
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def mock_pusher_state(mocker):
+    state = mocker.MagicMock()
+    state.buffer = []
+    return state
+
+
+def test_batch_is_written_in_bulk(mock_pusher_state):
+    handler = PowerReportBatchHandler(mock_pusher_state, delay=100, max_size=50)
+    reports = _generate_power_reports(60)
+
+    handler.handle(PowerReportBatch("formula", reports))
+
+    mock_pusher_state.database.save_many.assert_called_once_with(reports)
+    assert mock_pusher_state.buffer == []
+
+
+def test_small_batch_is_buffered(mock_pusher_state):
+    handler = PowerReportBatchHandler(mock_pusher_state, delay=60000, max_size=50)
+    reports = _generate_power_reports(10)
+
+    handler.handle(PowerReportBatch("formula", reports))
+
+    mock_pusher_state.database.save_many.assert_not_called()
+    assert mock_pusher_state.buffer == reports
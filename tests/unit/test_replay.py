@@ -0,0 +1,167 @@
+import datetime
+import itertools
+
+import numpy as np
+import pytest
+from powerapi.report import HWPCReport
+
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.checkpoint import ProcessedRangeIndex
+from averagewatts.handler import HWPCReportHandler
+from averagewatts.replay import (
+    CsvReplaySource,
+    ReplayEngine,
+    ReportRows,
+    reports_to_rows,
+)
+
+RAPL_ENERGY_PKG = 11757944832
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+def _generate_tick_reports(tick: int, targets: int) -> list[HWPCReport]:
+    timestamp = START_TIMESTAMP + datetime.timedelta(seconds=tick)
+    global_groups = {
+        "rapl": {
+            "0": {"11": {"RAPL_ENERGY_PKG": RAPL_ENERGY_PKG + tick}},
+            "1": {"12": {"RAPL_ENERGY_PKG": 2 * RAPL_ENERGY_PKG}},
+        }
+    }
+    reports = [HWPCReport(timestamp, "test-sensor", "all", global_groups)]
+    for target in range(targets):
+        socket = str(target % 2)
+        groups = {"core": {socket: {str(target): {"CPU_CLK_THREAD_UNHALTED": 42}}}}
+        reports.append(
+            HWPCReport(
+                timestamp, "test-sensor", f"/target{target}", groups, {"id": target}
+            )
+        )
+    return reports
+
+
+def _dispatched_sockets(report: HWPCReport) -> set[str]:
+    return {socket for group in report.groups.values() for socket in group}
+
+
+def _as_tuples(power_reports) -> list[tuple]:
+    return sorted(
+        (
+            report.timestamp,
+            report.sensor,
+            report.target,
+            report.power,
+            sorted(report.metadata.items()),
+        )
+        for report in power_reports
+    )
+
+
+@pytest.mark.parametrize("socket", ["0", "1"])
+def test_replay_estimation_matches_formula_handler(mocker, socket):
+    reports = [
+        report for tick in range(3) for report in _generate_tick_reports(tick, 5)
+    ]
+
+    state = mocker.MagicMock()
+    state.socket = socket
+    state.sensor = "test-sensor"
+    state.config = AverageWattsFormulaConfig()
+    handler = HWPCReportHandler(state)
+    for report in reports:
+        if socket in _dispatched_sockets(report):
+            handler.ticks.append(report)
+    expected = []
+    while len(handler.ticks):
+        expected.extend(handler._process_oldest_tick())
+
+    power_reports = ReplayEngine([]).estimate(reports_to_rows(reports))
+    replayed = [
+        report for report in power_reports if report.metadata["socket"] == socket
+    ]
+
+    assert _as_tuples(replayed) == _as_tuples(expected)
+
+
+def test_incomplete_ticks_are_skipped():
+    reports = _generate_tick_reports(0, 2)
+    engine = ReplayEngine([])
+
+    power_reports = engine.estimate(reports_to_rows(reports[1:]))
+
+    assert power_reports == []
+    assert engine.skipped_ticks == 2
+
+
+def test_engine_saves_reports_in_bulk(mocker):
+    database = mocker.MagicMock()
+    reports = [
+        report for tick in range(4) for report in _generate_tick_reports(tick, 4)
+    ]
+    # Chunks splitting a tick in two, the engine must wait for the end of the tick
+    rows = reports_to_rows(reports)
+    chunks = [rows.take(np.arange(0, 7)), rows.take(np.arange(7, len(rows)))]
+
+    ReplayEngine([database]).run(chunks)
+
+    database.connect.assert_called_once()
+    saved = [
+        report for call in database.save_many.call_args_list for report in call[0][0]
+    ]
+    assert len(saved) == 4 * (4 + 2)
+    assert [report.timestamp for report in saved] == sorted(
+        report.timestamp for report in saved
+    )
+
+
+def test_rerun_only_processes_the_missing_ticks(mocker, tmp_path):
+    database = mocker.MagicMock()
+    reports = [
+        report for tick in range(4) for report in _generate_tick_reports(tick, 2)
+    ]
+    rows = reports_to_rows(reports)
+    missing_global = (rows.keys == np.unique(rows.keys)[1]) & (rows.targets == "all")
+    ReplayEngine([], ProcessedRangeIndex(str(tmp_path))).run(
+        [rows.take((rows.keys < rows.keys[-1]) & ~missing_global)]
+    )
+
+    engine = ReplayEngine([database], ProcessedRangeIndex(str(tmp_path)))
+    engine.run([rows])
+
+    saved = [
+        report for call in database.save_many.call_args_list for report in call[0][0]
+    ]
+    assert {report.timestamp for report in saved} == {
+        START_TIMESTAMP + datetime.timedelta(seconds=1),
+        START_TIMESTAMP + datetime.timedelta(seconds=3),
+    }
+    assert engine.skipped_ticks == 2 * 2
+
+
+def _write_csv(path, header, lines):
+    path.write_text("\n".join([header, *lines]) + "\n")
+    return str(path)
+
+
+def test_csv_source_yields_chunks_in_timestamp_order(tmp_path):
+    rapl = _write_csv(
+        tmp_path / "rapl.csv",
+        "timestamp,sensor,target,socket,cpu,RAPL_ENERGY_PKG",
+        [f"{1000 * tick},s,all,0,0,{tick}" for tick in range(10)],
+    )
+    core = _write_csv(
+        tmp_path / "core.csv",
+        "timestamp,sensor,target,socket,cpu,CPU_CLK_THREAD_UNHALTED",
+        [
+            f"{1000 * tick},s,/t{cpu},0,{cpu},1"
+            for tick in range(10)
+            for cpu in range(3)
+        ],
+    )
+
+    chunks: list[ReportRows] = list(CsvReplaySource([rapl, core], chunk_size=4))
+
+    for previous, chunk in itertools.pairwise(chunks):
+        assert previous.keys.max() < chunk.keys.min()
+    rows = ReportRows.concatenate(chunks)
+    assert len(rows) == 10 + 30
+    assert np.nansum(rows.energies) == sum(range(10))
@@ -0,0 +1,53 @@
+import datetime
+import pickle
+
+from powerapi.report import PowerReport
+
+from averagewatts.handler.report_metadata import ReportMetadataCache, new_power_report
+
+
+def test_report_metadata_is_reused_until_the_target_metadata_changes():
+    cache = ReportMetadataCache()
+    metadata = {"pod": "pod-1"}
+
+    report_metadata = cache.get("/a", "0", "naive", 1.0, metadata)
+    assert report_metadata == {
+        "pod": "pod-1",
+        "scope": "cpu",
+        "socket": "0",
+        "formula": "naive",
+        "ratio": 1.0,
+    }
+    assert cache.get("/a", "0", "naive", 1.0, dict(metadata)) is report_metadata
+    assert cache.get("/a", "1", "naive", 1.0, metadata) is not report_metadata
+
+    updated_metadata = cache.get("/a", "0", "naive", 1.0, {"pod": "pod-2"})
+    assert updated_metadata["pod"] == "pod-2"
+    assert cache.get("/a", "0", "naive", 1.0, {"pod": "pod-2"}) is updated_metadata
+
+
+def test_targets_unused_for_a_whole_generation_are_evicted():
+    cache = ReportMetadataCache(eviction_ticks=2)
+    cache.get("/stopped", "0", "naive", 1.0, {})
+    cache.get("/running", "0", "naive", 1.0, {})
+
+    for _ in range(2):
+        cache.tick()
+        cache.get("/running", "0", "naive", 1.0, {})
+    assert len(cache) == 2
+
+    cache.tick(2)
+    assert len(cache) == 1
+
+
+def test_new_power_report_is_a_regular_power_report():
+    timestamp = datetime.datetime(2025, 2, 12)
+    metadata = {"socket": "0", "formula": "naive"}
+
+    report = new_power_report(timestamp, "sensor", "/a", 4.2, metadata)
+
+    expected = PowerReport(timestamp, "sensor", "/a", 4.2, metadata)
+    assert report == expected
+    assert report.__dict__ == expected.__dict__
+    assert report.metadata is metadata
+    assert pickle.loads(pickle.dumps(report)) == expected
@@ -0,0 +1,122 @@
+import datetime
+
+import pytest
+from powerapi.report import HWPCReport, PowerReport
+
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.handler import HWPCReportHandler
+from averagewatts.rollup import PowerRollup, RollupWindow, parse_windows
+
+START_KEY = 1739354400000
+
+
+def _power_report(key: int, target: str, power: float) -> PowerReport:
+    timestamp = datetime.datetime.fromtimestamp(key / 1000)
+    return PowerReport(timestamp, "sensor", target, power, {"socket": "0"})
+
+
+def test_windows_durations_are_parsed():
+    assert parse_windows("10s, 1m,500ms,2h,30") == (10000, 60000, 500, 7200000, 30000)
+    assert parse_windows("") == ()
+
+
+@pytest.mark.parametrize("value", ["0s", "10d", "-1s", "s", "1.5s"])
+def test_invalid_windows_durations_are_rejected(value):
+    with pytest.raises(ValueError, match="invalid window duration"):
+        parse_windows(value)
+
+
+def test_window_aggregates_power_estimations():
+    window = RollupWindow(10000)
+    for tick, power in enumerate((1.0, 3.0, 2.0)):
+        key = START_KEY + tick * 1000
+        assert window.add(key, [_power_report(key, "/a", power)]) == []
+
+    rolled_up_reports = window.add(
+        START_KEY + 10000, [_power_report(START_KEY + 10000, "/a", 5.0)]
+    )
+
+    assert len(rolled_up_reports) == 1
+    report = rolled_up_reports[0]
+    assert report.timestamp == datetime.datetime.fromtimestamp(START_KEY / 1000)
+    assert report.target == "/a"
+    assert report.power == 2.0
+    assert report.metadata == {
+        "socket": "0",
+        "window": 10.0,
+        "samples": 3,
+        "power_max": 3.0,
+        "power_sum": 6.0,
+        "energy": 1.0 * 1 + 3.0 * 1 + 2.0 * 8,
+    }
+    # The last estimation lasts as long as the previous gap
+    assert [(report.power, report.metadata["energy"]) for report in window.flush()] == [
+        (5.0, 5.0 * 8)
+    ]
+
+
+def test_rollup_closes_each_window_on_its_own_boundary():
+    rollup = PowerRollup((1000, 3000))
+    windows = []
+    for tick in range(4):
+        key = START_KEY + tick * 1000
+        rolled_up_reports = rollup.add(key, [_power_report(key, "/a", 1.0)])
+        windows.append(
+            sorted(report.metadata["window"] for report in rolled_up_reports)
+        )
+
+    assert windows == [[], [1.0], [1.0], [1.0, 3.0]]
+
+
+def test_handler_sends_rolled_up_reports_to_rollup_outputs(mocker):
+    state = mocker.MagicMock()
+    state.socket = "0"
+    state.sensor = "sensor"
+    state.config = AverageWattsFormulaConfig(
+        rollup_windows=(10000,), full_resolution_outputs=("full",)
+    )
+    state.pushers = {"full": mocker.MagicMock(), "rollup": mocker.MagicMock()}
+    handler = HWPCReportHandler(state)
+
+    for tick in range(12):
+        timestamp = datetime.datetime.fromtimestamp((START_KEY + tick * 1000) / 1000)
+        rapl = {"rapl": {"0": {"0": {"RAPL_ENERGY_PKG": 1 << 32}}}}
+        handler.handle(HWPCReport(timestamp, "sensor", "all", rapl))
+        handler.handle(HWPCReport(timestamp, "sensor", "/a", {"core": {}}))
+
+    full_reports = [
+        call.args[0] for call in state.pushers["full"].send_data.call_args_list
+    ]
+    rollup_reports = [
+        call.args[0] for call in state.pushers["rollup"].send_data.call_args_list
+    ]
+    assert len(full_reports) == 11 * 2
+    assert [(report.target, report.power) for report in rollup_reports] == [
+        ("/a", 1.0),
+        ("rapl", 1.0),
+    ]
+    assert rollup_reports[0].metadata["samples"] == 10
+
+
+def test_current_windows_are_emitted_when_the_formula_stops(mocker):
+    state = mocker.MagicMock()
+    state.socket = "0"
+    state.sensor = "sensor"
+    state.config = AverageWattsFormulaConfig(rollup_windows=(10000,), drain_ticks=True)
+    state.pushers = {"rollup": mocker.MagicMock()}
+    handler = HWPCReportHandler(state)
+
+    for tick in range(12):
+        timestamp = datetime.datetime.fromtimestamp((START_KEY + tick * 1000) / 1000)
+        rapl = {"rapl": {"0": {"0": {"RAPL_ENERGY_PKG": 1 << 32}}}}
+        handler.handle(HWPCReport(timestamp, "sensor", "all", rapl))
+        handler.handle(HWPCReport(timestamp, "sensor", "/a", {"core": {}}))
+    handler.stop(graceful=True)
+
+    rollup_reports = [
+        call.args[0] for call in state.pushers["rollup"].send_data.call_args_list
+    ]
+    assert [report.metadata["samples"] for report in rollup_reports] == [10, 10, 2, 2]
+    assert rollup_reports[-1].timestamp == datetime.datetime.fromtimestamp(
+        (START_KEY + 10000) / 1000
+    )
@@ -0,0 +1,157 @@
+import datetime
+
+import pytest
+from powerapi.report import HWPCReport
+
+from averagewatts.actor import AverageWattsFormulaConfig
+from averagewatts.handler import HWPCReportHandler
+from averagewatts.shared import (
+    SharedPowerEncoder,
+    SharedPowerExpander,
+    SharedPowerFormatError,
+    SharedPowerReport,
+)
+
+RAPL_ENERGY_PKG = 11757944832
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+def _generate_tick_reports(tick: int, targets: list[str]) -> list[HWPCReport]:
+    timestamp = START_TIMESTAMP + datetime.timedelta(seconds=tick)
+    global_groups = {
+        "rapl": {
+            "0": {"0": {"RAPL_ENERGY_PKG": RAPL_ENERGY_PKG + tick}},
+            "1": {"8": {"RAPL_ENERGY_PKG": 2 * RAPL_ENERGY_PKG}},
+        },
+        "msr": {"0": {"0": {}}, "1": {"8": {}}},
+    }
+    reports = [
+        HWPCReport(timestamp, "test-sensor", "all", global_groups, {"tick": tick})
+    ]
+    for index, target in enumerate(targets):
+        sockets = ("0", "1") if index % 2 else ("0",)
+        groups = {"core": {socket: {"0": {"CYCLES": 1}} for socket in sockets}}
+        reports.append(
+            HWPCReport(timestamp, "test-sensor", target, groups, {"tick": tick % 2})
+        )
+    return reports
+
+
+def test_targets_are_only_encoded_when_they_change():
+    encoder = SharedPowerEncoder()
+    metadata = {"a": {"pod": "x"}, "b": {}, "c": {}}
+
+    def encode(tick, targets, **changed):
+        target_metadata = [changed.get(target, metadata[target]) for target in targets]
+        return encoder.encode(
+            START_TIMESTAMP + datetime.timedelta(seconds=tick),
+            "sensor",
+            "0",
+            float(len(targets)),
+            1.0,
+            targets,
+            target_metadata,
+            {},
+        )
+
+    reports = [
+        encode(0, ["a", "b"]),
+        encode(1, ["a", "b"]),
+        encode(2, ["a", "b", "c"]),
+        encode(3, ["a", "b", "c"], a={"pod": "y"}),
+        encode(4, ["c", "a"], a={"pod": "y"}),
+    ]
+
+    assert [report.targets for report in reports] == [
+        (0, 1),
+        None,
+        (0, 1, 2),
+        None,
+        (2, 0),
+    ]
+    assert [report.dictionary for report in reports] == [
+        {0: ("a", {"pod": "x"}), 1: ("b", {})},
+        None,
+        {2: ("c", {})},
+        {0: ("a", {"pod": "y"})},
+        None,
+    ]
+
+    expanded = SharedPowerExpander().expand_many(reports)
+    assert [(report.target, report.metadata.get("pod")) for report in expanded] == [
+        ("a", "x"),
+        ("b", None),
+        ("rapl", None),
+        ("a", "x"),
+        ("b", None),
+        ("rapl", None),
+        ("a", "x"),
+        ("b", None),
+        ("c", None),
+        ("rapl", None),
+        ("a", "y"),
+        ("b", None),
+        ("c", None),
+        ("rapl", None),
+        ("c", None),
+        ("a", "y"),
+        ("rapl", None),
+    ]
+    with pytest.raises(SharedPowerFormatError):
+        SharedPowerExpander().expand(
+            SharedPowerReport(START_TIMESTAMP, "sensor", "0", 1.0, 1.0, (0,))
+        )
+
+
+def test_csv_lines_round_trip():
+    report = SharedPowerReport(
+        START_TIMESTAMP,
+        "sensor",
+        "1",
+        2.5,
+        0.5,
+        (3, 1),
+        {3: ("/a", {"pod": "x"}), 1: ("/b", {})},
+        {"tag": "t"},
+    )
+    unchanged = SharedPowerReport(START_TIMESTAMP, "sensor", "1", 2.0, 0.4)
+
+    for expected in (report, unchanged):
+        header, lines = SharedPowerReport.to_csv_lines(expected, [])
+        (line,) = lines["SharedPowerReport"]
+        assert set(header) <= line.keys()
+        row = {key: str(value) for key, value in line.items()}
+        assert SharedPowerReport.from_csv_lines([("file", row)]) == expected
+
+
+@pytest.mark.parametrize("sensor_level", [False, True])
+def test_expanded_reports_match_the_formula_power_reports(mocker, sensor_level):
+    ticks = [["/a", "/b"], ["/a", "/b"], ["/b", "/c", "/a"], ["/c"]]
+    reports = [
+        _generate_tick_reports(tick, targets) for tick, targets in enumerate(ticks)
+    ]
+
+    def processed_reports(socket, shared_power_reports):
+        state = mocker.MagicMock()
+        state.socket = socket
+        state.sensor = "test-sensor"
+        state.config = AverageWattsFormulaConfig(
+            sensor_level=sensor_level, shared_power_reports=shared_power_reports
+        )
+        handler = HWPCReportHandler(state)
+        for tick_reports in reports:
+            for report in tick_reports:
+                if socket is None or any(
+                    socket in group for group in report.groups.values()
+                ):
+                    handler.ticks.append(report)
+        power_reports = []
+        while len(handler.ticks):
+            power_reports.extend(handler._process_oldest_tick())
+        return power_reports
+
+    for socket in (None,) if sensor_level else ("0", "1"):
+        shared = processed_reports(socket, True)
+        assert all(isinstance(report, SharedPowerReport) for report in shared)
+        expanded = SharedPowerExpander().expand_many(shared)
+        assert expanded == processed_reports(socket, False)
@@ -0,0 +1,156 @@
+import pytest
+
+from averagewatts.target import (
+    OTHER_TARGET,
+    TargetGrouper,
+    TargetReducer,
+    parse_group_rules,
+)
+
+GLOBAL_METADATA = {"global": True}
+
+
+def test_group_rules_are_parsed():
+    assert parse_group_rules("pod; ^/system.slice/->system;^(/user.slice/[^/]+)") == [
+        ("pod", None),
+        ("^/system.slice/", "system"),
+        ("^(/user.slice/[^/]+)", None),
+    ]
+
+
+def test_invalid_group_pattern_is_rejected():
+    with pytest.raises(ValueError, match="invalid target group pattern"):
+        parse_group_rules("^(/kubepods")
+
+
+@pytest.mark.parametrize(
+    ("target", "group"),
+    [
+        (
+            "/kubepods/burstable/pod1a2b-3c4d/0123456789abcdef",
+            "/kubepods/burstable/pod1a2b-3c4d",
+        ),
+        (
+            "/kubepods.slice/kubepods-besteffort.slice/kubepods-besteffort-pod1a2b_3c4d.slice/cri-containerd-0123.scope",
+            "/kubepods.slice/kubepods-besteffort.slice/kubepods-besteffort-pod1a2b_3c4d.slice",
+        ),
+        ("/system.slice/ssh.service", None),
+    ],
+)
+def test_pod_preset_groups_the_containers_of_a_pod(target, group):
+    grouper = TargetGrouper(parse_group_rules("pod"))
+
+    assert grouper.group(target, {}) == group
+
+
+def test_presets_use_the_kubernetes_metadata():
+    metadata = {"k8s": {"namespace": "default", "pod_name": "web-0"}}
+
+    assert TargetGrouper(parse_group_rules("pod")).group("nginx", metadata) == (
+        "default/web-0"
+    )
+    assert TargetGrouper(parse_group_rules("namespace")).group("nginx", metadata) == (
+        "default"
+    )
+
+
+def test_presets_keep_their_position_in_the_table():
+    metadata = {"k8s": {"namespace": "default", "pod_name": "web-0"}}
+
+    system_first = TargetGrouper(parse_group_rules("^/system.slice/->system;namespace"))
+    assert system_first.group("/system.slice/ssh.service", metadata) == "system"
+    assert system_first.group("/kubepods/nginx", metadata) == "default"
+    namespace_first = TargetGrouper(parse_group_rules("namespace;pod"))
+    assert namespace_first.group("nginx", metadata) == "default"
+
+
+def test_presets_without_their_kubernetes_metadata_are_skipped():
+    grouper = TargetGrouper(parse_group_rules("pod;^/(\\w+)"))
+
+    assert grouper.group("/kubepods/nginx", {"k8s": {"namespace": "default"}}) == (
+        "kubepods"
+    )
+
+
+def test_pod_preset_keeps_its_position_in_the_table():
+    target = "/kubepods/burstable/pod1a2b-3c4d/0123456789abcdef"
+
+    rule_first = TargetGrouper(parse_group_rules("^/kubepods/->k8s;pod"))
+    assert rule_first.group(target, {}) == "k8s"
+    pod_first = TargetGrouper(parse_group_rules("pod;^/kubepods/->k8s"))
+    assert pod_first.group(target, {}) == "/kubepods/burstable/pod1a2b-3c4d"
+
+
+def test_first_matching_rule_is_used_and_cached():
+    grouper = TargetGrouper(
+        parse_group_rules(r"^/system.slice/(.*)\.service$->services;^/(\w+)"),
+        cache_size=2,
+    )
+
+    assert grouper.group("/system.slice/ssh.service", {}) == "services"
+    assert grouper.group("/user.slice/user-1000.slice", {}) == "user"
+    assert grouper.cache == {
+        "/system.slice/ssh.service": "services",
+        "/user.slice/user-1000.slice": "user",
+    }
+    assert grouper.group("other", {}) is None
+    assert grouper.cache == {"other": None}
+
+
+def test_reducer_sums_the_power_of_the_grouped_targets():
+    reducer = TargetReducer(TargetGrouper(parse_group_rules("^(/[a-z]+)/")))
+
+    reduced = reducer.reduce(
+        ["/a/1", "/a/2", "/b/1", "c"],
+        [{"t": 1}, {"t": 2}, {"t": 3}, {"t": 4}],
+        1.5,
+        GLOBAL_METADATA,
+    )
+
+    assert reduced == [
+        ("/a", 3.0, {"global": True, "grouped_targets": 2}),
+        ("/b", 1.5, {"global": True, "grouped_targets": 1}),
+        ("c", 1.5, {"t": 4}),
+    ]
+
+
+def test_group_metadata_does_not_depend_on_its_size():
+    reducer = TargetReducer(TargetGrouper(parse_group_rules("^(/[a-z]+)/")))
+
+    ticks = [["/a/1"], ["/a/1", "/a/2", "/a/3"], ["/a/2"]]
+    metadata = [
+        reducer.reduce(targets, [{"t": 1}] * len(targets), 1.0, GLOBAL_METADATA)[0][2]
+        for targets in ticks
+    ]
+
+    assert [set(tick_metadata) for tick_metadata in metadata] == [
+        {"global", "grouped_targets"}
+    ] * 3
+    assert [tick_metadata["grouped_targets"] for tick_metadata in metadata] == [
+        1,
+        3,
+        1,
+    ]
+
+
+def test_reducer_folds_the_targets_outside_the_top_k():
+    reducer = TargetReducer(TargetGrouper(parse_group_rules("^(/[a-z]+)")), top_k=2)
+    targets = ["/a/1", "/a/2", "/a/3", "/b/1", "/b/2", "/c/1", "/d/1"]
+
+    reduced = reducer.reduce(targets, [{}] * len(targets), 1.0, GLOBAL_METADATA)
+
+    assert [(target, power) for target, power, _ in reduced] == [
+        ("/a", 3.0),
+        ("/b", 2.0),
+        (OTHER_TARGET, 2.0),
+    ]
+    assert reduced[-1][2] == {"global": True, "grouped_targets": 2}
+
+
+def test_reducer_keeps_the_targets_within_the_top_k():
+    reducer = TargetReducer(top_k=2)
+
+    assert reducer.reduce(["/a", "/b"], [{}, {}], 1.0, GLOBAL_METADATA) == [
+        ("/a", 1.0, {}),
+        ("/b", 1.0, {}),
+    ]
@@ -0,0 +1,161 @@
+import datetime
+
+import pytest
+from powerapi.report import HWPCReport
+
+from averagewatts.tick import TickStore, TickStoreFullError
+
+RAPL_ENERGY_PKG = 11757944832
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0)
+
+
+def _timestamp(tick: int) -> datetime.datetime:
+    return START_TIMESTAMP + datetime.timedelta(seconds=tick)
+
+
+def _global_report(tick: int, socket: str = "0") -> HWPCReport:
+    groups = {
+        "rapl": {socket: {"11": {"RAPL_ENERGY_PKG": RAPL_ENERGY_PKG}}},
+        "msr": {socket: {"11": {"APERF": 1, "MPERF": 2, "TSC": 3}}},
+    }
+    return HWPCReport(_timestamp(tick), "test-sensor", "all", groups)
+
+
+def _target_report(tick: int, target: str, metadata=None) -> HWPCReport:
+    groups = {"core": {"0": {"11": {"CPU_CLK_THREAD_UNHALTED:REF_P": 42}}}}
+    return HWPCReport(_timestamp(tick), "test-sensor", target, groups, metadata or {})
+
+
+@pytest.fixture
+def tick_store():
+    return TickStore("0", 3)
+
+
+def test_pop_oldest_returns_projected_tick(tick_store):
+    tick_store.append(_target_report(0, "/a", {"k": "v"}))
+    tick_store.append(_global_report(0))
+    tick_store.append(_target_report(0, "/b"))
+
+    tick = tick_store.pop_oldest()
+
+    assert tick.timestamp == _timestamp(0)
+    assert tick.has_global_report
+    assert tick.rapl_energy == RAPL_ENERGY_PKG
+    assert tick.target_names == ["/a", "/b"]
+    assert tick.target_metadata == [{"k": "v"}, {}]
+    assert len(tick_store) == 0
+
+
+def test_ticks_are_popped_in_timestamp_order(tick_store):
+    for tick in (2, 0, 1):
+        tick_store.append(_target_report(tick, "/a"))
+
+    assert tick_store.oldest_key() == tick_store.keys()[0]
+    assert [tick_store.pop_oldest().timestamp for _ in range(3)] == [
+        _timestamp(0),
+        _timestamp(1),
+        _timestamp(2),
+    ]
+
+
+def test_oldest_tick_completeness(tick_store):
+    tick_store.append(_target_report(0, "/a"))
+    tick_store.append(_target_report(0, "/b"))
+    assert tick_store.ready_count(None, 2) == 0
+
+    tick_store.append(_global_report(0))
+    assert tick_store.ready_count(None, 2) == 1
+    assert tick_store.ready_count(None, 3) == 0
+
+
+def test_duplicate_report_replaces_previous_one(tick_store):
+    assert not tick_store.append(_target_report(0, "/a", {"v": 1}))
+    assert tick_store.append(_target_report(0, "/a", {"v": 2}))
+    assert not tick_store.append(_global_report(0))
+    assert tick_store.append(_global_report(0))
+
+    tick = tick_store.pop_oldest()
+    assert tick.target_names == ["/a"]
+    assert tick.target_metadata == [{"v": 2}]
+
+
+def test_missing_rapl_socket_is_reported_as_missing_energy():
+    tick_store = TickStore("1", 1)
+    tick_store.append(_global_report(0, socket="0"))
+
+    tick = tick_store.pop_oldest()
+    assert tick.has_global_report
+    assert tick.rapl_energy is None
+
+
+def test_unchanged_metadata_is_shared_between_ticks(tick_store):
+    tick_store.append(_target_report(0, "/a", {"pod": "x"}))
+    tick_store.append(_target_report(1, "/a", {"pod": "x"}))
+
+    first, second = tick_store.pop_oldest(), tick_store.pop_oldest()
+    assert first.target_metadata[0] is second.target_metadata[0]
+
+
+def test_target_ids_are_released_once_ticks_are_popped(tick_store):
+    for tick in range(3):
+        for target in range(tick * 10, tick * 10 + 10):
+            tick_store.append(_target_report(tick, f"/target{target}"))
+        tick_store.pop_oldest()
+
+    assert not tick_store._target_ids
+    assert len(tick_store._target_names) == 10
+
+
+def test_full_store_rejects_new_tick(tick_store):
+    for tick in range(3):
+        tick_store.append(_target_report(tick, "/a"))
+
+    tick_store.append(_target_report(2, "/b"))
+    with pytest.raises(TickStoreFullError):
+        tick_store.append(_target_report(3, "/a"))
+
+
+def test_exported_ticks_are_restored(tick_store):
+    tick_store.append(_global_report(0))
+    tick_store.append(_target_report(0, "/a", {"pod": "a"}))
+    tick_store.append(_target_report(1, "/b"))
+
+    restored_store = TickStore("0", 3)
+    restored_store.restore(tick_store.export())
+
+    assert restored_store.keys() == tick_store.keys()
+    tick = restored_store.pop_oldest()
+    assert tick.rapl_energy == RAPL_ENERGY_PKG
+    assert tick.target_names == ["/a"]
+    assert tick.target_metadata == [{"pod": "a"}]
+    assert not restored_store.pop_oldest().has_global_report
+
+
+def test_exported_sockets_of_the_targets_are_restored():
+    tick_store = TickStore(None, 3)
+    tick_store.append(_global_report(0, "1"))
+    tick_store.append(_target_report(0, "/a"))
+
+    restored_store = TickStore(None, 3)
+    restored_store.append(_target_report(1, "/b"))
+    restored_store.restore(tick_store.export())
+
+    tick = restored_store.pop_oldest()
+    assert tick.rapl_energies == {"1": RAPL_ENERGY_PKG}
+    assert [
+        tick.sockets[bit]
+        for bit in range(len(tick.sockets))
+        if tick.target_sockets[0] >> bit & 1
+    ] == ["0"]
+
+
+def test_report_count_ignores_duplicates(tick_store):
+    tick_store.append(_global_report(0))
+    tick_store.append(_global_report(0))
+    tick_store.append(_target_report(0, "/a"))
+    tick_store.append(_target_report(0, "/a"))
+    tick_store.append(_target_report(1, "/a"))
+    assert tick_store.report_count == 3
+
+    tick_store.pop_oldest()
+    assert tick_store.report_count == 1
@@ -0,0 +1,119 @@
+import datetime
+
+import pytest
+from powerapi.report import HWPCReport
+
+from averagewatts.transport import ReportRing, RingReader, RingWriter
+
+START_TIMESTAMP = datetime.datetime(2025, 2, 12, 10, 0, 0, 123000)
+
+
+class FormulaStub:
+    name = "formula"
+
+    def __init__(self):
+        self.messages = []
+
+    def send_data(self, msg):
+        self.messages.append(msg)
+
+    @staticmethod
+    def is_alive():
+        return True
+
+
+@pytest.fixture
+def ring():
+    ring = ReportRing(8)
+    yield ring
+    ring.close(unlink=True)
+
+
+def _reports(tick: int) -> list[HWPCReport]:
+    timestamp = START_TIMESTAMP + datetime.timedelta(seconds=tick)
+    global_groups = {
+        "rapl": {"0": {"3": {"RAPL_ENERGY_PKG": 1000 + tick}}, "1": {}},
+        "msr": {"0": {"3": {"TSC": 1}}},
+    }
+    return [
+        HWPCReport(timestamp, "sensor", "all", global_groups, {"tick": tick}),
+        HWPCReport(timestamp, "sensor", "/a", {"core": {}}, {"pod": "a"}),
+        HWPCReport(timestamp, "sensor", "/b", {"core": {}}, {"pod": "b"}),
+    ]
+
+
+def _transfer(writer: RingWriter, reader: RingReader, reports) -> list[HWPCReport]:
+    received = []
+    for report in reports:
+        writer.write(report)
+        writer.flush()
+        for msg in writer.formula.messages:
+            received.extend(reader.read(msg))
+        writer.formula.messages.clear()
+    return received
+
+
+def test_reports_are_projected_through_the_ring(ring):
+    writer = RingWriter(ring, FormulaStub(), "0", "dispatcher")
+    reader = RingReader(ring, "sensor", "0")
+    reports = [report for tick in range(5) for report in _reports(tick)]
+
+    received = _transfer(writer, reader, reports)
+
+    assert ring.read_position == len(reports)
+    assert [
+        (report.timestamp, report.sensor, report.target, report.metadata)
+        for report in received
+    ] == [
+        (report.timestamp, report.sensor, report.target, report.metadata)
+        for report in reports
+    ]
+    assert received[3].groups == {"rapl": {"0": {"0": {"RAPL_ENERGY_PKG": 1001}}}}
+    assert received[4].groups == {}
+
+
+def test_global_report_without_energy_of_the_socket(ring):
+    writer = RingWriter(ring, FormulaStub(), "1", "dispatcher")
+    reader = RingReader(ring, "sensor", "1")
+
+    received = _transfer(writer, reader, _reports(0)[:1])
+
+    assert received[0].target == "all"
+    assert received[0].groups == {}
+
+
+def test_targets_are_defined_once_and_redefined_when_their_metadata_changes(ring):
+    formula = FormulaStub()
+    writer = RingWriter(ring, formula, "0", "dispatcher")
+    reader = RingReader(ring, "sensor", "0")
+    report = _reports(0)[1]
+    for _ in range(3):
+        writer.write(report)
+    writer.write(HWPCReport(report.timestamp, "sensor", "/a", {}, {"pod": "new"}))
+    writer.flush()
+
+    (msg,) = formula.messages
+    assert msg.end == 4
+    assert msg.definitions == [(0, "/a", {"pod": "a"}), (1, "/a", {"pod": "new"})]
+    assert msg.retired == [0]
+    assert [report.metadata for report in reader.read(msg)] == [{"pod": "a"}] * 3 + [
+        {"pod": "new"}
+    ]
+    assert reader.targets == {1: ("/a", {"pod": "new"})}
+
+
+def test_full_ring_notifies_the_formula_before_waiting(ring):
+    formula = FormulaStub()
+    writer = RingWriter(ring, formula, "0", "dispatcher")
+    for tick in range(2):
+        for report in _reports(tick):
+            writer.write(report)
+    assert not formula.messages
+
+    writer.write(_reports(2)[0])
+    writer.write(_reports(2)[1])
+
+    formula.is_alive = lambda: False
+    with pytest.raises(BrokenPipeError):
+        writer.write(_reports(2)[2])
+    assert formula.messages[-1].end == ring.capacity